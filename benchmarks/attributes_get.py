@@ -0,0 +1,52 @@
+"""
+Measures lookup time of the first and the last attribute of the User schema (with
+the enterprise extension), by attribute representation, by Python name, and by PATCH path,
+and checks it does not depend on the position of the attribute.
+
+Run from the repository root: python -m benchmarks.attributes_get
+"""
+import timeit
+
+from src.assets.schemas.user import User
+from src.data.container import AttrRep
+from src.data.path import PatchPath
+
+NUMBER = 100_000
+# allowed ratio of lookup times of the last and the first attribute (it was over 40x
+# when attributes were scanned)
+MAX_RELATIVE_COST = 2.0
+
+
+def _time(func) -> float:
+    return min(timeit.repeat(func, number=NUMBER, repeat=5)) / NUMBER
+
+
+def main():
+    attrs = User().attrs
+    print(f"{len(list(attrs))} attributes")
+    first = AttrRep.parse("urn:ietf:params:scim:schemas:core:2.0:User:id")
+    last = AttrRep.parse(
+        "urn:ietf:params:scim:schemas:extension:enterprise:2.0:User:manager.displayName"
+    )
+    first_path = PatchPath.parse("id")[0]
+    last_path = PatchPath.parse(repr(last))[0]
+    cases = {
+        "get": (lambda: attrs.get(first), lambda: attrs.get(last)),
+        "getattr": (lambda: attrs.id, lambda: attrs.x509certificates__value),
+        "get_by_path": (
+            lambda: attrs.get_by_path(first_path),
+            lambda: attrs.get_by_path(last_path),
+        ),
+    }
+    for name, (get_first, get_last) in cases.items():
+        first_time, last_time = _time(get_first), _time(get_last)
+        relative_cost = last_time / first_time
+        print(
+            f"{name}: first {first_time * 1e9:.0f} ns, last {last_time * 1e9:.0f} ns "
+            f"({relative_cost:.2f}x)"
+        )
+        assert relative_cost < MAX_RELATIVE_COST, f"{name!r} depends on attribute position"
+
+
+if __name__ == "__main__":
+    main()
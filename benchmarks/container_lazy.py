@@ -0,0 +1,74 @@
+"""
+Compares wrapping a group with 100k members (about 14 MB of JSON) in `SCIMDataContainer`
+eagerly and lazily: the time and the memory allocated to wrap the group and read its
+'displayName' only, to read 'value' of all members, and to parse the group with
+the `Group` schema (which wraps input data lazily).
+
+Run from the repository root: python -m benchmarks.container_lazy
+"""
+import json
+import timeit
+import tracemalloc
+
+from src.assets.schemas.group import Group
+from src.data.container import AttrRep, SCIMDataContainer
+
+N_MEMBERS = 100_000
+# required speedup of reading 'displayName' of lazily wrapped group
+MIN_SPEEDUP = 100
+
+DISPLAY_NAME = AttrRep(attr="displayName")
+MEMBERS_VALUE = AttrRep(attr="members", sub_attr="value")
+
+
+def _measure(func):
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return min(timeit.repeat(func, number=1, repeat=3)), peak
+
+
+def main():
+    data = {
+        "schemas": ["urn:ietf:params:scim:schemas:core:2.0:Group"],
+        "displayName": "Big Group",
+        "members": [
+            {
+                "value": f"2819c223-7f76-453a-919d-{i:012d}",
+                "$ref": f"https://example.com/v2/Users/2819c223-7f76-453a-919d-{i:012d}",
+                "type": "User",
+            }
+            for i in range(N_MEMBERS)
+        ],
+    }
+    print(f"members: {N_MEMBERS}, JSON size: {len(json.dumps(data)) / 1e6:.1f} MB")
+    schema = Group()
+
+    results = {}
+    for lazy in (False, True):
+        results[lazy] = {
+            "wrap and read 'displayName'": _measure(
+                lambda: SCIMDataContainer(data, lazy=lazy)[DISPLAY_NAME]
+            ),
+            "wrap and read 'members.value'": _measure(
+                lambda: SCIMDataContainer(data, lazy=lazy)[MEMBERS_VALUE]
+            ),
+            "parse": _measure(lambda: schema.parse(SCIMDataContainer(data, lazy=lazy))),
+        }
+
+    for case, (eager_time, eager_peak) in results[False].items():
+        lazy_time, lazy_peak = results[True][case]
+        print(
+            f"{case}: eager {eager_time * 1000:.2f} ms, {eager_peak / 1e6:.1f} MB; "
+            f"lazy {lazy_time * 1000:.2f} ms, {lazy_peak / 1e6:.1f} MB "
+            f"({eager_time / lazy_time:.1f}x faster)"
+        )
+    speedup = results[False]["wrap and read 'displayName'"][0] / (
+        results[True]["wrap and read 'displayName'"][0]
+    )
+    assert speedup >= MIN_SPEEDUP, "lazy wrapping reads whole data"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Compares matching a ListResponse of 100 users with wide 'or' filters of 1000 comparisons
+of the same attribute, bound to the schema and compiled for the schema (with comparisons
+compiled to a single lookup).
+
+Run from the repository root: python -m benchmarks.filter_alternatives
+"""
+import timeit
+
+from benchmarks.filter_compile import _get_list_response
+from src.assets.schemas.user import User
+from src.data.container import AttrRep
+from src.filter import Filter
+
+N_USERS = 100
+N_TERMS = 1000
+FILTER_EXPS = {
+    "eq": " or ".join(f'id eq "{i * 10}"' for i in range(N_TERMS)),
+    "sw": " or ".join(f'userName sw "USER-{i * 10}5"' for i in range(N_TERMS)),
+    "co": " or ".join(f'emails.value co "-{i * 10}7@"' for i in range(N_TERMS)),
+}
+
+
+def main():
+    schema = User()
+    resources = _get_list_response(N_USERS)[AttrRep(attr="Resources")]
+    for name, filter_exp in FILTER_EXPS.items():
+        filter_, _ = Filter.parse(filter_exp)
+        bound, _ = filter_.bind(schema)
+        compiled, _ = filter_.compile(schema)
+
+        matched = [resource for resource in resources if bound(resource)]
+        assert matched == [resource for resource in resources if compiled(resource)]
+
+        bound_time = timeit.timeit(lambda: [bound(resource) for resource in resources], number=1)
+        compiled_time = min(
+            timeit.repeat(lambda: [compiled(resource) for resource in resources], number=1)
+        )
+        print(f"{name!r} x {N_TERMS}, resources: {len(resources)}, matched: {len(matched)}")
+        print(f"  bound Filter:   {bound_time * 1000:.1f} ms")
+        print(
+            f"  CompiledFilter: {compiled_time * 1000:.1f} ms "
+            f"({bound_time / compiled_time:.1f}x faster)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Compares matching resources from a ListResponse of 10k users with a filter called with
+a schema and with the same filter compiled for the schema.
+
+Run from the repository root: python -m benchmarks.filter_compile
+"""
+import timeit
+
+from src.assets.schemas.user import User
+from src.data.container import AttrRep, SCIMDataContainer
+from src.filter import Filter
+
+N_USERS = 10_000
+FILTER_EXP = (
+    'userName sw "user-1" and (emails[type eq "work" and value ew "@example.com"] '
+    'or not (title pr)) and name.givenName ne "Nobody"'
+)
+
+
+def _get_list_response(n_users: int) -> SCIMDataContainer:
+    return SCIMDataContainer(
+        {
+            "schemas": ["urn:ietf:params:scim:api:messages:2.0:ListResponse"],
+            "totalResults": n_users,
+            "Resources": [
+                {
+                    "schemas": ["urn:ietf:params:scim:schemas:core:2.0:User"],
+                    "id": str(i),
+                    "userName": f"User-{i}",
+                    "name": {"givenName": f"Given-{i}", "familyName": "Jensen"},
+                    "title": "Tour Guide" if i % 3 else None,
+                    "emails": [
+                        {"value": f"user-{i}@example.com", "type": "work", "primary": True},
+                        {"value": f"user-{i}@jensen.org", "type": "home"},
+                    ],
+                }
+                for i in range(n_users)
+            ],
+        }
+    )
+
+
+def main():
+    schema = User()
+    resources = _get_list_response(N_USERS)[AttrRep(attr="Resources")]
+    filter_, _ = Filter.parse(FILTER_EXP)
+    compiled, _ = filter_.compile(schema)
+
+    matched = [resource for resource in resources if filter_(resource, schema)]
+    assert matched == [resource for resource in resources if compiled(resource)]
+
+    interpreted_time = min(
+        timeit.repeat(lambda: [filter_(resource, schema) for resource in resources], number=1)
+    )
+    compiled_time = min(
+        timeit.repeat(lambda: [compiled(resource) for resource in resources], number=1)
+    )
+    print(f"resources: {len(resources)}, matched: {len(matched)}")
+    print(f"Filter.__call__: {interpreted_time * 1000:.1f} ms")
+    print(
+        f"CompiledFilter:  {compiled_time * 1000:.1f} ms "
+        f"({interpreted_time / compiled_time:.1f}x faster)"
+    )
+
+
+if __name__ == "__main__":
+    main()
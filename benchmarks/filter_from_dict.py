@@ -0,0 +1,38 @@
+"""
+Compares rebuilding filters from `Filter.to_dict` output and from `Filter.to_bytes` output
+with parsing their expressions again (without the parse cache), and checks rebuilding
+from dict is at least an order of magnitude faster.
+
+Run from the repository root: python -m benchmarks.filter_from_dict
+"""
+import timeit
+
+from src.filter import Filter, _FilterParser
+
+FILTER_EXPS = (
+    'userName eq "bjensen"',
+    'title pr and (userName sw "b" or emails[type eq "work" and value co "@example.com"])',
+    'emails[type eq "work" and value co "@example.com"] or (userName sw "b" and not (title pr))'
+    ' or meta.lastModified gt "2011-05-13T04:42:34Z" or name.familyName ew "sen"',
+)
+MIN_SPEEDUP = 10.0
+
+
+def main():
+    for filter_exp in FILTER_EXPS:
+        filter_, _ = Filter.parse(filter_exp)
+        filter_dict, data = filter_.to_dict(), filter_.to_bytes()
+
+        parse_time = min(timeit.repeat(lambda: _FilterParser(filter_exp).parse(), number=1000))
+        dict_time = min(timeit.repeat(lambda: Filter.from_dict(filter_dict), number=1000))
+        bytes_time = min(timeit.repeat(lambda: Filter.from_bytes(data), number=1000))
+        print(
+            f"{len(filter_exp)} chars, {len(data)} bytes: parse {parse_time * 1000:.1f} us, "
+            f"from_dict {dict_time * 1000:.1f} us ({parse_time / dict_time:.1f}x faster), "
+            f"from_bytes {bytes_time * 1000:.1f} us ({parse_time / bytes_time:.1f}x faster)"
+        )
+        assert parse_time / dict_time > MIN_SPEEDUP, "rebuilding from dict is too slow"
+
+
+if __name__ == "__main__":
+    main()
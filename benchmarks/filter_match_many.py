@@ -0,0 +1,37 @@
+"""
+Compares matching resources from a ListResponse of 10k users one by one, with a filter
+called with a schema, and all at once, with `Filter.match_many`.
+
+Run from the repository root: python -m benchmarks.filter_match_many
+"""
+import timeit
+
+from benchmarks.filter_compile import FILTER_EXP, N_USERS, _get_list_response
+from src.assets.schemas.user import User
+from src.data.container import AttrRep
+from src.data.operator import MatchStatus
+from src.filter import Filter
+
+
+def main():
+    schema = User()
+    resources = _get_list_response(N_USERS)[AttrRep(attr="Resources")]
+    filter_, _ = Filter.parse(FILTER_EXP)
+
+    matches = [filter_(resource, schema).status == MatchStatus.PASSED for resource in resources]
+    assert matches == filter_.match_many(resources, schema)
+
+    one_by_one_time = min(
+        timeit.repeat(lambda: [filter_(resource, schema) for resource in resources], number=1)
+    )
+    match_many_time = min(timeit.repeat(lambda: filter_.match_many(resources, schema), number=1))
+    print(f"resources: {len(resources)}, matched: {sum(matches)}")
+    print(f"Filter.__call__:    {one_by_one_time * 1000:.1f} ms")
+    print(
+        f"Filter.match_many:  {match_many_time * 1000:.1f} ms "
+        f"({one_by_one_time / match_many_time:.1f}x faster)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Compares matching records of NDJSON file with 100k users with `filter_ndjson`, that skips
+lines without literals of the filter, and with decoding every line and matching it with
+compiled filter.
+
+Run from the repository root: python -m benchmarks.filter_ndjson
+"""
+import json
+import os
+import tempfile
+import timeit
+
+from benchmarks.filter_compile import _get_list_response
+from src.assets.schemas.user import User
+from src.data.container import AttrRep, SCIMDataContainer
+from src.filter import Filter
+from src.ndjson import filter_ndjson
+
+N_USERS = 100_000
+FILTER_EXP = 'userName eq "user-4242" or emails[type eq "home" and value sw "user-777@"]'
+
+
+def main():
+    schema = User()
+    resources = _get_list_response(N_USERS)[AttrRep(attr="Resources")]
+    with tempfile.NamedTemporaryFile("w", suffix=".ndjson", delete=False) as file:
+        for resource in resources:
+            file.write(json.dumps(resource.to_dict()) + "\n")
+    try:
+        filter_, _ = Filter.parse(FILTER_EXP)
+        compiled, _ = filter_.compile(schema)
+
+        def match_all_lines():
+            with open(file.name, "rb") as lines:
+                return [
+                    data
+                    for data in (SCIMDataContainer(json.loads(line)) for line in lines)
+                    if compiled(data)
+                ]
+
+        def match_prefiltered_lines():
+            return list(filter_ndjson(file.name, filter_, schema)[0])
+
+        matched = match_prefiltered_lines()
+        assert [data.to_dict() for data in matched] == [
+            data.to_dict() for data in match_all_lines()
+        ]
+
+        all_lines_time = min(timeit.repeat(match_all_lines, number=1, repeat=3))
+        prefiltered_time = min(timeit.repeat(match_prefiltered_lines, number=1, repeat=3))
+        print(f"records: {N_USERS}, matched: {len(matched)}")
+        print(f"decoding every line: {all_lines_time * 1000:.1f} ms")
+        print(
+            f"filter_ndjson:       {prefiltered_time * 1000:.1f} ms "
+            f"({all_lines_time / prefiltered_time:.1f}x faster)"
+        )
+    finally:
+        os.remove(file.name)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Measures parsing time of worst-case filter expressions (deep nesting, long 'and' / 'or'
+chains, many and long string literals, unbalanced brackets and quotes) of growing length,
+with default `Filter.limits`, and checks it grows linearly with the expression length.
+
+Run from the repository root: python -m benchmarks.filter_parse_worst_case
+"""
+import timeit
+
+from src.filter import Filter
+
+SIZES = (2_000, 4_000, 8_000, 16_000, 32_000)
+# allowed growth of parsing time per character, from the shortest to the longest expressions
+# (it is 16x for quadratic parsing)
+MAX_SLOWDOWN = 3.0
+
+
+def _repeat(part: str, separator: str, length: int) -> str:
+    return separator.join([part] * max(1, length // (len(part) + len(separator))))
+
+
+CORPUS = {
+    "nested groups": lambda n: _repeat("(" * 50 + "title pr" + ")" * 50, " or ", n),
+    "nested not": lambda n: _repeat("not (" * 50 + "title pr" + ")" * 50, " and ", n),
+    "too deep groups": lambda n: "(" * (n // 2) + ")" * (n // 2),
+    "unclosed groups": lambda n: "(" * n,
+    "unopened groups": lambda n: ")" * n,
+    "and chain": lambda n: _repeat("title pr", " and ", n),
+    "or chain": lambda n: _repeat("title pr", " or ", n),
+    "mixed chain": lambda n: _repeat('title pr and userName eq "a"', " or ", n),
+    "many literals": lambda n: _repeat('userName eq "a"', " or ", n),
+    "long literal": lambda n: 'userName eq "' + "a" * n + '"',
+    "unclosed quotes": lambda n: _repeat('userName eq "a', " ", n),
+    "many complex": lambda n: _repeat('emails[type eq "work" and value co "@"]', " or ", n),
+    "unclosed complex": lambda n: _repeat("emails[type pr", " or ", n),
+    "long attribute": lambda n: "a" * n + " pr",
+    "missing operands": lambda n: _repeat("and", " ", n),
+}
+
+
+def _time_per_char(filter_exp: str) -> float:
+    return min(timeit.repeat(lambda: Filter.parse(filter_exp), number=1, repeat=5)) / len(
+        filter_exp
+    )
+
+
+def main():
+    for name, get_exp in CORPUS.items():
+        filter_exps = [get_exp(size) for size in SIZES]
+        times = [_time_per_char(filter_exp) for filter_exp in filter_exps]
+        slowdown = times[-1] / times[0]
+        parse_times = ", ".join(
+            f"{len(filter_exp)} chars: {t * len(filter_exp) * 1000:.1f} ms"
+            for filter_exp, t in zip(filter_exps, times)
+        )
+        print(f"{name}: {parse_times} ({slowdown:.2f}x time per character)")
+        assert slowdown < MAX_SLOWDOWN, f"parsing {name!r} is not linear"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""
+Compares matching 10k users stored as plain dicts (e.g. fetched from storage) with
+a compiled filter, when wrapping every user in SCIMDataContainer first and when matching
+the dicts in place.
+
+Run from the repository root: python -m benchmarks.filter_plain_dicts
+"""
+import timeit
+
+from benchmarks.filter_compile import FILTER_EXP, N_USERS, _get_list_response
+from src.assets.schemas.user import User
+from src.data.container import AttrRep, SCIMDataContainer
+from src.filter import Filter
+
+
+def main():
+    schema = User()
+    users = [
+        resource.to_dict()
+        for resource in _get_list_response(N_USERS)[AttrRep(attr="Resources")]
+    ]
+    filter_, _ = Filter.parse(FILTER_EXP)
+    compiled, _ = filter_.compile(schema)
+
+    matched = [user for user in users if compiled(SCIMDataContainer(user))]
+    assert matched == [user for user in users if compiled(user)]
+
+    wrapped_time = min(
+        timeit.repeat(lambda: [compiled(SCIMDataContainer(user)) for user in users], number=1)
+    )
+    in_place_time = min(timeit.repeat(lambda: [compiled(user) for user in users], number=1))
+    print(f"resources: {len(users)}, matched: {len(matched)}")
+    print(f"SCIMDataContainer(dict): {wrapped_time * 1000:.1f} ms")
+    print(
+        f"dict:                    {in_place_time * 1000:.1f} ms "
+        f"({wrapped_time / in_place_time:.1f}x faster)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Compares filtering and sorting 200k users, and taking a page of them, in one process
+with `Filter.select` and `Sorter`, and in worker processes with `ShardedExecutor`, for growing
+number of workers (up to the number of CPUs, or 8).
+
+The speedup grows with the number of workers, up to the cost of merging sorted shards
+and taking the page in the parent process, as long as every worker has its own CPU.
+
+Run from the repository root: python -m benchmarks.filter_sharded
+"""
+import os
+import timeit
+
+from benchmarks.filter_compile import _get_list_response
+from src.assets.schemas.user import User
+from src.data.container import AttrRep
+from src.filter import Filter
+from src.sharding import ShardedExecutor
+from src.sorter import Sorter
+
+N_USERS = 200_000
+FILTER_EXP = 'title pr and (userName ew "7" or emails[type eq "work" and value co "1"])'
+SORT_BY = "userName"
+START_INDEX, COUNT = 101, 50
+
+
+def main():
+    schema = User()
+    resources = _get_list_response(N_USERS)[AttrRep(attr="Resources")]
+    filter_, _ = Filter.parse(FILTER_EXP)
+    sorter, _ = Sorter.parse(SORT_BY)
+
+    def select_in_one_process():
+        selected, _ = filter_.select(resources, schema)
+        selected = sorter(selected, schema)
+        return selected[START_INDEX - 1 : START_INDEX - 1 + COUNT], len(selected)
+
+    expected, total_results = select_in_one_process()
+    one_process_time = min(timeit.repeat(select_in_one_process, number=1, repeat=3))
+    print(f"resources: {N_USERS}, matched: {total_results}")
+    print(f"one process: {one_process_time * 1000:.1f} ms")
+
+    n_workers = 1
+    while n_workers <= min(os.cpu_count() or 1, 8):
+        with ShardedExecutor(resources, schema, max_workers=n_workers) as executor:
+            page, _ = executor.select(filter_, sorter, START_INDEX, COUNT)
+            assert page.resources == expected and page.total_results == total_results
+
+            sharded_time = min(
+                timeit.repeat(
+                    lambda: executor.select(filter_, sorter, START_INDEX, COUNT),
+                    number=1,
+                    repeat=3,
+                )
+            )
+        print(
+            f"{n_workers} workers: {sharded_time * 1000:.1f} ms "
+            f"({one_process_time / sharded_time:.1f}x faster)"
+        )
+        n_workers *= 2
+
+
+if __name__ == "__main__":
+    main()
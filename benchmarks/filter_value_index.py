@@ -0,0 +1,59 @@
+"""
+Compares matching groups with 200k members by member, with items of 'members' scanned
+and with values of their sub-attributes indexed (see `ValueIndex`), for repeated queries
+of the same groups.
+
+Run from the repository root: python -m benchmarks.filter_value_index
+"""
+import timeit
+
+from src.assets.schemas.group import Group
+from src.data.container import SCIMDataContainer, ValueIndex
+from src.filter import Filter
+
+N_GROUPS = 5
+N_MEMBERS = 200_000
+N_QUERIES = 20
+
+
+def main():
+    schema = Group()
+    groups = [
+        SCIMDataContainer(
+            {
+                "displayName": f"Group {i}",
+                "members": [
+                    {"value": f"user-{i}-{j}", "display": f"User {j}"} for j in range(N_MEMBERS)
+                ],
+            }
+        )
+        for i in range(N_GROUPS)
+    ]
+    compiled = [
+        Filter.parse(f'members[value eq "user-{i}-{N_MEMBERS - 1}"]')[0].compile(schema)[0]
+        for i in range(N_QUERIES)
+    ]
+
+    def query():
+        return [[bool(match(group)) for group in groups] for match in compiled]
+
+    min_items = ValueIndex.min_items
+    ValueIndex.min_items = None
+    expected = query()
+    scan_time = min(timeit.repeat(query, number=1, repeat=3))
+    ValueIndex.min_items = min_items
+    build_time = timeit.timeit(query, number=1)
+    assert query() == expected
+    index_time = min(timeit.repeat(query, number=1, repeat=3))
+
+    print(f"groups: {N_GROUPS}, members: {N_MEMBERS}, queries: {N_QUERIES}")
+    print(f"scanning members:          {scan_time * 1000:.1f} ms")
+    print(f"building index, first run: {build_time * 1000:.1f} ms")
+    print(
+        f"indexed values:            {index_time * 1000:.1f} ms "
+        f"({scan_time / index_time:.0f}x faster)"
+    )
+
+
+if __name__ == "__main__":
+    main()
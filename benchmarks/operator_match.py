@@ -0,0 +1,76 @@
+"""
+Measures the cost of matching single values with bound comparison operators
+(`AttributeOperator.match`), relative to the cost of calling plain Python function that
+compares the value, and checks it stays within `MAX_RELATIVE_COST`, so matching keeps
+using comparisons prepared once per operator, and shared match results.
+
+Also measures matching data with unbound filters (`Filter.__call__` with schema), relative
+to matching it with filters bound to the schema, and checks it stays within
+`MAX_UNBOUND_RELATIVE_COST`, so unbound filters do not prepare comparisons for every match.
+
+Run from the repository root: python -m benchmarks.operator_match
+"""
+import timeit
+
+from src.assets.schemas.user import User
+from src.data.operator import ComplexAttributeOperator
+from src.data.container import SCIMDataContainer
+from src.filter import Filter
+
+N = 100_000
+MAX_RELATIVE_COST = 8.0
+MAX_UNBOUND_RELATIVE_COST = 1.5
+
+CASES = (
+    ('userName eq "bjensen"', "BJensen"),
+    ('userName ne "bjensen"', "bjensen"),
+    ('userName co "jen"', "bjensen"),
+    ('userName sw "bj"', "bjensen"),
+    ('userName ew "sen"', "bjensen"),
+    ('userName gt "a"', "bjensen"),
+    ("active eq true", True),
+    ("title pr", "Tour Guide"),
+    ('meta.lastModified gt "2011-05-13T04:42:34Z"', "2011-05-13T04:42:35Z"),
+    ('emails eq "bjensen@example.com"', [{"value": "bjensen@example.com"}]),
+)
+
+
+def _compare(value, attrs, strict):
+    return value.lower() == "bjensen" if isinstance(value, str) else value
+
+
+def main():
+    attrs = User().attrs
+    baseline = min(timeit.repeat(lambda: _compare("BJensen", attrs, True), number=N, repeat=5))
+    print(f"plain function: {baseline / N * 1e9:.0f} ns")
+    for filter_exp, value in CASES:
+        filter_, _ = Filter.parse(filter_exp)
+        bound, _ = filter_.bind(User())
+        operator_ = bound.operator
+        if isinstance(operator_, ComplexAttributeOperator):
+            # bound operators do not look attributes up, so the sub-operator gets the same ones
+            operator_ = operator_.sub_operator
+        match_time = min(
+            timeit.repeat(lambda: operator_.match(value, attrs, True), number=N, repeat=5)
+        )
+        relative_cost = match_time / baseline
+        print(f"{filter_exp}: {match_time / N * 1e9:.0f} ns ({relative_cost:.1f}x)")
+        assert relative_cost < MAX_RELATIVE_COST, f"matching {filter_exp!r} is too slow"
+
+    schema = User()
+    for filter_exp, value in CASES:
+        filter_, _ = Filter.parse(filter_exp)
+        bound, _ = filter_.bind(schema)
+        data = SCIMDataContainer()
+        data[filter_.operator.attr_rep] = value
+        bound_time = min(timeit.repeat(lambda: bound(data), number=N, repeat=5))
+        unbound_time = min(timeit.repeat(lambda: filter_(data, schema), number=N, repeat=5))
+        relative_cost = unbound_time / bound_time
+        print(f"unbound {filter_exp}: {unbound_time / N * 1e9:.0f} ns ({relative_cost:.1f}x)")
+        assert (
+            relative_cost < MAX_UNBOUND_RELATIVE_COST
+        ), f"matching {filter_exp!r} with unbound filter is too slow"
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,8 @@
 from dataclasses import dataclass, field
 from typing import Any, Dict, List, Optional
 
+from src.filter import FilterLimits
+
 
 @dataclass
 class _GenericOption:
@@ -25,11 +27,25 @@ class _BulkOption(_GenericOption):
 class _FilterOption(_GenericOption):
     max_results: Optional[int] = None
     supported: bool = False
+    max_length: Optional[int] = None
+    max_depth: Optional[int] = FilterLimits().max_depth
+    max_clauses: Optional[int] = None
+    max_literals: Optional[int] = None
+    max_selectivity: Optional[float] = None
 
     def __post_init__(self):
         if self.supported and not self.max_results:
             raise ValueError("'max_results' must be specified if filtering is supported")
 
+    @property
+    def limits(self) -> FilterLimits:
+        return FilterLimits(
+            max_length=self.max_length,
+            max_depth=self.max_depth,
+            max_clauses=self.max_clauses,
+            max_literals=self.max_literals,
+        )
+
 
 @dataclass
 class _AuthenticationScheme:
@@ -1,3 +1,4 @@
+import functools
 from typing import Any, List, Optional, Tuple, Union
 
 from src.attributes_presence import AttributePresenceChecker
@@ -6,7 +7,7 @@ from src.data.attributes import Attribute
 from src.data.container import AttrRep, Invalid, SCIMDataContainer
 from src.data.schemas import BaseSchema
 from src.error import ValidationError, ValidationIssues
-from src.filter import Filter
+from src.filter import Filter, FilterLimits
 from src.sorter import Sorter
 
 
@@ -53,12 +54,12 @@ exclude_attributes = Attribute(
 )
 
 
-filter_ = Attribute(
-    name="filter",
-    type_=type_.String,
-    required=False,
-    parsers=[Filter.parse],
-)
+def _get_filter_attr(limits: Optional[FilterLimits] = None) -> Attribute:
+    parser = Filter.parse if limits is None else functools.partial(Filter.parse, limits=limits)
+    return Attribute(name="filter", type_=type_.String, required=False, parsers=[parser])
+
+
+filter_ = _get_filter_attr()
 
 
 sort_by = Attribute(
@@ -93,13 +94,16 @@ count = Attribute(
 
 
 class SearchRequest(BaseSchema):
-    def __init__(self):
+    def __init__(self, filter_limits: Optional[FilterLimits] = None):
+        """
+        Filters are parsed with `filter_limits`, or `Filter.limits` if not provided.
+        """
         super().__init__(
             schema="urn:ietf:params:scim:api:messages:2.0:SearchRequest",
             attrs=[
                 attributes,
                 exclude_attributes,
-                filter_,
+                filter_ if filter_limits is None else _get_filter_attr(filter_limits),
                 sort_by,
                 sort_order,
                 start_index,
@@ -1,3 +1,4 @@
+from collections import defaultdict
 from typing import Any, Iterable, List, Optional, Tuple, Union
 
 from src.data.attributes import Attribute, AttributeReturn, Attributes
@@ -15,6 +16,11 @@ class AttributePresenceChecker:
         self._attr_reps = list(attr_reps or [])
         self._include = include
         self._ignore_required = list(ignore_required or [])
+        # attribute representations equal to each other are hashed the same, but are not
+        # deduplicated, since attributes with different schemas both equal one without schema
+        self._attr_reps_by_hash = defaultdict(list)
+        for attr_rep in self._attr_reps:
+            self._attr_reps_by_hash[hash(attr_rep)].append(attr_rep)
 
     @property
     def attr_reps(self) -> List[AttrRep]:
@@ -136,9 +142,9 @@ class AttributePresenceChecker:
                 )
 
             elif attr.returned != AttributeReturn.ALWAYS and (
-                (attr_rep in self._attr_reps and self._include is False)
+                (self._is_requested(attr_rep) and self._include is False)
                 or (
-                    attr_rep not in self._attr_reps
+                    not self._is_requested(attr_rep)
                     and not self._sub_attr_or_top_attr_in_attr_reps(attr_rep)
                     and self._include is True
                 )
@@ -153,7 +159,7 @@ class AttributePresenceChecker:
                 and attr_rep not in self._ignore_required
                 and (
                     self._include is not True
-                    or (attr_rep in self._attr_reps and self._include is True)
+                    or (self._is_requested(attr_rep) and self._include is True)
                     or (direction == "RESPONSE" and attr.returned == AttributeReturn.ALWAYS)
                 )
             ):
@@ -163,6 +169,9 @@ class AttributePresenceChecker:
                 )
         return issues
 
+    def _is_requested(self, attr_rep: AttrRep) -> bool:
+        return attr_rep in self._attr_reps_by_hash.get(hash(attr_rep), ())
+
     def _sub_attr_or_top_attr_in_attr_reps(self, attr_rep: AttrRep) -> bool:
         for attr_rep_ in self._attr_reps:
             if (
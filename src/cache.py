@@ -0,0 +1,96 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable, Optional, Tuple, TypeVar
+
+from src.error import ValidationIssues
+
+T = TypeVar("T")
+
+
+class ParseCache:
+    """
+    Size-bounded, least-recently-used cache of parsing results, keyed by the parsed
+    expression. Cached results must be immutable, since the same instance is returned
+    on every hit. Returned validation issues are copied, so callers can modify them.
+
+    The cache is disabled by default (`max_size` equal to 0).
+    """
+
+    def __init__(self, max_size: int = 0):
+        if max_size < 0:
+            raise ValueError("'max_size' must be greater or equal to 0")
+        self._max_size = max_size
+        self._entries: OrderedDict[Hashable, Tuple[Any, ValidationIssues]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    @property
+    def max_size(self) -> int:
+        return self._max_size
+
+    @property
+    def enabled(self) -> bool:
+        return self._max_size > 0
+
+    @property
+    def hits(self) -> int:
+        return self._hits
+
+    @property
+    def misses(self) -> int:
+        return self._misses
+
+    @property
+    def evictions(self) -> int:
+        return self._evictions
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def resize(self, max_size: int) -> None:
+        if max_size < 0:
+            raise ValueError("'max_size' must be greater or equal to 0")
+        with self._lock:
+            self._max_size = max_size
+            self._evict()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._hits = 0
+            self._misses = 0
+            self._evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Tuple[Any, ValidationIssues]]:
+        if not self._max_size:
+            return None
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+        parsed, issues = cached
+        return parsed, _copy_issues(issues)
+
+    def set(self, key: Hashable, parsed: T, issues: ValidationIssues) -> Tuple[T, ValidationIssues]:
+        if self._max_size:
+            with self._lock:
+                self._entries[key] = parsed, _copy_issues(issues)
+                self._entries.move_to_end(key)
+                self._evict()
+        return parsed, issues
+
+    def _evict(self) -> None:
+        while len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+            self._evictions += 1
+
+
+def _copy_issues(issues: ValidationIssues) -> ValidationIssues:
+    copy = ValidationIssues()
+    copy.merge(issues=issues)
+    return copy
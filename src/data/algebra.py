@@ -0,0 +1,404 @@
+import json
+import math
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from src.data import operator as op
+from src.data.attributes import AttributeUniqueness, ComplexAttribute
+from src.data.container import AttrRep
+
+Operator = Union[op.LogicalOperator, op.AttributeOperator, op.ComplexAttributeOperator]
+
+
+def simplify(operator: Operator, use_schema: bool = False) -> Tuple[Operator, str]:
+    """
+    Returns operator equivalent to the provided one, with nested 'and' / 'or' operators
+    flattened, duplicated operands removed and operands ordered, together with its canonical
+    expression. The returned operator matches exactly the same data as the provided one,
+    including match statuses for missing data and unknown attributes.
+
+    Double negations are folded if it does not change the match status. If `use_schema`
+    is set, attributes of bound operators are used to merge operators of the same
+    single-valued complex attribute. Operators created by merging are not bound.
+    """
+    if isinstance(operator, op.MultiOperandLogicalOperator):
+        return _simplify_multi_operand(operator, use_schema)
+
+    if isinstance(operator, op.Not):
+        sub_operator, canonical = simplify(operator.sub_operator, use_schema)
+        if isinstance(sub_operator, op.Not) and _is_two_valued(sub_operator.sub_operator):
+            return sub_operator.sub_operator, canonical[len("not (") : -1]
+        return op.Not(sub_operator), f"not ({canonical})"
+
+    if isinstance(operator, op.ComplexAttributeOperator):
+        sub_operator, canonical = simplify(operator.sub_operator, use_schema)
+        if sub_operator is not operator.sub_operator:
+            operator = op.ComplexAttributeOperator(
+                attr_rep=operator.attr_rep, sub_operator=sub_operator
+            )
+        if isinstance(sub_operator, op.AttributeOperator):
+            return operator, f"{_canonical_attr_rep(operator.attr_rep)}.{canonical}"
+        return operator, f"{_canonical_attr_rep(operator.attr_rep)}[{canonical}]"
+
+    if isinstance(operator, op.BinaryAttributeOperator):
+        return operator, (
+            f"{_canonical_attr_rep(operator.attr_rep)} {operator.SCIM_OP} "
+            f"{_canonical_value(operator.value)}"
+        )
+
+    return operator, f"{_canonical_attr_rep(operator.attr_rep)} {operator.SCIM_OP}"
+
+
+def get_referenced_attr_reps(operator: Operator) -> List[AttrRep]:
+    """
+    Returns representations of attributes and sub-attributes the operator reads, without
+    repetitions. Attributes of bound operators are represented like in the schema, so with
+    schema URIs, and comparisons of multi-valued complex attributes read their 'value'
+    sub-attribute. Representations of attributes not bound are returned as they are.
+    """
+    attr_reps: List[AttrRep] = []
+    for attr_rep in _iter_referenced_attr_reps(operator):
+        if attr_rep not in attr_reps:
+            attr_reps.append(attr_rep)
+    return attr_reps
+
+
+def estimate_selectivity(operator: Operator) -> float:
+    """
+    Estimates the fraction of resources the bound operator matches, without statistics
+    of values, like query planners do: comparisons have default selectivity, except for
+    comparisons of unique attributes that match a single resource, and operands of
+    logical operators are treated as independent. Comparisons of attributes not in
+    the schema never match.
+    """
+    if isinstance(operator, op.And):
+        # 'and' operator ignores operands of unknown attributes
+        selectivities = [
+            estimate_selectivity(sub_operator)
+            for sub_operator in operator.sub_operators
+            if not _refers_unknown_attr(sub_operator)
+        ]
+        return math.prod(selectivities) if selectivities else 0.0
+    if isinstance(operator, op.Or):
+        return 1 - math.prod(
+            1 - estimate_selectivity(sub_operator) for sub_operator in operator.sub_operators
+        )
+    if isinstance(operator, op.Not):
+        return 1 - estimate_selectivity(operator.sub_operator)
+    if _refers_unknown_attr(operator):
+        return 0.0
+    if isinstance(operator, op.ComplexAttributeOperator):
+        return estimate_selectivity(operator.sub_operator)
+
+    attr = operator.attr
+    if isinstance(operator, op.Present):
+        if isinstance(attr, ComplexAttribute) and not attr.multi_valued:
+            return 0.0
+        return _PRESENT_SELECTIVITY
+    value = operator.value
+    if isinstance(operator, (op.Equal, op.NotEqual)):
+        if value is None:
+            selectivity = 1 - _PRESENT_SELECTIVITY
+        elif isinstance(value, bool):
+            selectivity = 0.5
+        elif attr.uniqueness != AttributeUniqueness.NONE:
+            selectivity = 0.0
+        else:
+            selectivity = _EQUAL_SELECTIVITY
+        return 1 - selectivity if isinstance(operator, op.NotEqual) else selectivity
+    if type(operator) in _SUBSTRING_OPERATORS:
+        return _SUBSTRING_SELECTIVITY if value else _PRESENT_SELECTIVITY
+    return _RANGE_SELECTIVITY
+
+
+def implies(operator: Operator, other: Operator) -> bool:
+    """
+    Tells whether data matched by the operator is matched by the `other` one too, when
+    matching with `strict` flag set. Both operators must be bound. Only 'and' / 'or'
+    combinations of comparisons of the same attributes are compared, e.g.
+    'userName eq "abcd"' implies 'userName sw "abc"' and 'meta.lastModified gt "2011..."'
+    implies 'meta.lastModified gt "2010..."', so 'False' means the implication is not known.
+    """
+    if (
+        isinstance(operator, op.LogicalOperator) or operator.attr is not None
+    ) and simplify(operator)[1] == simplify(other)[1]:
+        # operators of unknown attributes do not pass even for the same operators
+        return True
+    if isinstance(other, op.And):
+        return all(implies(operator, sub_operator) for sub_operator in other.sub_operators)
+    if isinstance(operator, op.Or):
+        return all(implies(sub_operator, other) for sub_operator in operator.sub_operators)
+    # operands of 'and' implying the other operator are not of unknown attributes,
+    # so they pass if it passes
+    if isinstance(operator, op.And) and any(
+        implies(sub_operator, other) for sub_operator in operator.sub_operators
+    ):
+        return True
+    if isinstance(other, op.Or) and any(
+        implies(operator, sub_operator) for sub_operator in other.sub_operators
+    ):
+        return True
+
+    if _never_passes(operator):
+        return True
+
+    if isinstance(operator, op.ComplexAttributeOperator):
+        return (
+            isinstance(other, op.ComplexAttributeOperator)
+            and operator.attr is not None
+            and operator.attr is other.attr
+            and implies(operator.sub_operator, other.sub_operator)
+        )
+    if isinstance(operator, op.AttributeOperator) and isinstance(other, op.AttributeOperator):
+        if operator.attr is None or operator.attr is not other.attr:
+            return False
+        return _comparison_implies(operator, other)
+    return False
+
+
+def _comparison_implies(operator: op.AttributeOperator, other: op.AttributeOperator) -> bool:
+    if isinstance(operator, op.Present):
+        return isinstance(other, op.Present) or (
+            isinstance(other, op.NotEqual) and other.value is None
+        )
+
+    value = _get_comparison_value(operator)
+    if value is None:
+        return isinstance(other, op.NotEqual) and other.value is None
+
+    if isinstance(other, op.Present):
+        return _implies_presence(operator, value)
+    other_value = _get_comparison_value(other)
+    if other_value is None:
+        # only values that are not 'null' pass the operator, and 'ne null' matches them
+        return isinstance(other, op.NotEqual)
+
+    if type(operator) is op.Equal:
+        check = other.OPERATOR
+    else:
+        check = _IMPLIED_BY_RANGE.get((type(operator), type(other)))
+    if check is None:
+        return False
+    if type(other) in _SUBSTRING_OPERATORS and not (
+        isinstance(value, str) and isinstance(other_value, str)
+    ):
+        return False
+    try:
+        return bool(check(value, other_value))
+    except TypeError:
+        return False
+
+
+def _never_passes(operator: Operator) -> bool:
+    # comparison with 'null' passes only for values of multi-valued attributes
+    return (
+        isinstance(operator, op.BinaryAttributeOperator)
+        and not isinstance(operator, op.NotEqual)
+        and operator.value is None
+        and operator.attr is not None
+        and not operator.attr.multi_valued
+    )
+
+
+def _refers_unknown_attr(operator: Operator) -> bool:
+    return not isinstance(operator, op.LogicalOperator) and operator.attr is None
+
+
+def _implies_presence(operator: op.BinaryAttributeOperator, value: Any) -> bool:
+    if not isinstance(value, str):
+        # presence of many values is checked with their truthiness, so '0' is not present
+        return not operator.attr.multi_valued
+    # empty strings are not present
+    if isinstance(operator, op.GreaterThan):
+        return True
+    return bool(value) and isinstance(
+        operator, (op.Equal, op.Contains, op.StartsWith, op.EndsWith, op.GreaterThanOrEqual)
+    )
+
+
+def _get_comparison_value(operator: op.BinaryAttributeOperator) -> Any:
+    value = operator.value
+    if value is None:
+        return None
+    if operator.attr.type.SCIM_NAME == "dateTime":
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    if isinstance(value, str) and not operator.attr.case_exact:
+        return value.lower()
+    return value
+
+
+_SUBSTRING_OPERATORS = {op.Contains, op.StartsWith, op.EndsWith}
+
+# default selectivities of comparisons, close to the ones of query planners
+_PRESENT_SELECTIVITY = 0.9
+_EQUAL_SELECTIVITY = 0.005
+_SUBSTRING_SELECTIVITY = 0.05
+_RANGE_SELECTIVITY = 1 / 3
+
+# tells if all values passing the first operator with the first value pass the second
+# operator with the second value, for operators other than 'eq'
+_IMPLIED_BY_RANGE = {
+    (op.StartsWith, op.StartsWith): lambda a, b: a.startswith(b),
+    (op.StartsWith, op.Contains): lambda a, b: b in a,
+    (op.StartsWith, op.GreaterThanOrEqual): lambda a, b: a >= b,
+    (op.StartsWith, op.GreaterThan): lambda a, b: a > b,
+    (op.EndsWith, op.EndsWith): lambda a, b: a.endswith(b),
+    (op.EndsWith, op.Contains): lambda a, b: b in a,
+    (op.Contains, op.Contains): lambda a, b: b in a,
+    (op.GreaterThan, op.GreaterThan): lambda a, b: a >= b,
+    (op.GreaterThan, op.GreaterThanOrEqual): lambda a, b: a >= b,
+    (op.GreaterThan, op.NotEqual): lambda a, b: a >= b,
+    (op.GreaterThanOrEqual, op.GreaterThanOrEqual): lambda a, b: a >= b,
+    (op.GreaterThanOrEqual, op.GreaterThan): lambda a, b: a > b,
+    (op.GreaterThanOrEqual, op.NotEqual): lambda a, b: a > b,
+    (op.LesserThan, op.LesserThan): lambda a, b: a <= b,
+    (op.LesserThan, op.LesserThanOrEqual): lambda a, b: a <= b,
+    (op.LesserThan, op.NotEqual): lambda a, b: a <= b,
+    (op.LesserThanOrEqual, op.LesserThanOrEqual): lambda a, b: a <= b,
+    (op.LesserThanOrEqual, op.LesserThan): lambda a, b: a < b,
+    (op.LesserThanOrEqual, op.NotEqual): lambda a, b: a < b,
+    (op.NotEqual, op.NotEqual): lambda a, b: a == b,
+}
+
+
+def _iter_referenced_attr_reps(operator: Operator, parent: Optional[AttrRep] = None):
+    if isinstance(operator, op.MultiOperandLogicalOperator):
+        for sub_operator in operator.sub_operators:
+            yield from _iter_referenced_attr_reps(sub_operator, parent)
+    elif isinstance(operator, op.Not):
+        yield from _iter_referenced_attr_reps(operator.sub_operator, parent)
+    elif isinstance(operator, op.ComplexAttributeOperator):
+        parent = operator.attr.rep if operator.attr is not None else operator.attr_rep
+        yield from _iter_referenced_attr_reps(operator.sub_operator, parent)
+    else:
+        attr, attr_rep = operator.attr, operator.attr_rep
+        if attr is not None:
+            attr_rep = attr.rep
+            if isinstance(attr, ComplexAttribute) and attr.multi_valued:
+                attr_rep = AttrRep(schema=attr_rep.schema, attr=attr_rep.attr, sub_attr="value")
+        if parent is not None:
+            attr_rep = AttrRep(schema=parent.schema, attr=parent.attr, sub_attr=attr_rep.attr)
+        yield attr_rep
+
+
+def _simplify_multi_operand(
+    operator: op.MultiOperandLogicalOperator, use_schema: bool
+) -> Tuple[Operator, str]:
+    operator_cls = type(operator)
+    operands = _collect_operands(operator, use_schema)
+    if use_schema:
+        operands = _merge_complex_operands(operator_cls, operands)
+
+    canonicals = sorted(operands)
+    if len(canonicals) == 1:
+        # 'and' / 'or' changes match status of missing attribute, so it is kept
+        # for attribute operators
+        canonical = canonicals[0]
+        if isinstance(operands[canonical], op.LogicalOperator):
+            return operands[canonical], canonical
+        return operator_cls(operands[canonical]), f"{canonical} {operator_cls.SCIM_OP} {canonical}"
+
+    return (
+        operator_cls(*(operands[canonical] for canonical in canonicals)),
+        f" {operator_cls.SCIM_OP} ".join(
+            f"({canonical})"
+            if isinstance(operands[canonical], op.MultiOperandLogicalOperator)
+            else canonical
+            for canonical in canonicals
+        ),
+    )
+
+
+def _collect_operands(
+    operator: op.MultiOperandLogicalOperator, use_schema: bool
+) -> Dict[str, Operator]:
+    operands: Dict[str, Operator] = {}
+    for sub_operator in operator.sub_operators:
+        if not isinstance(sub_operator, type(operator)):
+            sub_operator, canonical = simplify(sub_operator, use_schema)
+            if not isinstance(sub_operator, type(operator)):
+                operands.setdefault(canonical, sub_operator)
+                continue
+        for canonical, operand in _collect_operands(sub_operator, use_schema).items():
+            operands.setdefault(canonical, operand)
+    return operands
+
+
+def _merge_complex_operands(
+    operator_cls: type, operands: Dict[str, Operator]
+) -> Dict[str, Operator]:
+    """
+    Merges operators of the same single-valued complex attribute, for example
+    'name.givenName eq "a" and name.familyName eq "b"' into
+    'name[familyName eq "b" and givenName eq "a"]'. Sub-operators are limited to
+    comparisons of known sub-attributes, so each merged operator matches or does not
+    match, no matter the missing data.
+    """
+    to_merge: Dict[str, List[str]] = defaultdict(list)
+    for canonical, operand in operands.items():
+        if (
+            isinstance(operand, op.ComplexAttributeOperator)
+            and isinstance(operand.attr, ComplexAttribute)
+            and not operand.attr.multi_valued
+            and _has_only_comparisons(operand.sub_operator)
+        ):
+            to_merge[_canonical_attr_rep(operand.attr_rep)].append(canonical)
+
+    merged = dict(operands)
+    for canonicals in to_merge.values():
+        if len(canonicals) < 2:
+            continue
+        first = operands[canonicals[0]]
+        operator, canonical = simplify(
+            op.ComplexAttributeOperator(
+                attr_rep=first.attr_rep,
+                sub_operator=operator_cls(*(operands[c].sub_operator for c in canonicals)),
+            )
+        )
+        for c in canonicals:
+            merged.pop(c)
+        merged.setdefault(canonical, operator)
+    return merged
+
+
+def _has_only_comparisons(operator: Operator) -> bool:
+    if isinstance(operator, op.MultiOperandLogicalOperator):
+        return all(_has_only_comparisons(sub_operator) for sub_operator in operator.sub_operators)
+    if isinstance(operator, op.Not):
+        return _has_only_comparisons(operator.sub_operator)
+    return isinstance(operator, op.BinaryAttributeOperator) and operator.attr is not None
+
+
+def _is_two_valued(operator: Operator) -> bool:
+    """
+    Tells whether the operator always passes or fails, regardless of `strict` flag,
+    missing data and presence of attributes in the schema, so double negation of it
+    is the same as the operator.
+    """
+    if isinstance(operator, op.MultiOperandLogicalOperator):
+        return all(_is_two_valued(sub_operator) for sub_operator in operator.sub_operators)
+    if isinstance(operator, op.Not):
+        return not _can_miss_data(operator.sub_operator)
+    return isinstance(operator, op.Present) and operator.attr is not None
+
+
+def _can_miss_data(operator: Operator) -> bool:
+    if isinstance(operator, op.MultiOperandLogicalOperator):
+        return any(_can_miss_data(sub_operator) for sub_operator in operator.sub_operators)
+    return isinstance(operator, op.BinaryAttributeOperator)
+
+
+def _canonical_attr_rep(attr_rep: AttrRep) -> str:
+    return (attr_rep.sub_attr or attr_rep.attr_with_schema).lower()
+
+
+def _canonical_value(value: Any) -> str:
+    if isinstance(value, str):
+        if '"' in value:
+            return f"'{value}'"
+        return f'"{value}"'
+    return json.dumps(value)
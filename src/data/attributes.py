@@ -410,11 +410,23 @@ def validate_single_primary_value(
 
 
 class Attributes:
+    """
+    Collection of attributes, looked up by lowercase names, with the schema or without
+    it (the schema is checked only if both the attribute and the representation have one).
+    """
+
     def __init__(self, attrs: Iterable[Attribute]):
         self._top_level: List[Attribute] = []
         self._attrs = {}
+        self._attrs_by_key: Dict[Tuple[str, str, str], Attribute] = {}
+        self._attrs_by_name: Dict[Tuple[str, str], Attribute] = {}
+        self._attr_names = set()
         for attr in attrs:
             self._attrs[attr.rep.schema, attr.rep.attr, attr.rep.sub_attr] = attr
+            schema_key, attr_key, sub_attr_key = attr.rep.key
+            self._attrs_by_key.setdefault((schema_key, attr_key, sub_attr_key), attr)
+            self._attrs_by_name.setdefault((attr_key, sub_attr_key), attr)
+            self._attr_names.add(attr_key)
             if not attr.rep.sub_attr:
                 self._top_level.append(attr)
 
@@ -423,32 +435,35 @@ class Attributes:
         return self._top_level
 
     def __getattr__(self, name: str) -> Attribute:
+        if name.startswith("_"):
+            # not initialized yet, e.g. when unpickled
+            raise AttributeError(name)
+
+        attr, _, sub_attr = name.lower().partition("__")
+        attr_obj = self._attrs_by_name.get((attr, sub_attr))
+        if attr_obj is not None:
+            return attr_obj
+
         parts = name.split("__", 1)
-        if len(parts) == 1:
-            for attr in self._top_level:
-                if attr.rep.attr.lower() == name.lower():
-                    return attr
-            raise AttributeError(f"no {name!r} attribute")
-
-        has_attr = False
-        for (_, attr, sub_attr), attr_obj in self._attrs.items():
-            if attr.lower() == parts[0].lower():
-                has_attr = True
-                if sub_attr.lower() == parts[1].lower():
-                    return attr_obj
-
-        if has_attr:
-            raise AttributeError(f"{parts[0]!r} has no {parts[1]!r} attribute")
-        raise AttributeError(f"no {parts[0]!r} attribute")
+        if len(parts) == 1 or attr not in self._attr_names:
+            raise AttributeError(f"no {parts[0]!r} attribute")
+        raise AttributeError(f"{parts[0]!r} has no {parts[1]!r} attribute")
 
     def __iter__(self):
         return iter(self._attrs.values())
 
     def get(self, attr_rep: AttrRep) -> Optional[Attribute]:
-        for (schema, attr, sub_attr), attr_obj in self._attrs.items():
-            if AttrRep(schema, attr, sub_attr) == attr_rep:
-                return attr_obj
-        return None
+        schema_key, attr_key, sub_attr_key = attr_rep.key
+        attr = self._attrs_by_name.get((attr_key, sub_attr_key))
+        if attr is None or not schema_key:
+            return attr
+
+        attr_schema_key = attr.rep.key[0]
+        if not attr_schema_key or attr_schema_key == schema_key:
+            return attr
+        return self._attrs_by_key.get(attr_rep.key) or self._attrs_by_key.get(
+            ("", attr_key, sub_attr_key)
+        )
 
     def get_by_path(self, path: "PatchPath") -> Optional[Attribute]:
         if (
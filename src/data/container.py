@@ -1,5 +1,7 @@
+import functools
 import re
-from typing import Any, Dict, List, Optional, Union
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple, Union
 
 _ATTR_NAME = re.compile(r"(\w+|\$ref)")
 _URI_PREFIX = re.compile(r"(?:[\w.-]+:)*")
@@ -7,6 +9,27 @@ _ATTR_REP = re.compile(rf"({_URI_PREFIX.pattern})?({_ATTR_NAME.pattern}(\.\w+)?)
 
 
 class AttrRep:
+    """
+    Representation of attribute or sub-attribute, with optional schema URI. Attribute
+    representations are compared case-insensitively, and their schemas only if both
+    have one, so they are hashed by the attribute and sub-attribute names only. Such
+    equality is not transitive, so sets or dict keys can merge representations with
+    different schemas if one without schema is added first. Representations are not
+    modified, so parsed ones are shared.
+    """
+
+    __slots__ = (
+        "_schema",
+        "_attr",
+        "_sub_attr",
+        "_repr",
+        "_extension",
+        "_schema_key",
+        "_attr_key",
+        "_sub_attr_key",
+        "_hash",
+    )
+
     def __init__(
         self, schema: str = "", attr: str = "", sub_attr: str = "", extension: bool = False
     ):
@@ -30,38 +53,42 @@ class AttrRep:
         self._sub_attr = sub_attr
         self._repr = attr_
         self._extension = extension
+        self._schema_key = schema.lower()
+        self._attr_key = attr.lower()
+        self._sub_attr_key = sub_attr.lower()
+        self._hash = hash((self._attr_key, self._sub_attr_key))
 
     def __repr__(self) -> str:
         return self._repr
 
     def __eq__(self, other):
+        if self is other:
+            return True
+
         if not isinstance(other, AttrRep):
             return False
 
-        if all([self.schema, other.schema]) and self.schema.lower() != other.schema.lower():
+        if self._schema_key and other._schema_key and self._schema_key != other._schema_key:
             return False
 
-        if self.attr.lower() != other.attr.lower():
-            return False
+        return self._attr_key == other._attr_key and self._sub_attr_key == other._sub_attr_key
 
-        if self.sub_attr.lower() != other.sub_attr.lower():
-            return False
+    def __hash__(self) -> int:
+        return self._hash
 
-        return True
+    def __getstate__(self):
+        return self._schema, self._attr, self._sub_attr, self._extension
+
+    def __setstate__(self, state):
+        self.__init__(*state)
 
     @classmethod
     def parse(cls, attr_rep: str) -> Union["Invalid", "AttrRep"]:
-        match = _ATTR_REP.fullmatch(attr_rep)
-        if not match:
-            return Invalid
-
-        schema, attr = match.group(1), match.group(2)
-        schema = schema[:-1] if schema else ""
-        if "." in attr:
-            attr, sub_attr = attr.split(".")
-        else:
-            attr, sub_attr = attr, ""
-        return AttrRep(schema=schema, attr=attr, sub_attr=sub_attr)
+        """
+        Parses the attribute representation. The same instance is returned for the same,
+        recently parsed, `attr_rep`.
+        """
+        return _parse_attr_rep(attr_rep)
 
     @property
     def extension(self) -> bool:
@@ -85,10 +112,30 @@ class AttrRep:
     def sub_attr(self) -> str:
         return self._sub_attr
 
+    @property
+    def key(self) -> Tuple[str, str, str]:
+        """Lowercase schema, attribute, and sub-attribute names."""
+        return self._schema_key, self._attr_key, self._sub_attr_key
+
     def top_level_equals(self, other: "AttrRep") -> bool:
-        if all([self.schema, other.schema]):
-            return self.attr_with_schema.lower() == other.attr_with_schema.lower()
-        return self.attr.lower() == other.attr.lower()
+        if self._schema_key and other._schema_key:
+            return self._schema_key == other._schema_key and self._attr_key == other._attr_key
+        return self._attr_key == other._attr_key
+
+
+@functools.lru_cache(maxsize=4096)
+def _parse_attr_rep(attr_rep: str) -> Union["Invalid", AttrRep]:
+    match = _ATTR_REP.fullmatch(attr_rep)
+    if not match:
+        return Invalid
+
+    schema, attr = match.group(1), match.group(2)
+    schema = schema[:-1] if schema else ""
+    if "." in attr:
+        attr, sub_attr = attr.split(".")
+    else:
+        attr, sub_attr = attr, ""
+    return AttrRep(schema=schema, attr=attr, sub_attr=sub_attr)
 
 
 class InvalidType:
@@ -113,31 +160,88 @@ class MissingType:
 Missing = MissingType()
 
 
-class SCIMDataContainer:
-    def __init__(self, d: Optional[Union[Dict, "SCIMDataContainer"]] = None):
-        self._data = {}
-        self._lower_case_to_original = {}
+class _KeyMap(dict):
+    """
+    Lowercase keys of container data mapped to the original ones. It is shared by copies
+    of the container, like the data, so state kept in it is shared too.
+    """
+
+    # indexes of values in the multi-valued complex attribute the container is item of
+    value_indexes: Optional["_ValueIndexes"] = None
+
+
+_NOTHING_UNWRAPPED = frozenset()
+# attributes of lazy container that are set once it is accessed
+_WRAPPED_ATTRS = ("_data", "_lower_case_to_original", "_unwrapped")
 
+
+class SCIMDataContainer:
+    """
+    Case-insensitive container of SCIM data. Nested dicts, also in lists, are wrapped
+    in containers too. If `lazy`, the container only keeps reference to the dict until
+    any of its keys is accessed, and then wraps nested dicts (lazily too) only when
+    their key is accessed for the first time, so data that is not read is not wrapped
+    at all. The dict is not modified in either case.
+    """
+
+    def __init__(self, d: Optional[Union[Dict, "SCIMDataContainer"]] = None, lazy: bool = False):
         if isinstance(d, dict):
-            for key, value in (d or {}).items():
-                if not isinstance(key, str):
-                    continue
-
-                self._lower_case_to_original[key.lower()] = key
-                if isinstance(value, Dict):
-                    self._data[key] = SCIMDataContainer(value)
-                elif isinstance(value, List):
-                    self._data[key] = [
-                        SCIMDataContainer(item) if isinstance(item, Dict) else item
-                        for item in value
-                    ]
-                else:
-                    self._data[key] = value
+            if lazy:
+                self._source = d
+            else:
+                self._wrap(d, lazy=False)
         elif isinstance(d, SCIMDataContainer):
             self._data = d._data
             self._lower_case_to_original = d._lower_case_to_original
+            self._unwrapped = d._unwrapped
+        else:
+            self._data = {}
+            self._lower_case_to_original = _KeyMap()
+            self._unwrapped = _NOTHING_UNWRAPPED
+
+    def __getattr__(self, name: str):
+        # called only if the attribute is not set, so lazy container is wrapped at most once
+        if name not in _WRAPPED_ATTRS or "_source" not in self.__dict__:
+            raise AttributeError(name)
+        self._wrap(self.__dict__.pop("_source"), lazy=True)
+        return self.__dict__[name]
+
+    def _wrap(self, d: Dict, lazy: bool) -> None:
+        data, lower_case_to_original = {}, _KeyMap()
+        # keys of dicts and lists that are wrapped when accessed for the first time
+        unwrapped = []
+        for key, value in d.items():
+            if not isinstance(key, str):
+                continue
+
+            lower_case_to_original[key.lower()] = key
+            if not isinstance(value, (dict, list)):
+                data[key] = value
+            elif lazy:
+                unwrapped.append(key)
+                data[key] = value
+            else:
+                data[key] = _wrap_value(value, lazy)
+        self._data = data
+        self._lower_case_to_original = lower_case_to_original
+        self._unwrapped = set(unwrapped) if unwrapped else _NOTHING_UNWRAPPED
+
+    def _get_value(self, key: str) -> Any:
+        value = self._data[key]
+        if key in self._unwrapped:
+            self._unwrapped.remove(key)
+            value = self._data[key] = _wrap_value(value, lazy=True)
+        return value
+
+    def _set_value(self, key: str, value: Any) -> None:
+        if key in self._unwrapped:
+            self._unwrapped.remove(key)
+        self._data[key] = value
 
     def __setitem__(self, attr_rep: Union["AttrRep", str], value):
+        value_indexes = self._lower_case_to_original.value_indexes
+        if value_indexes is not None:
+            value_indexes.clear()
         if isinstance(attr_rep, str):
             attr_rep = self._to_attr_rep(attr_rep)
 
@@ -145,8 +249,8 @@ class SCIMDataContainer:
             extension_key = self._lower_case_to_original.get(attr_rep.schema.lower())
             if extension_key is None:
                 self._lower_case_to_original[attr_rep.schema.lower()] = attr_rep.schema
-                self._data[attr_rep.schema] = SCIMDataContainer()
-            self._data[attr_rep.schema][
+                self._set_value(attr_rep.schema, SCIMDataContainer())
+            self._get_value(attr_rep.schema)[
                 AttrRep(attr=attr_rep.attr, sub_attr=attr_rep.sub_attr)
             ] = value
         elif attr_rep.sub_attr:
@@ -155,26 +259,27 @@ class SCIMDataContainer:
                 initial_key = attr_rep.attr
                 self._lower_case_to_original[initial_key.lower()] = initial_key
                 if isinstance(value, List):
-                    self._data[initial_key] = []
+                    self._set_value(initial_key, [])
                 else:
-                    self._data[initial_key] = SCIMDataContainer()
-            elif not self._can_assign_to_complex(self._data[initial_key], value):
+                    self._set_value(initial_key, SCIMDataContainer())
+            elif not self._can_assign_to_complex(self._get_value(initial_key), value):
                 raise KeyError(
                     f"can not assign ({attr_rep.sub_attr}, {value}) to '{attr_rep.attr}'"
                 )
 
+            attr_value = self._get_value(initial_key)
             if isinstance(value, List):
-                to_create = len(value) - len(self._data[initial_key])
+                to_create = len(value) - len(attr_value)
                 if to_create > 0:
-                    self._data[initial_key].extend([SCIMDataContainer() for _ in range(to_create)])
-                for item, container in zip(value, self._data[initial_key]):
+                    attr_value.extend([SCIMDataContainer() for _ in range(to_create)])
+                for item, container in zip(value, attr_value):
                     if item is not Missing:
                         container[AttrRep(attr=attr_rep.sub_attr)] = item
             else:
-                self._data[initial_key][AttrRep(attr=attr_rep.sub_attr)] = value
+                attr_value[AttrRep(attr=attr_rep.sub_attr)] = value
         else:
             self._lower_case_to_original[attr_rep.attr.lower()] = attr_rep.attr
-            self._data[attr_rep.attr] = value
+            self._set_value(attr_rep.attr, value)
 
     def __getitem__(self, attr_rep: Union["AttrRep", str]):
         if isinstance(attr_rep, str):
@@ -182,28 +287,84 @@ class SCIMDataContainer:
 
         extension = self._lower_case_to_original.get(attr_rep.schema.lower())
         if extension is not None:
-            return self._data[extension][AttrRep(attr=attr_rep.attr, sub_attr=attr_rep.sub_attr)]
+            return self._get_value(extension)[
+                AttrRep(attr=attr_rep.attr, sub_attr=attr_rep.sub_attr)
+            ]
 
         attr = self._lower_case_to_original.get(attr_rep.attr.lower())
         if attr is None:
             return Missing
 
         if attr_rep.sub_attr:
-            attr_value = self._data[attr]
+            attr_value = self._get_value(attr)
             if isinstance(attr_value, SCIMDataContainer):
                 return attr_value[AttrRep(attr=attr_rep.sub_attr)]
             if isinstance(attr_value, List):
                 return [item[AttrRep(attr=attr_rep.sub_attr)] for item in attr_value]
             return Missing
-        return self._data[attr]
+        return self._get_value(attr)
+
+    @staticmethod
+    def getter(attr_rep: AttrRep) -> Callable[[Any], Any]:
+        """
+        Returns function that gets the value of `attr_rep` from the container, like
+        `__getitem__`, but with the lookup keys computed once. The function accepts
+        any data supported by `get_attr_value` too, like plain dicts, so they can be
+        read without building containers.
+        """
+        schema_key = attr_rep.schema.lower()
+        attr_key = attr_rep.attr.lower()
+        sub_attr_key = attr_rep.sub_attr.lower()
+        extension_attr_rep = AttrRep(attr=attr_rep.attr, sub_attr=attr_rep.sub_attr)
+        sub_attr_rep = AttrRep(attr=attr_rep.sub_attr) if attr_rep.sub_attr else None
+
+        def get_from_data(data: Any) -> Any:
+            if schema_key:
+                extension = _get_attr_value(data, attr_rep.schema, schema_key)
+                if extension is not Missing:
+                    data = extension
+            attr_value = _get_attr_value(data, attr_rep.attr, attr_key)
+            if sub_attr_rep is None:
+                return attr_value
+            if isinstance(attr_value, List):
+                return [
+                    _get_attr_value(item, attr_rep.sub_attr, sub_attr_key) for item in attr_value
+                ]
+            return _get_attr_value(attr_value, attr_rep.sub_attr, sub_attr_key)
+
+        def get(container: Any) -> Any:
+            if not isinstance(container, SCIMDataContainer):
+                return get_from_data(container)
+            if schema_key:
+                extension = container._lower_case_to_original.get(schema_key)
+                if extension is not None:
+                    return container._get_value(extension)[extension_attr_rep]
+
+            attr = container._lower_case_to_original.get(attr_key)
+            if attr is None:
+                return Missing
+
+            attr_value = container._get_value(attr)
+            if sub_attr_rep is None:
+                return attr_value
+            if isinstance(attr_value, SCIMDataContainer):
+                return attr_value[sub_attr_rep]
+            if isinstance(attr_value, List):
+                return [item[sub_attr_rep] for item in attr_value]
+            return Missing
+
+        return get
 
     def __delitem__(self, attr_rep: Union["AttrRep", str]):
+        value_indexes = self._lower_case_to_original.value_indexes
+        if value_indexes is not None:
+            value_indexes.clear()
         if isinstance(attr_rep, str):
             attr_rep = self._to_attr_rep(attr_rep)
 
         extension = self._lower_case_to_original.get(attr_rep.schema.lower())
         if extension is not None:
-            del self._data[extension][AttrRep(attr=attr_rep.attr, sub_attr=attr_rep.sub_attr)]
+            del self._get_value(extension)[AttrRep(attr=attr_rep.attr, sub_attr=attr_rep.sub_attr)]
             return
 
         attr = self._lower_case_to_original.get(attr_rep.attr.lower())
@@ -211,7 +372,7 @@ class SCIMDataContainer:
             return
 
         if attr_rep.sub_attr:
-            attr_value = self._data[attr]
+            attr_value = self._get_value(attr)
             if isinstance(attr_value, SCIMDataContainer):
                 del attr_value[AttrRep(attr=attr_rep.sub_attr)]
             elif isinstance(attr_value, List):
@@ -219,6 +380,8 @@ class SCIMDataContainer:
                     del item[AttrRep(attr=attr_rep.sub_attr)]
             return
 
+        if attr in self._unwrapped:
+            self._unwrapped.remove(attr)
         self._data.pop(attr)
         self._lower_case_to_original.pop(attr_rep.attr.lower())
 
@@ -243,7 +406,8 @@ class SCIMDataContainer:
 
     def to_dict(self) -> Dict[str, Any]:
         output = {}
-        for key, value in self._data.items():
+        for key in list(self._data):
+            value = self._get_value(key)
             if isinstance(value, SCIMDataContainer):
                 output[key] = value.to_dict()
             elif isinstance(value, List):
@@ -267,12 +431,210 @@ class SCIMDataContainer:
 
     def __eq__(self, other: Any) -> bool:
         if isinstance(other, Dict):
-            other = SCIMDataContainer(other)
+            other = SCIMDataContainer(other, lazy=True)
         elif not isinstance(other, SCIMDataContainer):
             return False
 
-        for key, value in self._data.items():
-            if other[key] != value:
+        for key in list(self._data):
+            if other[key] != self._get_value(key):
                 return False
 
         return True
+
+
+def _wrap_value(value: Any, lazy: bool) -> Any:
+    if isinstance(value, dict):
+        return SCIMDataContainer(value, lazy)
+    if isinstance(value, list):
+        return [SCIMDataContainer(item, lazy) if isinstance(item, dict) else item for item in value]
+    return value
+
+
+class ValueIndex:
+    """
+    Index of values of a sub-attribute in items of a multi-valued complex attribute, so
+    the items do not have to be scanned to tell whether any of them has the value. String
+    values are lowercased if the index is built for case-insensitive sub-attribute.
+    """
+
+    # lists of fewer items are not indexed, and scanning them is cheaper; 'None' disables
+    # indexing
+    min_items: Optional[int] = 256
+
+    def __init__(self, items: List["SCIMDataContainer"], get: Callable[[Any], Any], lower: bool):
+        keys = set()
+        has_value = has_missing = present = False
+        for item in items:
+            value = get(item)
+            if value is None or value is Missing:
+                has_missing = True
+                continue
+            has_value = True
+            if isinstance(value, List):
+                present = present or any(value)
+            elif isinstance(value, str):
+                present = present or bool(value)
+                value = [value]
+            else:
+                present = present or value is not Invalid
+                value = [value]
+            for item_value in value:
+                if lower and isinstance(item_value, str):
+                    item_value = item_value.lower()
+                keys.add(item_value)
+        self._keys = frozenset(keys)
+        self._has_value = has_value
+        self._has_missing = has_missing
+        self._present = present
+
+    @property
+    def has_value(self) -> bool:
+        """Tells whether any item has the value (that is not 'None' or missing)."""
+        return self._has_value
+
+    @property
+    def has_missing(self) -> bool:
+        """Tells whether any item has no value (or 'None')."""
+        return self._has_missing
+
+    @property
+    def present(self) -> bool:
+        """Tells whether any item has non-empty value, like the 'pr' operator checks."""
+        return self._present
+
+    def __contains__(self, value: Any) -> bool:
+        return value in self._keys
+
+
+class _ValueIndexes:
+    def __init__(self, items: List[SCIMDataContainer]):
+        self.items = items
+        self.n_items = len(items)
+        self.by_key: Dict[Any, Optional[ValueIndex]] = {}
+
+    def clear(self) -> None:
+        self.by_key.clear()
+
+
+def get_value_index(items: List[Any], attr_rep: AttrRep, lower: bool) -> Optional[ValueIndex]:
+    """
+    Returns index of values of `attr_rep` sub-attribute in `items` of multi-valued complex
+    attribute, built when requested for the first time, or 'None' if there are fewer than
+    `ValueIndex.min_items` items, or the items are not containers, or values can not be
+    indexed. Indexes are attached to the items (and their copies), so they live as long
+    as the data, and are dropped once any of the items is modified with
+    `SCIMDataContainer.__setitem__` or `SCIMDataContainer.__delitem__`. Items added to
+    or removed from the list directly are detected by its length, but not items replaced
+    in it.
+    """
+    min_items = ValueIndex.min_items
+    if (
+        min_items is None
+        or not items
+        or len(items) < min_items
+        or not isinstance(items[0], SCIMDataContainer)
+    ):
+        return None
+
+    indexes = items[0]._lower_case_to_original.value_indexes
+    if indexes is None or indexes.items is not items or indexes.n_items != len(items):
+        if not all(isinstance(item, SCIMDataContainer) for item in items):
+            return None
+        indexes = _ValueIndexes(items)
+        for item in items:
+            item._lower_case_to_original.value_indexes = indexes
+
+    key = str(attr_rep).lower(), lower
+    if key not in indexes.by_key:
+        try:
+            index = ValueIndex(items, SCIMDataContainer.getter(attr_rep), lower)
+        except TypeError:
+            # unhashable values
+            index = None
+        indexes.by_key[key] = index
+    return indexes.by_key[key]
+
+
+_SCALAR_TYPES = (str, bytes, int, float, bool, datetime)
+
+
+def get_value(data: Any, attr_rep: AttrRep) -> Any:
+    """
+    Returns value of `attr_rep` from the `data`, like `SCIMDataContainer.__getitem__`,
+    for any data supported by `get_attr_value`.
+    """
+    if isinstance(data, SCIMDataContainer):
+        return data[attr_rep]
+    return _get_getter(attr_rep.schema, attr_rep.attr, attr_rep.sub_attr)(data)
+
+
+@functools.lru_cache(maxsize=1024)
+def _get_getter(schema: str, attr: str, sub_attr: str) -> Callable[[Any], Any]:
+    # attribute representations with and without schema are equal, so they are not the key
+    return SCIMDataContainer.getter(AttrRep(schema, attr, sub_attr))
+
+
+def get_attr_value(data: Any, attr: str) -> Any:
+    """
+    Returns value of the `attr` attribute of the `data`, looked up case-insensitively,
+    or `Missing` if there is no such attribute. Besides `SCIMDataContainer`, the `data`
+    can be a mapping (e.g. parsed JSON) or other object with attributes (e.g. dataclass
+    or ORM row), so it is read in place, without building a container. Only data
+    attributes of objects are read: instance attributes, slots and properties, and not
+    methods or class attributes.
+    """
+    return _get_attr_value(data, attr, attr.lower())
+
+
+def _get_attr_value(data: Any, attr: str, attr_key: str) -> Any:
+    if isinstance(data, SCIMDataContainer):
+        original = data._lower_case_to_original.get(attr_key)
+        if original is None:
+            return Missing
+        return data._get_value(original)
+
+    if isinstance(data, dict) or isinstance(data, Mapping):
+        value = data.get(attr, Missing)
+        if value is not Missing:
+            return value
+        for key, value in data.items():
+            if isinstance(key, str) and key.lower() == attr_key:
+                return value
+        return Missing
+
+    if data is None or data is Missing or data is Invalid:
+        return Missing
+    if isinstance(data, (List, _SCALAR_TYPES)):
+        return Missing
+
+    if attr.startswith("_"):
+        return Missing
+    name = _get_data_descriptor_names(type(data)).get(attr_key)
+    if name is not None:
+        return getattr(data, name, Missing)
+    values = getattr(data, "__dict__", None)
+    if values is None:
+        return Missing
+    value = values.get(attr, Missing)
+    if value is not Missing:
+        return value
+    for name, value in values.items():
+        if name.lower() == attr_key and not name.startswith("_"):
+            return value
+    return Missing
+
+
+@functools.lru_cache(maxsize=256)
+def _get_data_descriptor_names(cls: type) -> Dict[str, str]:
+    # properties, slots, and other descriptors that do not return methods (e.g. ORM columns),
+    # looked up in base classes first, so they can be overridden
+    names = {}
+    for class_ in reversed(cls.__mro__):
+        for name, value in vars(class_).items():
+            if name.startswith("_"):
+                continue
+            if isinstance(value, functools.cached_property) or hasattr(type(value), "__set__"):
+                names[name.lower()] = name
+            else:
+                names.pop(name.lower(), None)
+    return names
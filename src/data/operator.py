@@ -1,13 +1,21 @@
 import abc
+import copy
 import operator
+import time
+from collections import defaultdict, deque
 from datetime import datetime
 from enum import Enum
 from typing import (
     Any,
     Callable,
+    Collection,
+    Dict,
     Generator,
+    Hashable,
     List,
+    NamedTuple,
     Optional,
+    Sequence,
     Set,
     Tuple,
     Type,
@@ -17,7 +25,17 @@ from typing import (
 
 from src.data import type as at
 from src.data.attributes import Attribute, Attributes, ComplexAttribute
-from src.data.container import AttrRep, Invalid, Missing, SCIMDataContainer
+from src.data.container import (
+    AttrRep,
+    Invalid,
+    Missing,
+    SCIMDataContainer,
+    ValueIndex,
+    get_attr_value,
+    get_value,
+    get_value_index,
+)
+from src.error import ValidationError, ValidationIssues
 
 
 class MatchStatus(Enum):
@@ -26,26 +44,42 @@ class MatchStatus(Enum):
     FAILED_NO_ATTR = "FAILED_NO_ATTR"
     MISSING_DATA = "MISSING_DATA"
 
+    # members are compared by identity, so they can be hashed by it too, instead of by name
+    # in Python code, e.g. when results are looked up for them
+    __hash__ = object.__hash__
+
 
 class MatchResult:
+    """
+    Result of matching data with an operator. Results are immutable, so the ones returned
+    by `passed`, `failed`, `failed_no_attr`, `missing_data` and `of` are shared, and matching
+    does not create them.
+    """
+
+    _by_status: Dict[MatchStatus, "MatchResult"] = {}
+
     def __init__(self, status: MatchStatus):
         self._status = status
 
+    @classmethod
+    def of(cls, status: MatchStatus) -> "MatchResult":
+        return cls._by_status[status]
+
     @classmethod
     def passed(cls):
-        return cls(MatchStatus.PASSED)
+        return cls._by_status[MatchStatus.PASSED]
 
     @classmethod
     def failed(cls):
-        return cls(MatchStatus.FAILED)
+        return cls._by_status[MatchStatus.FAILED]
 
     @classmethod
     def failed_no_attr(cls):
-        return cls(MatchStatus.FAILED_NO_ATTR)
+        return cls._by_status[MatchStatus.FAILED_NO_ATTR]
 
     @classmethod
     def missing_data(cls):
-        return cls(MatchStatus.MISSING_DATA)
+        return cls._by_status[MatchStatus.MISSING_DATA]
 
     @property
     def status(self) -> MatchStatus:
@@ -72,9 +106,207 @@ class MatchResult:
         raise ValueError("unable to determine result for missing data")
 
 
+MatchResult._by_status.update({status: MatchResult(status) for status in MatchStatus})
+
+
+CompiledMatch = Callable[[Any], MatchStatus]
+
+
+class ColumnMatch(NamedTuple):
+    """
+    Result of matching rows of `Columns`, with bitsets of rows (bit `i` for the row `i`)
+    per status. Evaluated rows that are not in any of the bitsets failed to match.
+    """
+
+    passed: int
+    missing_data: int = 0
+    failed_no_attr: int = 0
+
+    def failed(self, rows: int) -> int:
+        return rows & ~(self.passed | self.missing_data | self.failed_no_attr)
+
+
+class Columns:
+    """
+    Values of attributes of many resources, with values of each attribute pulled
+    into a column (list with value for every resource) once, when first requested.
+    """
+
+    def __init__(self, resources: Sequence[SCIMDataContainer]):
+        self._resources = resources
+        self._columns: Dict[Tuple[str, str, str], List[Any]] = {}
+
+    def __len__(self) -> int:
+        return len(self._resources)
+
+    @property
+    def all_rows(self) -> int:
+        return (1 << len(self._resources)) - 1
+
+    def get(self, attr_rep: AttrRep) -> List[Any]:
+        key = (attr_rep.schema.lower(), attr_rep.attr.lower(), attr_rep.sub_attr.lower())
+        column = self._columns.get(key)
+        if column is None:
+            column = list(map(SCIMDataContainer.getter(attr_rep), self._resources))
+            self._columns[key] = column
+        return column
+
+
+class OperatorProfile:
+    """
+    Statistics of evaluating an operator: number of calls, number of calls per status
+    (with 'FAILED_NO_ATTR' counted as failed), and cumulative evaluation time, that
+    includes evaluating sub-operators, which profiles are in `sub_profiles`.
+    """
+
+    def __init__(self, operator_: Any, sub_profiles: List["OperatorProfile"]):
+        self._operator = operator_
+        self._sub_profiles = sub_profiles
+        self.calls = 0
+        self.passed = 0
+        self.failed = 0
+        self.missing_data = 0
+        self.time_ns = 0
+
+    @property
+    def operator(self):
+        return self._operator
+
+    @property
+    def sub_profiles(self) -> List["OperatorProfile"]:
+        return self._sub_profiles
+
+    @property
+    def time(self) -> float:
+        return self.time_ns / 1e9
+
+    def to_dict(self) -> Dict[str, Any]:
+        operator_ = self._operator
+        if isinstance(operator_, ComplexAttributeOperator):
+            output = {"op": "complex"}
+        else:
+            output = {"op": operator_.SCIM_OP}
+        if not isinstance(operator_, LogicalOperator):
+            attr_rep = operator_.attr_rep
+            output["attr_rep"] = attr_rep.sub_attr or attr_rep.attr_with_schema
+        if isinstance(operator_, BinaryAttributeOperator):
+            output["value"] = operator_.value
+        output.update(
+            calls=self.calls,
+            passed=self.passed,
+            failed=self.failed,
+            missing_data=self.missing_data,
+            time=self.time,
+        )
+        if self._sub_profiles:
+            output["sub_profiles"] = [profile.to_dict() for profile in self._sub_profiles]
+        return output
+
+    def add(self, status: MatchStatus, time_ns: int) -> None:
+        self.calls += 1
+        self.time_ns += time_ns
+        if status is MatchStatus.PASSED:
+            self.passed += 1
+        elif status is MatchStatus.MISSING_DATA:
+            self.missing_data += 1
+        else:
+            self.failed += 1
+
+
+class Profiler:
+    """
+    Collects profiles of operators in the tree, when passed to `compile`, by wrapping
+    compiled functions of operators with ones that count and time their calls.
+    Comparisons are not compiled to lookups of alternatives then, so every operator
+    is evaluated on its own.
+    """
+
+    def __init__(self, operator_: Any):
+        self._profiles: Dict[int, OperatorProfile] = {}
+        self._root = self._get_profile(operator_)
+
+    @property
+    def root(self) -> OperatorProfile:
+        return self._root
+
+    def _get_profile(self, operator_: Any) -> OperatorProfile:
+        if isinstance(operator_, MultiOperandLogicalOperator):
+            sub_operators = operator_.sub_operators
+        elif isinstance(operator_, (Not, ComplexAttributeOperator)):
+            sub_operators = (operator_.sub_operator,)
+        else:
+            sub_operators = ()
+        profile = OperatorProfile(
+            operator_, [self._get_profile(sub_operator) for sub_operator in sub_operators]
+        )
+        self._profiles[id(operator_)] = profile
+        return profile
+
+    def wrap(self, operator_: Any, match: CompiledMatch) -> CompiledMatch:
+        profile = self._profiles.get(id(operator_))
+        if profile is None:
+            return match
+        add = profile.add
+
+        def profiled_match(value: Any) -> MatchStatus:
+            start = time.perf_counter_ns()
+            status = match(value)
+            add(status, time.perf_counter_ns() - start)
+            return status
+
+        return profiled_match
+
+
+def _get_row_indexes(rows: int) -> List[int]:
+    return [i for i, bit in enumerate(bin(rows)[:1:-1]) if bit == "1"]
+
+
+def _match_column(match: CompiledMatch, column: List[Any], rows: int) -> ColumnMatch:
+    """
+    Matches values of the `column` in `rows` in one loop, collecting rows per status
+    as '0' / '1' strings, that are converted to bitsets at once.
+    """
+    passed = bytearray(b"0") * len(column)
+    missing_data = bytearray(b"0") * len(column)
+    failed_no_attr = bytearray(b"0") * len(column)
+    bits = {
+        MatchStatus.PASSED: passed,
+        MatchStatus.MISSING_DATA: missing_data,
+        MatchStatus.FAILED_NO_ATTR: failed_no_attr,
+    }
+    for i in _get_row_indexes(rows):
+        status_bits = bits.get(match(column[i]))
+        if status_bits is not None:
+            status_bits[i] = 49  # ord("1")
+    return ColumnMatch(
+        passed=int(passed[::-1] or b"0", 2),
+        missing_data=int(missing_data[::-1] or b"0", 2),
+        failed_no_attr=int(failed_no_attr[::-1] or b"0", 2),
+    )
+
+
+def _compile_sub_operator(
+    sub_operator: Union["LogicalOperator", "AttributeOperator", "ComplexAttributeOperator"],
+    strict: bool,
+    adaptive: bool = False,
+    profiler: Optional[Profiler] = None,
+) -> CompiledMatch:
+    match = sub_operator.compile(strict, adaptive, profiler)
+    if isinstance(sub_operator, LogicalOperator):
+        return match
+    get = SCIMDataContainer.getter(sub_operator.attr_rep)
+    return lambda value: match(get(value))
+
+
 class LogicalOperator(abc.ABC):
     SCIM_OP = None
 
+    @abc.abstractmethod
+    def bind(
+        self, attrs: Attributes
+    ) -> Tuple[Union[Invalid, "LogicalOperator"], ValidationIssues]:
+        ...
+
     @abc.abstractmethod
     def match(
         self,
@@ -84,20 +316,53 @@ class LogicalOperator(abc.ABC):
     ) -> MatchResult:
         ...
 
+    @abc.abstractmethod
+    def compile(
+        self, strict: bool = True, adaptive: bool = False, profiler: Optional[Profiler] = None
+    ) -> CompiledMatch:
+        """
+        Returns function that matches the value like `match` does, but without dispatching
+        on operator types. Attribute operators in the tree must be bound. If `adaptive`
+        is set, operands of 'and' / 'or' operators are reordered while matching, so
+        the ones that decide the match at the lowest cost are evaluated first. Operators
+        in the tree are profiled by the `profiler`, if provided.
+        """
+
+    @abc.abstractmethod
+    def match_columns(self, columns: Columns, rows: int, strict: bool = True) -> ColumnMatch:
+        """
+        Matches `rows` (bitset) of `columns`, like `match` does for every row, evaluating
+        each comparison for all rows at once. Sub-operators are evaluated only for rows
+        not decided by the preceding ones. Attribute operators in the tree must be bound.
+        """
+
 
 class MultiOperandLogicalOperator(LogicalOperator, abc.ABC):
     def __init__(
         self,
         *sub_operators: Union["LogicalOperator", "AttributeOperator", "ComplexAttribute"],
     ):
-        self._sub_operators = list(sub_operators)
+        self._sub_operators = tuple(sub_operators)
 
     @property
     def sub_operators(
         self,
-    ) -> List[Union["LogicalOperator", "AttributeOperator", "ComplexAttribute"]]:
+    ) -> Tuple[Union["LogicalOperator", "AttributeOperator", "ComplexAttribute"], ...]:
         return self._sub_operators
 
+    def bind(
+        self, attrs: Attributes
+    ) -> Tuple[Union[Invalid, "MultiOperandLogicalOperator"], ValidationIssues]:
+        issues = ValidationIssues()
+        sub_operators = []
+        for sub_operator in self._sub_operators:
+            sub_operator, issues_ = sub_operator.bind(attrs)
+            issues.merge(issues=issues_)
+            sub_operators.append(sub_operator)
+        if not issues.can_proceed():
+            return Invalid, issues
+        return type(self)(*sub_operators), issues
+
     def _collect_matches(
         self, value: SCIMDataContainer, attrs: Attributes, strict: bool = True
     ) -> Generator[MatchResult, None, None]:
@@ -105,7 +370,7 @@ class MultiOperandLogicalOperator(LogicalOperator, abc.ABC):
             if isinstance(sub_operator, LogicalOperator):
                 yield sub_operator.match(value, attrs, strict)
             else:
-                yield sub_operator.match(value[sub_operator.attr_rep], attrs, strict)
+                yield sub_operator.match(get_value(value, sub_operator.attr_rep), attrs, strict)
 
 
 class And(MultiOperandLogicalOperator):
@@ -128,6 +393,44 @@ class And(MultiOperandLogicalOperator):
             return MatchResult.missing_data()
         return MatchResult.passed()
 
+    def compile(
+        self, strict: bool = True, adaptive: bool = False, profiler: Optional[Profiler] = None
+    ) -> CompiledMatch:
+        matches = [
+            _compile_sub_operator(sub_operator, strict, adaptive, profiler)
+            for sub_operator in self.sub_operators
+        ]
+        if adaptive and len(matches) > 1:
+            return _profiled(self, _compile_adaptive(matches, MatchStatus.FAILED), profiler)
+
+        def match(value: Any) -> MatchStatus:
+            missing_data = False
+            for match_ in matches:
+                status = match_(value)
+                if status is MatchStatus.FAILED:
+                    return status
+                if status is MatchStatus.MISSING_DATA:
+                    missing_data = True
+            if missing_data:
+                return MatchStatus.MISSING_DATA
+            return MatchStatus.PASSED
+
+        return _profiled(self, match, profiler)
+
+    def match_columns(self, columns: Columns, rows: int, strict: bool = True) -> ColumnMatch:
+        failed = missing_data = 0
+        undecided = rows
+        for sub_operator in self.sub_operators:
+            if not undecided:
+                break
+            match = sub_operator.match_columns(columns, undecided, strict)
+            failed_ = match.failed(undecided)
+            failed |= failed_
+            missing_data |= match.missing_data
+            undecided &= ~failed_
+        missing_data &= ~failed
+        return ColumnMatch(passed=rows & ~failed & ~missing_data, missing_data=missing_data)
+
 
 class Or(MultiOperandLogicalOperator):
     SCIM_OP = "or"
@@ -149,6 +452,80 @@ class Or(MultiOperandLogicalOperator):
             return MatchResult.missing_data()
         return MatchResult.failed()
 
+    def compile(
+        self, strict: bool = True, adaptive: bool = False, profiler: Optional[Profiler] = None
+    ) -> CompiledMatch:
+        """
+        Comparisons of the same attribute, with string values, using the same operator
+        that supports alternatives (e.g. 'id eq "a" or id eq "b"'), are compiled to a single
+        lookup, like a set membership test for 'eq', evaluated in place of the first of them.
+        """
+        matches = []
+        operands = self._get_operands() if profiler is None else self.sub_operators
+        for operand in operands:
+            if isinstance(operand, list):
+                matches.append(_compile_alternatives(operand, strict))
+            else:
+                matches.append(_compile_sub_operator(operand, strict, adaptive, profiler))
+        if adaptive and len(matches) > 1:
+            return _profiled(self, _compile_adaptive(matches, MatchStatus.PASSED), profiler)
+
+        def match(value: Any) -> MatchStatus:
+            missing_data = False
+            for match_ in matches:
+                status = match_(value)
+                if status is MatchStatus.PASSED:
+                    return status
+                if status is MatchStatus.MISSING_DATA:
+                    missing_data = True
+            if missing_data:
+                return MatchStatus.MISSING_DATA
+            return MatchStatus.FAILED
+
+        return _profiled(self, match, profiler)
+
+    def match_columns(self, columns: Columns, rows: int, strict: bool = True) -> ColumnMatch:
+        passed = missing_data = 0
+        undecided = rows
+        for operand in self._get_operands():
+            if not undecided:
+                break
+            if isinstance(operand, list):
+                match = _match_column(
+                    _compile_alternatives_value_match(operand, strict),
+                    columns.get(operand[0].attr_rep),
+                    undecided,
+                )
+            else:
+                match = operand.match_columns(columns, undecided, strict)
+            passed |= match.passed
+            missing_data |= match.missing_data
+            undecided &= ~match.passed
+        return ColumnMatch(passed=passed, missing_data=missing_data & ~passed)
+
+    def _get_operands(
+        self,
+    ) -> List[Union["LogicalOperator", "AttributeOperator", "ComplexAttributeOperator", List]]:
+        """
+        Returns sub-operators with comparisons that can be compiled to a single lookup
+        grouped in lists, placed where the first of them is.
+        """
+        operands: List = []
+        positions: Dict[Hashable, int] = {}
+        for sub_operator in self.sub_operators:
+            key = _get_alternatives_key(sub_operator)
+            if key is None:
+                operands.append(sub_operator)
+            elif key not in positions:
+                positions[key] = len(operands)
+                operands.append([sub_operator])
+            else:
+                operands[positions[key]].append(sub_operator)
+        return [
+            operand[0] if isinstance(operand, list) and len(operand) == 1 else operand
+            for operand in operands
+        ]
+
 
 TNotSubOperator = TypeVar(
     "TNotSubOperator", bound=Union[MultiOperandLogicalOperator, "AttributeOperator"]
@@ -165,6 +542,12 @@ class Not(LogicalOperator):
     def sub_operator(self) -> TNotSubOperator:
         return self._sub_operator
 
+    def bind(self, attrs: Attributes) -> Tuple[Union[Invalid, "Not"], ValidationIssues]:
+        sub_operator, issues = self._sub_operator.bind(attrs)
+        if not issues.can_proceed():
+            return Invalid, issues
+        return Not(sub_operator), issues
+
     def match(
         self,
         value: Optional[SCIMDataContainer],
@@ -181,7 +564,9 @@ class Not(LogicalOperator):
             if match.status == MatchStatus.FAILED:
                 return MatchResult.passed()
             return MatchResult.failed()
-        match = self._sub_operator.match(value[self._sub_operator.attr_rep], attrs, strict=True)
+        match = self._sub_operator.match(
+            get_value(value, self._sub_operator.attr_rep), attrs, strict=True
+        )
         if (
             match.status == MatchStatus.FAILED
             or not strict
@@ -190,10 +575,47 @@ class Not(LogicalOperator):
             return MatchResult.passed()
         return MatchResult.failed()
 
+    def compile(
+        self, strict: bool = True, adaptive: bool = False, profiler: Optional[Profiler] = None
+    ) -> CompiledMatch:
+        sub_match = _compile_sub_operator(self._sub_operator, True, adaptive, profiler)
+        if isinstance(self._sub_operator, LogicalOperator):
+            on_missing_data = MatchStatus.FAILED if strict else MatchStatus.PASSED
+
+            def match(value: Any) -> MatchStatus:
+                status = sub_match(value)
+                if status is MatchStatus.MISSING_DATA:
+                    return on_missing_data
+                if status is MatchStatus.FAILED:
+                    return MatchStatus.PASSED
+                return MatchStatus.FAILED
+
+            return _profiled(self, match, profiler)
+
+        def match(value: Any) -> MatchStatus:
+            status = sub_match(value)
+            if status is MatchStatus.FAILED or not strict and status is MatchStatus.MISSING_DATA:
+                return MatchStatus.PASSED
+            return MatchStatus.FAILED
+
+        return _profiled(self, match, profiler)
+
+    def match_columns(self, columns: Columns, rows: int, strict: bool = True) -> ColumnMatch:
+        match = self._sub_operator.match_columns(columns, rows, strict=True)
+        if strict:
+            return ColumnMatch(passed=match.failed(rows))
+        return ColumnMatch(passed=match.failed(rows) | match.missing_data)
+
 
 class AttributeOperator(abc.ABC):
     SCIM_OP = None
 
+    _bound = False
+    _attr: Optional[Attribute] = None
+    # comparisons (non-strict and strict) prepared when the operator is bound, so unbound
+    # operators, that can be shared, are not modified
+    _prepared: Optional[Tuple[CompiledMatch, CompiledMatch]] = None
+
     def __init__(self, attr_rep: AttrRep):
         self._attr_rep = attr_rep
 
@@ -201,18 +623,52 @@ class AttributeOperator(abc.ABC):
     def attr_rep(self) -> AttrRep:
         return self._attr_rep
 
-    @abc.abstractmethod
-    def match(
-        self,
-        value: Any,
-        attrs: Attributes,
-        strict: bool = True,
-    ) -> MatchResult:
-        ...
-
+    @property
+    def bound(self) -> bool:
+        return self._bound
 
-class Present(AttributeOperator):
-    SCIM_OP = "pr"
+    @property
+    def attr(self) -> Optional[Attribute]:
+        return self._attr
+
+    def bind(
+        self, attrs: Attributes
+    ) -> Tuple[Union[Invalid, "AttributeOperator"], ValidationIssues]:
+        """
+        Returns copy of the operator with the attribute resolved from `attrs`, so matching
+        does not look the attribute up again, and comparisons prepared for it. Attributes not
+        present in `attrs` are resolved too, and bound operator fails to match them, like
+        the unbound one.
+        """
+        bound, issues = self._bind(attrs)
+        if bound is not Invalid:
+            bound._prepare_bound()
+        return bound, issues
+
+    def _bind(
+        self, attrs: Attributes
+    ) -> Tuple[Union[Invalid, "AttributeOperator"], ValidationIssues]:
+        bound = copy.copy(self)
+        bound._bound = True
+        bound._attr = attrs.get(self._attr_rep)
+        return bound, ValidationIssues()
+
+    def __getstate__(self):
+        # prepared comparisons are closures, so they are prepared again when unpickled
+        state = self.__dict__.copy()
+        state.pop("_prepared", None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._prepare_bound()
+
+    def _prepare_bound(self) -> None:
+        if self._bound and self._attr is not None:
+            self._prepared = (
+                self._compile(self._attr, strict=False),
+                self._compile(self._attr, strict=True),
+            )
 
     def match(
         self,
@@ -220,27 +676,79 @@ class Present(AttributeOperator):
         attrs: Attributes,
         strict: bool = True,
     ) -> MatchResult:
+        if self._bound:
+            if self._attr is None:
+                return MatchResult.failed_no_attr()
+            return MatchResult.of(self._prepared[1 if strict else 0](value))
+
+        # unbound operators are not modified, so the comparison is prepared for every match;
+        # filters match data with operators bound to the schema instead
         attr = attrs.get(self._attr_rep)
         if attr is None:
             return MatchResult.failed_no_attr()
+        return MatchResult.of(self._prepare(attr, strict)(value))
+
+    def _prepare(self, attr: Attribute, strict: bool) -> CompiledMatch:
+        return self._compile(attr, strict)
+
+    def compile(
+        self, strict: bool = True, adaptive: bool = False, profiler: Optional[Profiler] = None
+    ) -> CompiledMatch:
+        if not self._bound:
+            raise ValueError(f"operator for {self._attr_rep} must be bound to be compiled")
+        if self._attr is None:
+            return _profiled(self, lambda _: MatchStatus.FAILED_NO_ATTR, profiler)
+        return _profiled(self, self._prepared[1 if strict else 0], profiler)
+
+    def match_columns(self, columns: Columns, rows: int, strict: bool = True) -> ColumnMatch:
+        """
+        Matches values of the attribute in `rows` of `columns`. The operator must be bound.
+        """
+        if self._bound and self._attr is None:
+            return ColumnMatch(passed=0, failed_no_attr=rows)
+        return _match_column(self.compile(strict), columns.get(self._attr_rep), rows)
 
-        if isinstance(attr, ComplexAttribute):
-            if isinstance(value, List):
-                match = any([item.get("value") for item in value])
+    @abc.abstractmethod
+    def _compile(self, attr: Attribute, strict: bool) -> CompiledMatch:
+        ...
+
+
+class Present(AttributeOperator):
+    SCIM_OP = "pr"
+
+    def _compile(self, attr: Attribute, strict: bool) -> CompiledMatch:
+        is_complex = isinstance(attr, ComplexAttribute)
+
+        def match(value: Any) -> MatchStatus:
+            if is_complex:
+                matched = isinstance(value, list) and any(
+                    get_attr_value(item, "value") for item in value
+                )
+            elif isinstance(value, list):
+                matched = any(value)
+            elif isinstance(value, str):
+                matched = bool(value)
             else:
-                match = False
-        elif isinstance(value, List):
-            match = any([bool(item) for item in value])
-        elif isinstance(value, str):
-            match = bool(value)
-        else:
-            match = value not in [None, Missing, Invalid]
-        return MatchResult.passed() if match else MatchResult.failed()
+                matched = value is not None and value is not Missing and value is not Invalid
+            return MatchStatus.PASSED if matched else MatchStatus.FAILED
+
+        return match
 
 
 T2 = TypeVar("T2")
 
 
+_COMPATIBLE_VALUE_TYPES = {
+    at.String.SCIM_NAME: {str},
+    at.Binary.SCIM_NAME: {str},
+    at.DateTime.SCIM_NAME: {str},
+    at.ExternalReference.SCIM_NAME: {str},
+    at.Boolean.SCIM_NAME: {bool},
+    at.Integer.SCIM_NAME: {int, float},
+    at.Decimal.SCIM_NAME: {int, float},
+}
+
+
 class BinaryAttributeOperator(AttributeOperator, abc.ABC):
     SUPPORTED_SCIM_TYPES: Set[str]
     SUPPORTED_TYPES: Set[Type]
@@ -258,73 +766,167 @@ class BinaryAttributeOperator(AttributeOperator, abc.ABC):
     def value(self) -> T2:
         return self._value
 
-    def _get_values_for_comparison(
-        self, value: Any, attr: Attribute
-    ) -> Optional[List[Tuple[Any, Any]]]:
-        if attr.type.SCIM_NAME not in self.SUPPORTED_SCIM_TYPES:
-            return None
-
-        if isinstance(attr, ComplexAttribute):
-            value_sub_attr = None
-            for sub_attr in attr.attrs:
-                if sub_attr.rep.attr == "value":
-                    value_sub_attr = sub_attr
-                    break
-            if value_sub_attr is None:
-                return None
+    def _bind(
+        self, attrs: Attributes
+    ) -> Tuple[Union[Invalid, "BinaryAttributeOperator"], ValidationIssues]:
+        bound, issues = super()._bind(attrs)
+        if bound.attr is None:
+            return bound, issues
 
-            if not attr.multi_valued:
-                return None
-
-            value = [item["value"] for item in value]
-
-        if attr.type.SCIM_NAME == "dateTime":
+        op_value = Invalid
+        if self._supports(bound.attr) and self._is_value_compatible(bound.attr):
             try:
-                return [(datetime.fromisoformat(value), datetime.fromisoformat(self.value))]
+                op_value = self._get_op_value(bound.attr)
             except ValueError:
-                return None
+                pass
+        if op_value is Invalid:
+            issues.add(
+                issue=ValidationError.non_compatible_attribute_type(
+                    value=self._value,
+                    operator=self.SCIM_OP,
+                    attribute=str(self._attr_rep),
+                    attribute_type=getattr(bound.attr.type, "SCIM_NAME", "unknown"),
+                ),
+                proceed=False,
+            )
+            return Invalid, issues
+        bound._op_value = op_value
+        return bound, issues
 
-        if isinstance(self.value, str):
-            if not attr.case_exact:
-                op_value = self.value.lower()
-                if not isinstance(value, List):
-                    value = [value]
-                return [(item.lower(), op_value) for item in value if isinstance(item, str)]
+    def _supports(self, attr: Attribute) -> bool:
+        if getattr(attr.type, "SCIM_NAME", None) not in self.SUPPORTED_SCIM_TYPES:
+            return False
+        if isinstance(attr, ComplexAttribute):
+            return attr.multi_valued and self._get_value_sub_attr(attr) is not None
+        return True
 
-        if not isinstance(value, List):
-            value = [value]
+    def _is_value_compatible(self, attr: Attribute) -> bool:
+        if self._value is None:
+            return True
+        if isinstance(attr, ComplexAttribute):
+            attr = self._get_value_sub_attr(attr)
+        scim_type = getattr(attr.type, "SCIM_NAME", None)
+        return type(self._value) in _COMPATIBLE_VALUE_TYPES.get(scim_type, set())
 
-        return [(item, self.value) for item in value]
+    @staticmethod
+    def _get_value_sub_attr(attr: ComplexAttribute) -> Optional[Attribute]:
+        for sub_attr in attr.attrs:
+            if sub_attr.rep.attr == "value":
+                return sub_attr
+        return None
+
+    def _get_op_value(self, attr: Attribute) -> Any:
+        if attr.type.SCIM_NAME == "dateTime" and self._value is not None:
+            return datetime.fromisoformat(self._value)
+        if isinstance(self._value, str) and not attr.case_exact:
+            return self._value.lower()
+        return self._value
 
-    def match(
-        self,
-        value: Any,
-        attrs: Attributes,
-        strict: bool = True,
-    ) -> MatchResult:
-        attr = attrs.get(self._attr_rep)
-        if attr is None:
-            return MatchResult.failed_no_attr()
+    def _prepare(self, attr: Attribute, strict: bool) -> CompiledMatch:
+        if not self._supports(attr):
+            return self._compile_failing(strict)
+        try:
+            op_value = self._get_op_value(attr)
+        except ValueError:
+            return self._compile_failing(strict)
+        return self._compile_comparison(attr, strict, op_value)
 
-        if value in [None, Missing]:
-            if not strict:
-                return MatchResult.passed()
-            return MatchResult.missing_data()
-        elif value is Invalid:
-            return MatchResult.failed()
+    @staticmethod
+    def _compile_failing(strict: bool) -> CompiledMatch:
+        on_missing_data = MatchStatus.MISSING_DATA if strict else MatchStatus.PASSED
 
-        values = self._get_values_for_comparison(value, attr)
+        def match(value: Any) -> MatchStatus:
+            if value is None or value is Missing:
+                return on_missing_data
+            return MatchStatus.FAILED
 
-        if values is None:
-            return MatchResult.failed()
+        return match
 
-        for attr_value, op_value in values:
-            if self.OPERATOR(attr_value, op_value):
-                return MatchResult.passed()
-        return MatchResult.failed()
+    _get_alternatives_matcher: Optional[Callable[[Collection[str]], Callable[[str], bool]]] = None
+
+    @classmethod
+    def compile_alternatives(
+        cls, operators: Sequence["BinaryAttributeOperator"], strict: bool
+    ) -> CompiledMatch:
+        """
+        Compiles bound operators of the class, for the same attribute and with string
+        values, to a function that passes if any of the operators passes.
+        """
+        attr = operators[0].attr
+        operator_ = cls.OPERATOR
+        op_values = [bound._op_value for bound in operators]
+        matches_any = cls._get_alternatives_matcher(op_values)
+        on_missing_data = MatchStatus.MISSING_DATA if strict else MatchStatus.PASSED
+        is_complex = isinstance(attr, ComplexAttribute)
+        lower = not attr.case_exact
+
+        def match(value: Any) -> MatchStatus:
+            if value is None or value is Missing:
+                return on_missing_data
+            if value is Invalid:
+                return MatchStatus.FAILED
+            if is_complex:
+                value = [get_attr_value(item, "value") for item in value]
+            if not isinstance(value, List):
+                value = [value]
+            for item in value:
+                if isinstance(item, str):
+                    if matches_any(item.lower() if lower else item):
+                        return MatchStatus.PASSED
+                elif not lower and any(operator_(item, op_value) for op_value in op_values):
+                    return MatchStatus.PASSED
+            return MatchStatus.FAILED
+
+        return match
+
+    def _compile(self, attr: Attribute, strict: bool) -> CompiledMatch:
+        return self._compile_comparison(attr, strict, self._op_value)
+
+    def _compile_comparison(self, attr: Attribute, strict: bool, op_value: Any) -> CompiledMatch:
+        operator_ = self.OPERATOR
+        on_missing_data = MatchStatus.MISSING_DATA if strict else MatchStatus.PASSED
+        is_complex = isinstance(attr, ComplexAttribute)
+        is_date_time = attr.type.SCIM_NAME == "dateTime"
+        lower = isinstance(op_value, str) and not attr.case_exact
+        passed, failed = MatchStatus.PASSED, MatchStatus.FAILED
+
+        # single values are compared without wrapping them in list
+        def match(value: Any) -> MatchStatus:
+            if value is None or value is Missing:
+                return on_missing_data
+            if value is Invalid:
+                return failed
+            if is_complex:
+                value = [get_attr_value(item, "value") for item in value]
+            elif is_date_time:
+                try:
+                    value = datetime.fromisoformat(value)
+                except ValueError:
+                    return failed
+                return passed if operator_(value, op_value) else failed
+            if isinstance(value, list):
+                for item in value:
+                    if lower:
+                        if not isinstance(item, str):
+                            continue
+                        item = item.lower()
+                    if operator_(item, op_value):
+                        return passed
+                return failed
+            if lower:
+                if not isinstance(value, str):
+                    return failed
+                value = value.lower()
+            return passed if operator_(value, op_value) else failed
+
+        return match
 
 
 class Equal(BinaryAttributeOperator):
+    @staticmethod
+    def _get_alternatives_matcher(values: Collection[str]) -> Callable[[str], bool]:
+        return frozenset(values).__contains__
+
     SCIM_OP = "eq"
     OPERATOR = operator.eq
     SUPPORTED_SCIM_TYPES = {
@@ -361,6 +963,10 @@ class NotEqual(BinaryAttributeOperator):
 
 
 class Contains(BinaryAttributeOperator):
+    @staticmethod
+    def _get_alternatives_matcher(values: Collection[str]) -> Callable[[str], bool]:
+        return _compile_substrings_matcher(values)
+
     SCIM_OP = "co"
     OPERATOR = operator.contains
     SUPPORTED_SCIM_TYPES = {
@@ -378,6 +984,15 @@ class StartsWith(BinaryAttributeOperator):
     def _starts_with(val1: str, val2: str):
         return val1.startswith(val2)
 
+    @staticmethod
+    def _get_alternatives_matcher(values: Collection[str]) -> Callable[[str], bool]:
+        prefixes = _group_by_length(values)
+
+        def starts_with_any(value: str) -> bool:
+            return any(value[:length] in prefixes_ for length, prefixes_ in prefixes)
+
+        return starts_with_any
+
     SCIM_OP = "sw"
     OPERATOR = _starts_with
     SUPPORTED_SCIM_TYPES = {
@@ -395,6 +1010,18 @@ class EndsWith(BinaryAttributeOperator):
     def _ends_with(val1: str, val2: str):
         return val1.endswith(val2)
 
+    @staticmethod
+    def _get_alternatives_matcher(values: Collection[str]) -> Callable[[str], bool]:
+        suffixes = _group_by_length(values)
+
+        def ends_with_any(value: str) -> bool:
+            return any(
+                length <= len(value) and value[len(value) - length :] in suffixes_
+                for length, suffixes_ in suffixes
+            )
+
+        return ends_with_any
+
     SCIM_OP = "ew"
     OPERATOR = _ends_with
     SUPPORTED_SCIM_TYPES = {
@@ -472,6 +1099,8 @@ class ComplexAttributeOperator:
     ):
         self._attr_rep = attr_rep
         self._sub_operator = sub_operator
+        self._bound = False
+        self._attr: Optional[Attribute] = None
 
     @property
     def attr_rep(self) -> AttrRep:
@@ -481,13 +1110,36 @@ class ComplexAttributeOperator:
     def sub_operator(self) -> TComplexAttributeSubOperator:
         return self._sub_operator
 
+    @property
+    def bound(self) -> bool:
+        return self._bound
+
+    @property
+    def attr(self) -> Optional[ComplexAttribute]:
+        return self._attr
+
+    def bind(
+        self, attrs: Attributes
+    ) -> Tuple[Union[Invalid, "ComplexAttributeOperator"], ValidationIssues]:
+        issues = ValidationIssues()
+        attr = attrs.get(self._attr_rep)
+        sub_operator = self._sub_operator
+        if isinstance(attr, ComplexAttribute):
+            sub_operator, issues = sub_operator.bind(attr.attrs)
+            if not issues.can_proceed():
+                return Invalid, issues
+        bound = ComplexAttributeOperator(attr_rep=self._attr_rep, sub_operator=sub_operator)
+        bound._bound = True
+        bound._attr = attr
+        return bound, issues
+
     def match(
         self,
         value: Optional[Union[List[SCIMDataContainer], SCIMDataContainer]],
         attrs: Attributes,
         strict: bool = True,
     ) -> MatchResult:
-        attr = attrs.get(self._attr_rep)
+        attr = self._attr if self._bound else attrs.get(self._attr_rep)
         if attr is None or not isinstance(attr, ComplexAttribute):
             return MatchResult.failed_no_attr()
         if (
@@ -504,9 +1156,15 @@ class ComplexAttributeOperator:
             value = [value]
 
         if isinstance(self._sub_operator, AttributeOperator):
+            min_items = ValueIndex.min_items
+            if attr.multi_valued and min_items is not None and len(value) >= min_items:
+                index_match = self._get_index_match(attr, strict)
+                status = index_match(value) if index_match is not None else None
+                if status is not None:
+                    return MatchResult.of(status)
             has_value = False
             for item in value:
-                item_value = item[self._sub_operator.attr_rep]
+                item_value = get_value(item, self._sub_operator.attr_rep)
                 if item_value not in [None, Missing]:
                     has_value = True
                 match = self._sub_operator.match(item_value, attr.attrs, strict)
@@ -527,3 +1185,314 @@ class ComplexAttributeOperator:
         if missing_data and not strict:
             return MatchResult.passed()
         return MatchResult.failed()
+
+    def compile(
+        self, strict: bool = True, adaptive: bool = False, profiler: Optional[Profiler] = None
+    ) -> CompiledMatch:
+        if not self._bound:
+            raise ValueError(f"operator for {self._attr_rep} must be bound to be compiled")
+        attr = self._attr
+        if attr is None or not isinstance(attr, ComplexAttribute):
+            return _profiled(self, lambda _: MatchStatus.FAILED_NO_ATTR, profiler)
+
+        sub_match = self._sub_operator.compile(strict, adaptive, profiler)
+        index_match = self._get_index_match(attr, strict)
+        return _profiled(self, self._compile(attr, sub_match, strict, index_match), profiler)
+
+    def match_columns(self, columns: Columns, rows: int, strict: bool = True) -> ColumnMatch:
+        """
+        Matches values of the attribute in `rows` of `columns`. The operator must be bound.
+        """
+        if self._bound and not isinstance(self._attr, ComplexAttribute):
+            return ColumnMatch(passed=0, failed_no_attr=rows)
+        return _match_column(self.compile(strict), columns.get(self._attr_rep), rows)
+
+    def _get_index_match(
+        self, attr: ComplexAttribute, strict: bool
+    ) -> Optional[Callable[[List[Any]], Optional[MatchStatus]]]:
+        """
+        Returns function that matches items of multi-valued attribute with 'eq' or 'pr'
+        sub-operator using index of the sub-attribute values (see `get_value_index`),
+        and returns 'None' if the items are not indexed.
+        """
+        sub_operator = self._sub_operator
+        if not attr.multi_valued or type(sub_operator) not in (Equal, Present):
+            return None
+        if sub_operator.bound:
+            sub_attr = sub_operator.attr
+        else:
+            sub_attr = attr.attrs.get(sub_operator.attr_rep)
+        if sub_attr is None or sub_attr.type.SCIM_NAME == "dateTime":
+            return None
+        attr_rep, lower = sub_operator.attr_rep, not sub_attr.case_exact
+
+        if isinstance(sub_operator, Present):
+
+            def match_present(items: List[Any]) -> Optional[MatchStatus]:
+                index = get_value_index(items, attr_rep, lower)
+                if index is None:
+                    return None
+                if index.present or (not strict and not index.has_value):
+                    return MatchStatus.PASSED
+                return MatchStatus.FAILED
+
+            return match_present
+
+        if sub_operator.bound:
+            op_value = sub_operator._op_value
+        elif not sub_operator._supports(sub_attr):
+            return None
+        else:
+            try:
+                op_value = sub_operator._get_op_value(sub_attr)
+            except ValueError:
+                return None
+
+        def match_equal(items: List[Any]) -> Optional[MatchStatus]:
+            index = get_value_index(items, attr_rep, lower)
+            if index is None:
+                return None
+            # with `strict` not set, items without the value pass, like when scanning them
+            if op_value in index or (not strict and (index.has_missing or not index.has_value)):
+                return MatchStatus.PASSED
+            return MatchStatus.FAILED
+
+        return match_equal
+
+    def _compile(
+        self,
+        attr: ComplexAttribute,
+        sub_match: CompiledMatch,
+        strict: bool,
+        index_match: Optional[Callable[[List[Any]], Optional[MatchStatus]]] = None,
+    ) -> CompiledMatch:
+        multi_valued = attr.multi_valued
+
+        def get_items(value: Any) -> Optional[List[SCIMDataContainer]]:
+            if multi_valued:
+                return value if isinstance(value, List) else None
+            if isinstance(value, List):
+                return None
+            return [value or SCIMDataContainer()]
+
+        if isinstance(self._sub_operator, AttributeOperator):
+            get = SCIMDataContainer.getter(self._sub_operator.attr_rep)
+
+            def match(value: Any) -> MatchStatus:
+                items = get_items(value)
+                if items is None:
+                    return MatchStatus.FAILED
+                if index_match is not None:
+                    status = index_match(items)
+                    if status is not None:
+                        return status
+                has_value = False
+                for item in items:
+                    item_value = get(item)
+                    if item_value is not None and item_value is not Missing:
+                        has_value = True
+                    if sub_match(item_value) is MatchStatus.PASSED:
+                        return MatchStatus.PASSED
+                if not has_value and not strict:
+                    return MatchStatus.PASSED
+                return MatchStatus.FAILED
+
+            return match
+
+        def match(value: Any) -> MatchStatus:
+            items = get_items(value)
+            if items is None:
+                return MatchStatus.FAILED
+            missing_data = False
+            for item in items:
+                status = sub_match(item)
+                if status is MatchStatus.PASSED:
+                    return status
+                if status is MatchStatus.MISSING_DATA:
+                    missing_data = True
+            if missing_data and not strict:
+                return MatchStatus.PASSED
+            return MatchStatus.FAILED
+
+        return match
+
+
+def _profiled(
+    operator_: Any, match: CompiledMatch, profiler: Optional[Profiler]
+) -> CompiledMatch:
+    if profiler is None:
+        return match
+    return profiler.wrap(operator_, match)
+
+
+def _get_alternatives_key(
+    operator_: Union[LogicalOperator, AttributeOperator, ComplexAttributeOperator]
+) -> Optional[Hashable]:
+    if isinstance(operator_, ComplexAttributeOperator):
+        if not operator_.bound or not isinstance(operator_.attr, ComplexAttribute):
+            return None
+        sub_key = _get_alternatives_key(operator_.sub_operator)
+        if sub_key is None:
+            return None
+        return str(operator_.attr_rep).lower(), id(operator_.attr), sub_key
+
+    if (
+        isinstance(operator_, BinaryAttributeOperator)
+        and operator_.attr is not None
+        and operator_._get_alternatives_matcher is not None
+        and isinstance(operator_._op_value, str)
+    ):
+        return str(operator_.attr_rep).lower(), id(operator_.attr), type(operator_)
+    return None
+
+
+def _compile_alternatives(
+    operators: Sequence[Union[BinaryAttributeOperator, ComplexAttributeOperator]], strict: bool
+) -> CompiledMatch:
+    match = _compile_alternatives_value_match(operators, strict)
+    get = SCIMDataContainer.getter(operators[0].attr_rep)
+    return lambda value: match(get(value))
+
+
+def _compile_alternatives_value_match(
+    operators: Sequence[Union[BinaryAttributeOperator, ComplexAttributeOperator]], strict: bool
+) -> CompiledMatch:
+    first = operators[0]
+    if isinstance(first, ComplexAttributeOperator):
+        sub_operators = [operator_.sub_operator for operator_ in operators]
+        return first._compile(
+            first.attr, type(first.sub_operator).compile_alternatives(sub_operators, strict), strict
+        )
+    return type(first).compile_alternatives(operators, strict)
+
+
+def _group_by_length(values: Collection[str]) -> List[Tuple[int, Set[str]]]:
+    by_length: Dict[int, Set[str]] = defaultdict(set)
+    for value in values:
+        by_length[len(value)].add(value)
+    return sorted(by_length.items())
+
+
+def _compile_substrings_matcher(substrings: Collection[str]) -> Callable[[str], bool]:
+    """
+    Returns function that tells whether any of `substrings` is contained in the value,
+    using Aho-Corasick automaton, so the value is scanned once for all substrings.
+    """
+    if "" in substrings:
+        return lambda _: True
+    if len(substrings) <= 8:
+        substrings = tuple(substrings)
+        return lambda value: any(substring in value for substring in substrings)
+
+    goto: List[Dict[str, int]] = [{}]
+    output = [False]
+    for substring in substrings:
+        state = 0
+        for char in substring:
+            next_state = goto[state].get(char)
+            if next_state is None:
+                next_state = len(goto)
+                goto[state][char] = next_state
+                goto.append({})
+                output.append(False)
+            state = next_state
+        output[state] = True
+
+    fail = [0] * len(goto)
+    queue = deque(goto[0].values())
+    while queue:
+        state = queue.popleft()
+        for char, next_state in goto[state].items():
+            queue.append(next_state)
+            fail_state = fail[state]
+            while fail_state and char not in goto[fail_state]:
+                fail_state = fail[fail_state]
+            fail[next_state] = goto[fail_state].get(char, 0)
+            output[next_state] = output[next_state] or output[fail[next_state]]
+
+    def contains_any(value: str) -> bool:
+        state = 0
+        for char in value:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                return True
+        return False
+
+    return contains_any
+
+
+_ADAPTIVE_SAMPLE_SIZE = 32
+_ADAPTIVE_INTERVAL = 1024
+
+
+def _compile_adaptive(matches: Sequence[CompiledMatch], decisive: MatchStatus) -> CompiledMatch:
+    """
+    Returns function that matches like 'and' (for 'FAILED' `decisive` status) or 'or'
+    (for 'PASSED' `decisive` status) operator with compiled `matches` operands, but evaluates
+    the operands in order of increasing cost of deciding the match. The first
+    `_ADAPTIVE_SAMPLE_SIZE` matches of every `_ADAPTIVE_INTERVAL` evaluate all operands,
+    measuring their cost and how often they decide, and the operands are reordered afterwards.
+
+    The status does not depend on the order, since the decisive status wins wherever
+    it is and 'MISSING_DATA' is reported only if no operand decides. If any operand raises
+    when evaluated out of the original order (e.g. for bad data), the value is matched
+    in the original order.
+    """
+    matches = tuple(matches)
+    undecided = MatchStatus.PASSED if decisive is MatchStatus.FAILED else MatchStatus.FAILED
+    costs = [0] * len(matches)
+    decided = [0] * len(matches)
+    ordered = matches
+    n_matched = 0
+
+    def match_in_order(value: Any, matches_: Tuple[CompiledMatch, ...]) -> MatchStatus:
+        missing_data = False
+        for match_ in matches_:
+            status = match_(value)
+            if status is decisive:
+                return status
+            if status is MatchStatus.MISSING_DATA:
+                missing_data = True
+        if missing_data:
+            return MatchStatus.MISSING_DATA
+        return undecided
+
+    def sample(value: Any) -> MatchStatus:
+        result = undecided
+        for i, match_ in enumerate(matches):
+            start = time.perf_counter_ns()
+            status = match_(value)
+            costs[i] += time.perf_counter_ns() - start
+            if status is decisive:
+                decided[i] += 1
+                result = decisive
+            elif status is MatchStatus.MISSING_DATA and result is undecided:
+                result = status
+        return result
+
+    def reorder() -> None:
+        nonlocal ordered
+        order = sorted(range(len(matches)), key=lambda i: costs[i] / (decided[i] + 1))
+        ordered = tuple(matches[i] for i in order)
+        costs[:] = [0] * len(matches)
+        decided[:] = [0] * len(matches)
+
+    def match(value: Any) -> MatchStatus:
+        nonlocal n_matched
+        n_matched = (n_matched + 1) % _ADAPTIVE_INTERVAL
+        if 0 < n_matched <= _ADAPTIVE_SAMPLE_SIZE:
+            try:
+                status = sample(value)
+            except Exception:
+                status = match_in_order(value, matches)
+            if n_matched == _ADAPTIVE_SAMPLE_SIZE:
+                reorder()
+            return status
+        try:
+            return match_in_order(value, ordered)
+        except Exception:
+            return match_in_order(value, matches)
+
+    return match
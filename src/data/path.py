@@ -1,5 +1,7 @@
-from typing import Dict, Optional, Tuple, Union
+import json
+from typing import Any, Dict, Optional, Tuple, Union
 
+from src.cache import ParseCache
 from src.data.container import AttrRep, Invalid
 from src.data.operator import ComplexAttributeOperator
 from src.error import ValidationError, ValidationIssues
@@ -7,7 +9,16 @@ from src.filter import Filter
 from src.utils import PLACEHOLDER_REGEX, STRING_VALUES_REGEX, get_placeholder
 
 
+def _attr_rep_from_dict(attr_rep_exp: str) -> AttrRep:
+    attr_rep = AttrRep.parse(attr_rep_exp)
+    if attr_rep is Invalid:
+        raise ValueError(f"bad attribute name {attr_rep_exp!r}")
+    return attr_rep
+
+
 class PatchPath:
+    parse_cache = ParseCache()
+
     def __init__(
         self,
         attr_rep: AttrRep,
@@ -51,6 +62,15 @@ class PatchPath:
 
     @classmethod
     def parse(cls, path: str) -> Tuple[Union[Invalid, "PatchPath"], ValidationIssues]:
+        cached = cls.parse_cache.get(path)
+        if cached is not None:
+            return cached
+
+        parsed, issues = cls._parse(path)
+        return cls.parse_cache.set(path, parsed, issues)
+
+    @classmethod
+    def _parse(cls, path: str) -> Tuple[Union[Invalid, "PatchPath"], ValidationIssues]:
         issues = ValidationIssues()
 
         string_values = {}
@@ -114,6 +134,38 @@ class PatchPath:
             issues,
         )
 
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "attr_rep": str(self._attr_rep),
+            "complex_filter": (
+                self._complex_filter.to_dict() if self._complex_filter is not None else None
+            ),
+            "complex_filter_attr_rep": (
+                str(self._complex_filter_attr_rep) if self._complex_filter_attr_rep else None
+            ),
+        }
+
+    @classmethod
+    def from_dict(cls, path_dict: Dict[str, Any]) -> "PatchPath":
+        complex_filter = path_dict["complex_filter"]
+        complex_filter_attr_rep = path_dict["complex_filter_attr_rep"]
+        return cls(
+            attr_rep=_attr_rep_from_dict(path_dict["attr_rep"]),
+            complex_filter=Filter.from_dict(complex_filter) if complex_filter else None,
+            complex_filter_attr_rep=(
+                _attr_rep_from_dict(complex_filter_attr_rep)
+                if complex_filter_attr_rep
+                else None
+            ),
+        )
+
+    def to_bytes(self) -> bytes:
+        return json.dumps(self.to_dict(), separators=(",", ":")).encode()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "PatchPath":
+        return cls.from_dict(json.loads(data))
+
     @staticmethod
     def _get_sub_attr_rep(
         issues: ValidationIssues,
@@ -255,7 +255,7 @@ class BaseSchema(abc.ABC):
         method: str,
     ) -> Tuple[SCIMDataContainer, ValidationIssues]:
         issues = ValidationIssues()
-        data = SCIMDataContainer(data)
+        data = SCIMDataContainer(data, lazy=True)
         processed = SCIMDataContainer()
         for attr in self.attrs.top_level:
             value = data[attr.rep]
@@ -52,6 +52,11 @@ class ValidationError:
         37: "too many operations (max {max})",
         38: "too many errors (max {max})",
         39: "value or operation not supported",
+        40: "too many resources match the filter (max {max})",
+        41: (
+            "filter is too broad, it is estimated to match {selectivity:.1%} of resources "
+            "(max {max_selectivity:.1%})"
+        ),
         100: "one of brackets is not opened / closed",
         102: "one of complex attribute brackets is not opened / closed",
         104: "missing operand for operator '{operator}' in expression '{expression}'",
@@ -63,6 +68,12 @@ class ValidationError:
         111: "attribute {attribute!r} does not conform the rules",
         112: "bad comparison value {value!r}",
         113: "comparison value {value!r} is not compatible with {operator!r} operator",
+        114: (
+            "comparison value {value!r} and {operator!r} operator are not compatible with "
+            "attribute {attribute!r} of type {attribute_type!r}"
+        ),
+        115: "attribute {attribute!r} is not mapped to {target}",
+        116: "filter expression exceeds the limit of {max_value} for {limit}",
         300: "bad operation path",
         303: "unknown operation target",
         304: "attribute can not be modified",
@@ -218,6 +229,14 @@ class ValidationError:
     def not_supported(cls):
         return cls(code=39)
 
+    @classmethod
+    def too_many_matched_resources(cls, max_: int):
+        return cls(code=40, max=max_)
+
+    @classmethod
+    def too_broad_filter(cls, selectivity: float, max_selectivity: float):
+        return cls(code=41, selectivity=selectivity, max_selectivity=max_selectivity)
+
     @classmethod
     def bracket_not_opened_or_closed(cls):
         return cls(code=100)
@@ -267,6 +286,26 @@ class ValidationError:
     def non_compatible_comparison_value(cls, value: Any, operator: str):
         return cls(code=113, value=value, operator=operator)
 
+    @classmethod
+    def non_compatible_attribute_type(
+        cls, value: Any, operator: str, attribute: str, attribute_type: str
+    ):
+        return cls(
+            code=114,
+            value=value,
+            operator=operator,
+            attribute=attribute,
+            attribute_type=attribute_type,
+        )
+
+    @classmethod
+    def attribute_not_mapped(cls, attribute: str, target: str):
+        return cls(code=115, attribute=attribute, target=target)
+
+    @classmethod
+    def filter_limit_exceeded(cls, limit: str, max_value: int):
+        return cls(code=116, limit=limit, max_value=max_value)
+
     @classmethod
     def bad_operation_path(cls):
         return cls(code=300)
@@ -0,0 +1,111 @@
+from typing import Dict, List, Optional, Set, Tuple
+
+from src.attributes_presence import AttributePresenceChecker
+from src.data.attributes import Attribute, AttributeReturn, ComplexAttribute
+from src.data.container import AttrRep
+from src.data.schemas import BaseSchema
+from src.filter import Filter
+from src.sorter import Sorter
+
+_AttrKey = Tuple[str, str]
+
+
+def get_fetch_plan(
+    schema: BaseSchema,
+    filter_: Optional[Filter] = None,
+    sorter: Optional[Sorter] = None,
+    presence_checker: Optional[AttributePresenceChecker] = None,
+) -> List[AttrRep]:
+    """
+    Returns attributes and sub-attributes of resources that must be loaded from storage
+    to filter and sort them, and to return them with attributes requested by the
+    `presence_checker` ('attributes' / 'excludeAttributes'). Attributes are represented like
+    in the schema, in its order, and sub-attributes are not listed if the whole attribute
+    must be loaded. Attributes that are never returned are loaded only if referenced by
+    the filter or the sorter, and attributes not in the schema are not loaded at all.
+    """
+    whole: Set[_AttrKey] = set()
+    sub_attrs: Dict[_AttrKey, List[AttrRep]] = {}
+
+    def add(attr_rep: AttrRep):
+        attr = schema.attrs.get(attr_rep)
+        if attr is None:
+            return
+        key = _get_key(attr.rep)
+        if not attr.rep.sub_attr:
+            whole.add(key)
+        elif attr.rep not in sub_attrs.setdefault(key, []):
+            sub_attrs[key].append(attr.rep)
+
+    for attr_rep in _get_returned_attr_reps(schema, presence_checker):
+        add(attr_rep)
+    if filter_ is not None:
+        if filter_.schema is None:
+            # bound filter tells which sub-attributes are compared
+            bound, _ = filter_.bind(schema)
+            filter_ = bound or filter_
+        for attr_rep in filter_.referenced_attrs():
+            add(attr_rep)
+    if sorter is not None:
+        attr = schema.attrs.get(sorter.attr_rep)
+        if isinstance(attr, ComplexAttribute) and attr.multi_valued:
+            # primary value is sorted by
+            add(AttrRep(schema=attr.rep.schema, attr=attr.rep.attr, sub_attr="primary"))
+            add(AttrRep(schema=attr.rep.schema, attr=attr.rep.attr, sub_attr="value"))
+        else:
+            add(sorter.attr_rep)
+
+    plan = []
+    for attr in schema.attrs:
+        key = _get_key(attr.rep)
+        if attr.rep.sub_attr:
+            if key not in whole and attr.rep in sub_attrs.get(key, []):
+                plan.append(attr.rep)
+        elif key in whole:
+            plan.append(attr.rep)
+    return plan
+
+
+def _get_returned_attr_reps(
+    schema: BaseSchema, presence_checker: Optional[AttributePresenceChecker]
+) -> List[AttrRep]:
+    include = presence_checker.include if presence_checker is not None else None
+    requested = presence_checker.attr_reps if presence_checker is not None else []
+    attr_reps = []
+    for attr in schema.attrs:
+        if attr.returned == AttributeReturn.NEVER:
+            continue
+
+        top_attr_rep = AttrRep(schema=attr.rep.schema, attr=attr.rep.attr)
+        if include is None:
+            returned = attr.returned != AttributeReturn.REQUEST
+        elif attr.returned == AttributeReturn.ALWAYS:
+            returned = not (include and attr.rep.sub_attr) or any(
+                attr_rep.top_level_equals(top_attr_rep) for attr_rep in requested
+            )
+        elif include:
+            returned = attr.rep in requested or (
+                bool(attr.rep.sub_attr) and top_attr_rep in requested
+            )
+        else:
+            returned = attr.returned != AttributeReturn.REQUEST and not (
+                attr.rep in requested or bool(attr.rep.sub_attr) and top_attr_rep in requested
+            )
+            if returned and not attr.rep.sub_attr and _has_excluded_sub_attrs(attr, requested):
+                # only sub-attributes that are not excluded are returned
+                continue
+        if returned:
+            attr_reps.append(attr.rep)
+    return attr_reps
+
+
+def _has_excluded_sub_attrs(attr: Attribute, excluded: List[AttrRep]) -> bool:
+    if not isinstance(attr, ComplexAttribute):
+        return False
+    return any(
+        attr_rep.sub_attr and attr_rep.top_level_equals(attr.rep) for attr_rep in excluded
+    )
+
+
+def _get_key(attr_rep: AttrRep) -> _AttrKey:
+    return attr_rep.schema.lower(), attr_rep.attr.lower()
@@ -1,25 +1,45 @@
+import functools
+import json
 import re
-from dataclasses import dataclass
-from typing import TYPE_CHECKING, Dict, List, Optional, Tuple, TypeAlias, Union
+from collections import defaultdict
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeAlias,
+    Union,
+)
 
+from src.cache import ParseCache
+from src.data import algebra
 from src.data import operator as op
-from src.data.container import AttrRep, Invalid, SCIMDataContainer
+from src.data.attributes import Attributes
+from src.data.container import AttrRep, Invalid, SCIMDataContainer, get_value
 from src.error import ValidationError, ValidationIssues
-from src.utils import (
-    OP_REGEX,
-    PLACEHOLDER_REGEX,
-    STRING_VALUES_REGEX,
-    get_placeholder,
-    parse_comparison_value,
-    parse_placeholder,
-)
+from src.utils import parse_comparison_value
 
 if TYPE_CHECKING:
     from src.data.schemas import BaseSchema
 
-OR_LOGICAL_OPERATOR_SPLIT_REGEX = re.compile(r"\s*\bor\b\s*", flags=re.DOTALL)
-AND_LOGICAL_OPERATOR_SPLIT_REGEX = re.compile(r"\s*\band\b\s*", flags=re.DOTALL)
-NOT_LOGICAL_OPERATOR_REGEX = re.compile(r"\s*\bnot\b\s*(.*)", flags=re.DOTALL)
+# unterminated string literal is a word up to the end of the expression, so brackets after
+# the quote are not matched and the comparison value is invalid
+_TOKEN_REGEX = re.compile(
+    r"(?P<whitespace>\s+)"
+    r"|(?P<bracket>[()\[\]])"
+    r"|(?P<string>\"[^\"]*\"|'[^']*')"
+    r"|(?P<word>[^\s()\[\]\"']+|[\"'].*)",
+    flags=re.DOTALL,
+)
+_LITERAL_REGEX = re.compile(r"\?|true|false|null|[+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?")
+
+_PARAMETER = "?"
 
 _UNARY_ATTR_OPERATORS = {
     "pr": op.Present,
@@ -37,6 +57,11 @@ _BINARY_ATTR_OPERATORS = {
     "le": op.LesserThanOrEqual,
 }
 
+_MULTI_OPERAND_LOGICAL_OPERATORS = {
+    "and": op.And,
+    "or": op.Or,
+}
+
 _ALLOWED_VALUE_TYPES_FOR_BINARY_OPERATORS = {
     op.Equal: {int, float, str, bool, type(None)},
     op.NotEqual: {int, float, str, bool, type(None)},
@@ -59,415 +84,344 @@ _ParsedOperator: TypeAlias = Union[
 ]
 
 
-@dataclass
-class _ParsedComplexAttributeOperator:
-    operator: Optional[op.ComplexAttributeOperator]
-    issues: ValidationIssues
-    expression: str
+class FilterLimits(NamedTuple):
+    """
+    Limits of filter expression complexity, enforced while the expression is tokenized,
+    so excessive expressions are rejected before they are parsed. `max_depth` is the
+    number of nested brackets (groups and complex attributes), `max_clauses` is the number
+    of 'and' / 'or' operands, and `max_literals` is the number of string literals. 'None'
+    disables the limit. Nesting depth is limited by default, since expressions are parsed
+    recursively.
+    """
 
+    max_length: Optional[int] = None
+    max_depth: Optional[int] = 50
+    max_clauses: Optional[int] = None
+    max_literals: Optional[int] = None
 
-@dataclass
-class _ParsedGroupOperator:
-    operator: Optional[Union[op.AttributeOperator, op.LogicalOperator]]
-    issues: ValidationIssues
-    expression: str
 
+_NO_LIMITS = FilterLimits(max_depth=None)
+
+# number of schemas, per filter, that operators bound to them are kept for
+_MAX_BOUND_OPERATORS = 8
 
-class Filter:
-    def __init__(self, operator: _ParsedOperator):
-        self._operator = operator
+
+class _Parameter:
+    def __init__(self, operator_cls, attr_rep: AttrRep):
+        self._operator_cls = operator_cls
+        self._attr_rep = attr_rep
 
     @property
-    def operator(self) -> _ParsedOperator:
-        return self._operator
+    def operator_cls(self):
+        return self._operator_cls
 
-    @classmethod
-    def parse(cls, filter_exp: str) -> Tuple[Union[Invalid, "Filter"], ValidationIssues]:
-        issues = ValidationIssues()
+    @property
+    def attr_rep(self) -> AttrRep:
+        return self._attr_rep
 
-        string_values = {}
-        for match in STRING_VALUES_REGEX.finditer(filter_exp):
-            start, stop = match.span()
-            string_value = match.string[start:stop]
-            string_values[start] = string_value
-            filter_exp = filter_exp.replace(string_value, get_placeholder(start), 1)
 
-        bracket_open_index = None
-        complex_attr_rep = ""
-        parsed_complex_ops = {}
-        filter_exp_iter_copy = filter_exp
-        ignore_processing = False
-        issues_ = ValidationIssues()
-        for i, char in enumerate(filter_exp_iter_copy):
-            if char == '"':
-                ignore_processing = not ignore_processing
-            if ignore_processing:
+class _Token(NamedTuple):
+    kind: str  # one of "(", ")", "[", "]", "string", "word"
+    start: int
+    end: int
+    spaced: bool  # whether the token is preceded by whitespace
+
+
+class _Item(NamedTuple):
+    kind: str  # one of "string", "word", "group", "complex"
+    start: int
+    end: int
+    spaced: bool
+    children: Optional[List["_Item"]] = None  # group content
+    brackets: Optional[Tuple[int, int]] = None  # token indexes of complex attribute brackets
+
+
+class _FilterParser:
+    """
+    Parses filter expression in a single pass over its tokens. Complex attribute brackets
+    are matched first, then every expression level (top-level, complex attribute, group)
+    is split by 'or' and 'and' operators, in that order, so the precedence is preserved.
+    """
+
+    def __init__(
+        self,
+        exp: str,
+        parameters: Optional[List[_Parameter]] = None,
+        limits: Optional[FilterLimits] = None,
+    ):
+        self._exp = exp
+        self._tokens: List[_Token] = []
+        self._complex_brackets: Dict[int, int] = {}
+        self._parameters = parameters
+        self._limits = _NO_LIMITS if limits is None else limits
+
+    @staticmethod
+    def _tokenize_within_limits(
+        exp: str, limits: FilterLimits
+    ) -> Tuple[List[_Token], Optional[ValidationError]]:
+        error = _check_length(exp, limits)
+        if error is not None:
+            return [], error
+
+        tokens = []
+        spaced = False
+        depth, n_clauses, n_literals = 0, 1, 0
+        for match in _TOKEN_REGEX.finditer(exp):
+            kind = match.lastgroup
+            if kind == "whitespace":
+                spaced = True
                 continue
+            start, end = match.span()
+            if kind == "bracket":
+                kind = exp[start]
+                if kind in "([":
+                    depth += 1
+                    if limits.max_depth is not None and depth > limits.max_depth:
+                        return [], ValidationError.filter_limit_exceeded("depth", limits.max_depth)
+                elif depth:
+                    depth -= 1
+            elif kind == "string":
+                n_literals += 1
+                if limits.max_literals is not None and n_literals > limits.max_literals:
+                    return [], ValidationError.filter_limit_exceeded(
+                        "literals", limits.max_literals
+                    )
+            elif end - start <= 3 and exp[start:end] in ("and", "or"):
+                n_clauses += 1
+                if limits.max_clauses is not None and n_clauses > limits.max_clauses:
+                    return [], ValidationError.filter_limit_exceeded(
+                        "clauses", limits.max_clauses
+                    )
+            tokens.append(_Token(kind, start, end, spaced))
+            spaced = False
+        return tokens, None
+
+    def parse(self) -> Tuple[Union[Invalid, _ParsedOperator], ValidationIssues]:
+        issues = ValidationIssues()
+        self._tokens, error = self._tokenize_within_limits(self._exp, self._limits)
+        if error is not None:
+            issues.add(issue=error, proceed=False)
+            return Invalid, issues
 
-            if (re.match(r"\w", char) or char in ":.") and bracket_open_index is None:
-                complex_attr_rep += char
-            elif char == "[":
+        bracket_open_index = None
+        for i, token in enumerate(self._tokens):
+            if token.kind == "[":
                 if bracket_open_index is not None:
                     issues.add(
                         issue=ValidationError.inner_complex_attribute_or_square_bracket(),
                         proceed=False,
                     )
                     break
-                else:
-                    bracket_open_index = i
-            elif char == "]":
+                bracket_open_index = i
+            elif token.kind == "]":
                 if bracket_open_index is None:
                     issues.add(
                         issue=ValidationError.complex_attribute_bracket_not_opened_or_closed(),
                         proceed=False,
                     )
                 else:
-                    sub_ops_exp = filter_exp_iter_copy[bracket_open_index + 1 : i]
-                    complex_attr_start = bracket_open_index - len(complex_attr_rep)
-                    complex_attr_exp = f"{complex_attr_rep}[{sub_ops_exp}]"
-                    if sub_ops_exp.strip() == "":
-                        issues_.add(
-                            issue=ValidationError.empty_complex_attribute_expression(
-                                complex_attr_rep
-                            ),
-                            proceed=False,
-                        )
-                    attr_rep = AttrRep.parse(complex_attr_rep)
-                    if attr_rep is Invalid:
-                        issues_.add(
-                            issue=ValidationError.bad_attribute_name(complex_attr_rep),
-                            proceed=False,
-                        )
-                    elif attr_rep.sub_attr:
-                        issues_.add(
-                            issue=ValidationError.complex_sub_attribute(
-                                attr=attr_rep.attr, sub_attr=attr_rep.sub_attr
-                            ),
-                            proceed=False,
-                        )
-                    if not issues_.can_proceed():
-                        parsed_complex_ops[complex_attr_start] = _ParsedComplexAttributeOperator(
-                            operator=None,
-                            issues=issues_,
-                            expression=complex_attr_exp,
-                        )
-                    else:
-                        parsed_complex_sub_ops, issues_ = Filter._parse_operator(
-                            op_exp=sub_ops_exp,
-                            string_values=string_values,
-                        )
-                        if not issues_.can_proceed():
-                            operator = None
-                        else:
-                            operator = op.ComplexAttributeOperator(
-                                attr_rep=attr_rep,
-                                sub_operator=parsed_complex_sub_ops,
-                            )
-                        parsed_complex_ops[complex_attr_start] = _ParsedComplexAttributeOperator(
-                            operator=operator,
-                            issues=issues_,
-                            expression=complex_attr_exp,
-                        )
-                    filter_exp = filter_exp.replace(
-                        complex_attr_exp, get_placeholder(complex_attr_start), 1
-                    )
-                bracket_open_index = None
-                complex_attr_rep = ""
-                issues_ = ValidationIssues()
-            elif bracket_open_index is None:
-                complex_attr_rep = ""
-                issues_ = ValidationIssues()
-
-        if not issues.can_proceed():
-            for parsed in parsed_complex_ops.values():
-                issues.merge(issues=parsed.issues)
-            return Invalid, issues
-
-        if bracket_open_index and bracket_open_index not in parsed_complex_ops:
-            issues.add(
-                issue=ValidationError.complex_attribute_bracket_not_opened_or_closed(),
-                proceed=False,
-            )
+                    self._complex_brackets[bracket_open_index] = i
+                    bracket_open_index = None
+        else:
+            if bracket_open_index is not None and issues.can_proceed():
+                issues.add(
+                    issue=ValidationError.complex_attribute_bracket_not_opened_or_closed(),
+                    proceed=False,
+                )
 
         if not issues.can_proceed():
-            for parsed in parsed_complex_ops.values():
-                issues.merge(issues=parsed.issues)
+            for brackets in self._complex_brackets.items():
+                _, issues_ = self._parse_complex(brackets)
+                issues.merge(issues=issues_)
             return Invalid, issues
 
-        parsed_op, issues_ = Filter._parse_operator(
-            op_exp=filter_exp,
-            string_values=string_values,
-            parsed_complex_ops=parsed_complex_ops,
-        )
-        issues.merge(issues=issues_)
-        if not issues.can_proceed():
-            return Invalid, issues
-        return cls(parsed_op), issues
+        return self._parse_level(0, len(self._tokens))
 
-    @staticmethod
-    def _parse_operator(
-        op_exp: str,
-        string_values: Dict[int, str],
-        parsed_complex_ops: Optional[Dict[int, _ParsedComplexAttributeOperator]] = None,
+    def _parse_level(
+        self, start: int, stop: int
     ) -> Tuple[Union[Invalid, _ParsedOperator], ValidationIssues]:
-        parsed_complex_ops = parsed_complex_ops or {}
         issues = ValidationIssues()
-        ignore_processing = False
-        bracket_open = False
-        bracket_open_index = None
-        bracket_cnt = 0
-        parsed_group_ops = {}
-        op_exp_preprocessed = op_exp
-        for i, char in enumerate(op_exp):
-            if char == '"':
-                ignore_processing = not ignore_processing
-            if ignore_processing:
-                continue
-
-            if char == "(":
-                if not bracket_open:
-                    bracket_open = True
-                    bracket_open_index = i
-                bracket_cnt += 1
-            elif char == ")":
-                if bracket_open:
-                    bracket_cnt -= 1
-                else:
+        levels: List[List[_Item]] = [[]]
+        group_open_indexes = []
+        i = start
+        while i < stop:
+            token = self._tokens[i]
+            if token.kind == "(":
+                levels.append([])
+                group_open_indexes.append(i)
+            elif token.kind == ")":
+                if len(levels) == 1:
                     issues.add(issue=ValidationError.bracket_not_opened_or_closed(), proceed=False)
-            if bracket_open and bracket_cnt == 0:
-                group_op_exp = op_exp[bracket_open_index : i + 1]
-                parsed_group_op, issues_ = Filter._parse_operator(
-                    op_exp=group_op_exp[1:-1],  # without enclosing brackets
-                    string_values=string_values,
-                    parsed_complex_ops=parsed_complex_ops,
-                )
-                parsed_group_ops[bracket_open_index] = _ParsedGroupOperator(
-                    operator=parsed_group_op,
-                    issues=issues_,
-                    expression=group_op_exp,
-                )
-                op_exp_preprocessed = op_exp_preprocessed.replace(
-                    group_op_exp, get_placeholder(bracket_open_index), 1
-                )
-                bracket_open = False
-                bracket_open_index = None
+                else:
+                    group_open = self._tokens[group_open_indexes.pop()]
+                    children = levels.pop()
+                    levels[-1].append(
+                        _Item("group", group_open.start, token.end, group_open.spaced, children)
+                    )
+            elif token.kind == "[":
+                i = self._append_complex(levels[-1], token, i)
+            elif (
+                token.kind == "word"
+                and i + 1 < stop
+                and self._tokens[i + 1].kind == "["
+                and not self._tokens[i + 1].spaced
+            ):
+                i = self._append_complex(levels[-1], token, i + 1)
+            else:
+                levels[-1].append(_Item(token.kind, token.start, token.end, token.spaced))
+            i += 1
 
-        if bracket_open and bracket_open_index not in parsed_group_ops:
+        if len(levels) > 1:
             issues.add(issue=ValidationError.bracket_not_opened_or_closed(), proceed=False)
 
-        op_exp_preprocessed = op_exp_preprocessed.strip()
-        if op_exp_preprocessed == "":
-            issues.add(issue=ValidationError.empty_filter_expression(), proceed=False)
+        if not issues.can_proceed():
+            return Invalid, issues
+        return self._parse_items(levels[0])
+
+    def _append_complex(self, items: List[_Item], first_token: _Token, bracket_open: int) -> int:
+        bracket_close = self._complex_brackets[bracket_open]
+        items.append(
+            _Item(
+                kind="complex",
+                start=first_token.start,
+                end=self._tokens[bracket_close].end,
+                spaced=first_token.spaced,
+                brackets=(bracket_open, bracket_close),
+            )
+        )
+        return bracket_close
 
+    def _parse_complex(
+        self, brackets: Tuple[int, int]
+    ) -> Tuple[Union[Invalid, op.ComplexAttributeOperator], ValidationIssues]:
+        issues = ValidationIssues()
+        bracket_open, bracket_close = brackets
+        attr_rep_exp = ""
+        if bracket_open > 0:
+            bracket_token, name_token = self._tokens[bracket_open], self._tokens[bracket_open - 1]
+            if name_token.kind == "word" and not bracket_token.spaced:
+                attr_rep_exp = self._exp[name_token.start : name_token.end]
+
+        if bracket_close == bracket_open + 1:
+            issues.add(
+                issue=ValidationError.empty_complex_attribute_expression(attr_rep_exp),
+                proceed=False,
+            )
+        attr_rep = AttrRep.parse(attr_rep_exp)
+        if attr_rep is Invalid:
+            issues.add(issue=ValidationError.bad_attribute_name(attr_rep_exp), proceed=False)
+        elif attr_rep.sub_attr:
+            issues.add(
+                issue=ValidationError.complex_sub_attribute(
+                    attr=attr_rep.attr, sub_attr=attr_rep.sub_attr
+                ),
+                proceed=False,
+            )
         if not issues.can_proceed():
             return Invalid, issues
 
-        parsed_op, issues_ = Filter._parsed_op_or_exp(
-            or_exp=op_exp_preprocessed,
-            string_values=string_values,
-            parsed_group_ops=parsed_group_ops,
-            parsed_complex_ops=parsed_complex_ops,
-        )
-        issues.merge(issues=issues_)
+        sub_operator, issues = self._parse_level(bracket_open + 1, bracket_close)
         if not issues.can_proceed():
             return Invalid, issues
-        return parsed_op, issues
+        return op.ComplexAttributeOperator(attr_rep=attr_rep, sub_operator=sub_operator), issues
 
-    @staticmethod
-    def _parsed_op_or_exp(
-        or_exp: str,
-        string_values: Dict[int, str],
-        parsed_group_ops: Dict[int, _ParsedGroupOperator],
-        parsed_complex_ops: Dict[int, _ParsedComplexAttributeOperator],
-    ) -> Tuple[Union[Invalid, None, _ParsedOperator], ValidationIssues]:
+    def _parse_items(
+        self, items: List[_Item]
+    ) -> Tuple[Union[Invalid, _ParsedOperator], ValidationIssues]:
         issues = ValidationIssues()
-        or_operands, issues_ = Filter._split_exp_to_logical_operands(
-            op_exp=or_exp,
-            regexp=OR_LOGICAL_OPERATOR_SPLIT_REGEX,
-            operator_name="or",
-            string_values=string_values,
-            parsed_group_ops=parsed_group_ops,
-            parsed_complex_ops=parsed_complex_ops,
-        )
-        issues.merge(issues=issues_)
-        if not or_operands:
-            return None, issues
+        if not items:
+            issues.add(issue=ValidationError.empty_filter_expression(), proceed=False)
+            return Invalid, issues
 
         parsed_or_operands = []
-        for or_operand in or_operands:
-            parsed_or_operand, issues_ = Filter._parse_op_and_exp(
-                and_exp=or_operand,
-                string_values=string_values,
-                parsed_group_ops=parsed_group_ops,
-                parsed_complex_ops=parsed_complex_ops,
-            )
+        for or_operand in self._split_to_logical_operands(items, "or", issues):
+            parsed_or_operand, issues_ = self._parse_and_operands(or_operand)
             issues.merge(issues=issues_)
-            if not issues.can_proceed():
-                parsed_or_operand = None
             parsed_or_operands.append(parsed_or_operand)
 
         if not issues.can_proceed():
             return Invalid, issues
-
         if len(parsed_or_operands) == 1:
             return parsed_or_operands[0], issues
         return op.Or(*parsed_or_operands), issues
 
-    @staticmethod
-    def _parse_op_and_exp(
-        and_exp: str,
-        string_values: Dict[int, str],
-        parsed_group_ops: Dict[int, _ParsedGroupOperator],
-        parsed_complex_ops: Dict[int, _ParsedComplexAttributeOperator],
-    ) -> Tuple[Union[Invalid, None, _ParsedOperator], ValidationIssues]:
+    def _parse_and_operands(
+        self, items: List[_Item]
+    ) -> Tuple[Union[Invalid, _ParsedOperator], ValidationIssues]:
         issues = ValidationIssues()
-        and_operands, issues_ = Filter._split_exp_to_logical_operands(
-            op_exp=and_exp,
-            regexp=AND_LOGICAL_OPERATOR_SPLIT_REGEX,
-            operator_name="and",
-            string_values=string_values,
-            parsed_group_ops=parsed_group_ops,
-            parsed_complex_ops=parsed_complex_ops,
-        )
-        issues.merge(issues=issues_)
-        if not and_operands:
-            return None, issues
-
         parsed_and_operands = []
-        for and_operand in and_operands:
-            match = NOT_LOGICAL_OPERATOR_REGEX.match(and_operand)
-            if match:
-                not_operand = match.group(1)
-                if not not_operand:
+        for and_operand in self._split_to_logical_operands(items, "and", issues):
+            if self._is_word(and_operand[0], "not"):
+                if len(and_operand) == 1:
                     issues.add(
                         issue=ValidationError.missing_operand_for_operator(
-                            operator="not",
-                            expression=Filter._encode_placeholders(
-                                exp=and_operand,
-                                string_values=string_values,
-                            ),
+                            operator="not", expression=self._text(and_operand)
                         ),
                         proceed=False,
                     )
-                    parsed_and_operand = None
+                    parsed_and_operand = Invalid
                 else:
-                    parsed_and_operand, issues_ = Filter._parse_op_attr_exp(
-                        attr_exp=not_operand,
-                        string_values=string_values,
-                        parsed_group_ops=parsed_group_ops,
-                        parsed_complex_ops=parsed_complex_ops,
-                    )
+                    parsed_and_operand, issues_ = self._parse_attr_exp(and_operand[1:])
                     issues.merge(issues=issues_)
-                    if not issues.can_proceed():
-                        parsed_and_operand = None
-                    else:
+                    if issues_.can_proceed():
                         parsed_and_operand = op.Not(parsed_and_operand)
             else:
-                parsed_and_operand, issues_ = Filter._parse_op_attr_exp(
-                    attr_exp=and_operand,
-                    string_values=string_values,
-                    parsed_group_ops=parsed_group_ops,
-                    parsed_complex_ops=parsed_complex_ops,
-                )
+                parsed_and_operand, issues_ = self._parse_attr_exp(and_operand)
                 issues.merge(issues=issues_)
-                if not issues.can_proceed():
-                    parsed_and_operand = None
             parsed_and_operands.append(parsed_and_operand)
 
         if not issues.can_proceed():
             return Invalid, issues
-
         if len(parsed_and_operands) == 1:
             return parsed_and_operands[0], issues
         return op.And(*parsed_and_operands), issues
 
-    @staticmethod
-    def _split_exp_to_logical_operands(
-        op_exp: str,
-        regexp: re.Pattern[str],
-        operator_name: str,
-        string_values: Dict[int, str],
-        parsed_group_ops: Dict[int, _ParsedGroupOperator],
-        parsed_complex_ops: Dict[int, _ParsedComplexAttributeOperator],
-    ) -> Tuple[List[str], ValidationIssues]:
-        issues = ValidationIssues()
-        operands = []
-        current_position = 0
-        matches = list(regexp.finditer(op_exp))
-        for i, match in enumerate(matches):
-            left_operand = op_exp[current_position : match.start()]
-            if i == len(matches) - 1:
-                right_operand = op_exp[match.end() :]
+    def _split_to_logical_operands(
+        self, items: List[_Item], operator_name: str, issues: ValidationIssues
+    ) -> List[List[_Item]]:
+        separators = [i for i, item in enumerate(items) if self._is_word(item, operator_name)]
+        if not separators:
+            return [items]
+
+        bounds = [-1, *separators, len(items)]
+        operands = [items[bounds[i] + 1 : bounds[i + 1]] for i in range(len(bounds) - 1)]
+        for i, separator in enumerate(separators):
+            left_operand, right_operand = operands[i], operands[i + 1]
+            if left_operand and right_operand:
+                continue
+            if left_operand:
+                expression = self._exp[left_operand[0].start : items[separator].end]
+            elif right_operand:
+                expression = self._exp[items[separator].start : right_operand[-1].end]
             else:
-                right_operand = op_exp[match.end() : matches[i + 1].start()]
-
-            invalid_expression = None
-            if left_operand == right_operand == "":
-                invalid_expression = match.group(0).strip()
-            elif left_operand == "":
-                parsed_op = Filter._get_parsed_group_or_complex_op(
-                    op_exp=right_operand,
-                    parsed_group_ops=parsed_group_ops,
-                    parsed_complex_ops=parsed_complex_ops,
-                )
-                if parsed_op is not None:
-                    right_expression = parsed_op.expression
-                else:
-                    right_expression = right_operand
-                invalid_expression = (match.group(0) + right_expression).strip()
-            elif right_operand == "":
-                parsed_op = Filter._get_parsed_group_or_complex_op(
-                    op_exp=left_operand,
-                    parsed_group_ops=parsed_group_ops,
-                    parsed_complex_ops=parsed_complex_ops,
-                )
-                if parsed_op is not None:
-                    left_expression = parsed_op.expression
-                else:
-                    left_expression = left_operand
-                invalid_expression = (left_expression + match.group(0)).strip()
-
-            if invalid_expression is not None:
-                issues.add(
-                    issue=ValidationError.missing_operand_for_operator(
-                        operator=operator_name,
-                        expression=Filter._encode_placeholders(
-                            exp=invalid_expression,
-                            string_values=string_values,
-                        ),
-                    ),
-                    proceed=False,
-                )
-
-            if i == 0:
-                operands.append(left_operand)
-            operands.append(right_operand)
-            current_position = match.end()
-
-        if not matches:
-            operands = [op_exp]
+                expression = operator_name
+            issues.add(
+                issue=ValidationError.missing_operand_for_operator(
+                    operator=operator_name, expression=expression
+                ),
+                proceed=False,
+            )
+        return [operand for operand in operands if operand]
 
-        operands = [operand for operand in operands if operand != ""]
-        return operands, issues
+    def _parse_attr_exp(
+        self, items: List[_Item]
+    ) -> Tuple[Union[Invalid, _ParsedOperator], ValidationIssues]:
+        if len(items) == 1:
+            if items[0].kind == "group":
+                return self._parse_items(items[0].children)
+            if items[0].kind == "complex":
+                return self._parse_complex(items[0].brackets)
 
-    @staticmethod
-    def _parse_op_attr_exp(
-        attr_exp: str,
-        string_values: Dict[int, str],
-        parsed_group_ops: Dict[int, _ParsedGroupOperator],
-        parsed_complex_ops: Dict[int, _ParsedComplexAttributeOperator],
-    ) -> Tuple[Union[Invalid, None, _ParsedOperator], ValidationIssues]:
         issues = ValidationIssues()
-        attr_exp = attr_exp.strip()
-        sub_or_complex = Filter._get_parsed_group_or_complex_op(
-            op_exp=attr_exp,
-            parsed_group_ops=parsed_group_ops,
-            parsed_complex_ops=parsed_complex_ops,
-        )
-        if sub_or_complex is not None:
-            return sub_or_complex.operator, sub_or_complex.issues
+        components = []
+        for item in items:
+            if components and not item.spaced:
+                components[-1] = (components[-1][0], item.end)
+            else:
+                components.append((item.start, item.end))
+        components = [self._exp[start:end] for start, end in components]
+        attr_exp = self._text(items)
 
-        components = OP_REGEX.split(attr_exp)
         if len(components) == 2:
             op_exp = components[1].lower()
             op_ = _UNARY_ATTR_OPERATORS.get(op_exp)
@@ -475,13 +429,7 @@ class Filter:
                 if op_exp in _BINARY_ATTR_OPERATORS:
                     issues.add(
                         issue=ValidationError.missing_operand_for_operator(
-                            operator=op_exp,
-                            expression=Filter._encode_placeholders(
-                                exp=attr_exp,
-                                string_values=string_values,
-                                parsed_group_ops=parsed_group_ops,
-                                parsed_complex_ops=parsed_complex_ops,
-                            ),
+                            operator=op_exp, expression=attr_exp
                         ),
                         proceed=False,
                     )
@@ -489,99 +437,52 @@ class Filter:
                     issues.add(
                         issue=ValidationError.unknown_operator(
                             operator_type="unary",
-                            operator=Filter._encode_placeholders(
-                                exp=components[1],
-                                string_values=string_values,
-                                parsed_group_ops=parsed_group_ops,
-                                parsed_complex_ops=parsed_complex_ops,
-                            ),
-                            expression=Filter._encode_placeholders(
-                                exp=attr_exp,
-                                string_values=string_values,
-                                parsed_group_ops=parsed_group_ops,
-                                parsed_complex_ops=parsed_complex_ops,
-                            ),
+                            operator=components[1],
+                            expression=attr_exp,
                         ),
                         proceed=False,
                     )
             attr_rep = AttrRep.parse(components[0])
             if attr_rep is Invalid:
-                issues.add(
-                    issue=ValidationError.bad_attribute_name(
-                        Filter._encode_placeholders(
-                            exp=components[0],
-                            string_values=string_values,
-                            parsed_group_ops=parsed_group_ops,
-                            parsed_complex_ops=parsed_complex_ops,
-                        )
-                    ),
-                    proceed=False,
-                )
+                issues.add(issue=ValidationError.bad_attribute_name(components[0]), proceed=False)
             if not issues.can_proceed():
                 return Invalid, issues
+            return self._attr_operator(op_, attr_rep), issues
 
-            if attr_rep.sub_attr:
-                operator = op.ComplexAttributeOperator(
-                    attr_rep=AttrRep(schema=attr_rep.schema, attr=attr_rep.attr),
-                    sub_operator=op_(AttrRep(attr=attr_rep.sub_attr)),
-                )
-            else:
-                operator = op_(attr_rep)
-            return operator, issues
-
-        elif len(components) == 3:
+        if len(components) == 3:
             op_ = _BINARY_ATTR_OPERATORS.get(components[1].lower())
             if op_ is None:
                 issues.add(
                     issue=ValidationError.unknown_operator(
                         operator_type="binary",
-                        operator=Filter._encode_placeholders(
-                            exp=components[1],
-                            string_values=string_values,
-                            parsed_group_ops=parsed_group_ops,
-                            parsed_complex_ops=parsed_complex_ops,
-                        ),
-                        expression=Filter._encode_placeholders(
-                            exp=attr_exp,
-                            string_values=string_values,
-                            parsed_group_ops=parsed_group_ops,
-                            parsed_complex_ops=parsed_complex_ops,
-                        ),
+                        operator=components[1],
+                        expression=attr_exp,
                     ),
                     proceed=False,
                 )
             attr_rep = AttrRep.parse(components[0])
             if attr_rep is Invalid:
-                issues.add(
-                    issue=ValidationError.bad_attribute_name(
-                        Filter._encode_placeholders(
-                            exp=components[0],
-                            string_values=string_values,
-                            parsed_group_ops=parsed_group_ops,
-                            parsed_complex_ops=parsed_complex_ops,
-                        )
-                    ),
-                    proceed=False,
-                )
+                issues.add(issue=ValidationError.bad_attribute_name(components[0]), proceed=False)
 
-            value = Filter._encode_placeholders(
-                exp=components[2],
-                string_values=string_values,
-            )
+            if self._parameters is not None and components[2] == _PARAMETER:
+                if not issues.can_proceed():
+                    return Invalid, issues
+                parameter = self._attr_operator(functools.partial(_Parameter, op_), attr_rep)
+                self._parameters.append(
+                    parameter.sub_operator
+                    if isinstance(parameter, op.ComplexAttributeOperator)
+                    else parameter
+                )
+                return parameter, issues
 
             try:
-                value = parse_comparison_value(value)
+                if items[-1].kind == "word" and self._exp[items[-1].start] in "\"'":
+                    raise ValueError("unterminated string literal")
+                value = parse_comparison_value(components[2])
             except ValueError:
                 value = None
                 issues.add(
-                    issue=ValidationError.bad_comparison_value(
-                        Filter._encode_placeholders(
-                            exp=components[2],
-                            string_values=string_values,
-                            parsed_group_ops=parsed_group_ops,
-                            parsed_complex_ops=parsed_complex_ops,
-                        )
-                    ),
+                    issue=ValidationError.bad_comparison_value(components[2]),
                     proceed=False,
                 )
 
@@ -593,81 +494,584 @@ class Filter:
                     issue=ValidationError.non_compatible_comparison_value(value, op_.SCIM_OP),
                     proceed=False,
                 )
-
-            if not issues.can_proceed():
                 return Invalid, issues
+            return self._attr_operator(op_, attr_rep, value), issues
 
-            if attr_rep.sub_attr:
-                operator = op.ComplexAttributeOperator(
-                    attr_rep=AttrRep(schema=attr_rep.schema, attr=attr_rep.attr),
-                    sub_operator=op_(AttrRep(attr=attr_rep.sub_attr), value),
-                )
-            else:
-                operator = op_(attr_rep, value)
-            return operator, issues
-
-        issues.add(
-            issue=ValidationError.unknown_expression(
-                Filter._encode_placeholders(
-                    exp=attr_exp,
-                    string_values=string_values,
-                    parsed_group_ops=parsed_group_ops,
-                    parsed_complex_ops=parsed_complex_ops,
-                )
-            ),
-            proceed=False,
-        )
+        issues.add(issue=ValidationError.unknown_expression(attr_exp), proceed=False)
         return Invalid, issues
 
     @staticmethod
-    def _get_parsed_group_or_complex_op(
-        op_exp: str,
-        parsed_group_ops: Dict[int, _ParsedGroupOperator],
-        parsed_complex_ops: Dict[int, _ParsedComplexAttributeOperator],
-    ) -> Optional[Union[_ParsedGroupOperator, _ParsedComplexAttributeOperator]]:
-        position = parse_placeholder(op_exp)
-        if position is None:
+    def _attr_operator(op_, attr_rep: AttrRep, *args) -> _ParsedOperator:
+        if attr_rep.sub_attr:
+            return op.ComplexAttributeOperator(
+                attr_rep=AttrRep(schema=attr_rep.schema, attr=attr_rep.attr),
+                sub_operator=op_(AttrRep(attr=attr_rep.sub_attr), *args),
+            )
+        return op_(attr_rep, *args)
+
+    def _is_word(self, item: _Item, word: str) -> bool:
+        return (
+            item.kind == "word"
+            and item.end - item.start == len(word)
+            and self._exp.startswith(word, item.start)
+        )
+
+    def _text(self, items: List[_Item]) -> str:
+        return self._exp[items[0].start : items[-1].end]
+
+
+@functools.lru_cache(maxsize=1024)
+def _attr_rep_from_dict(attr_rep_exp: str) -> AttrRep:
+    # attribute representations are not modified, so operators can share them; there is no
+    # dot in `Filter.to_dict` output, as sub-attributes are put in complex operators
+    schema, _, attr = attr_rep_exp.rpartition(":")
+    return AttrRep(schema=schema, attr=attr)
+
+
+def _check_length(exp: str, limits: FilterLimits) -> Optional[ValidationError]:
+    if limits.max_length is not None and len(exp) > limits.max_length:
+        return ValidationError.filter_limit_exceeded("length", limits.max_length)
+    return None
+
+
+class PreparedFilter:
+    def __init__(self, exp: str, operator: _ParsedOperator, parameters: Sequence[_Parameter]):
+        self._exp = exp
+        self._operator = operator
+        self._parameters = list(parameters)
+        indexes = {id(parameter): i for i, parameter in enumerate(self._parameters)}
+        self._build = self._builder(operator, indexes) or (lambda _: operator)
+
+    @property
+    def exp(self) -> str:
+        return self._exp
+
+    @property
+    def n_parameters(self) -> int:
+        return len(self._parameters)
+
+    def bind(
+        self, *values: _AllowedOperandValues
+    ) -> Tuple[Union[Invalid, "Filter"], ValidationIssues]:
+        if len(values) != len(self._parameters):
+            raise ValueError(
+                f"{self._exp!r} requires {len(self._parameters)} parameter(s), "
+                f"but provided {len(values)}"
+            )
+
+        issues = ValidationIssues()
+        for value, parameter in zip(values, self._parameters):
+            allowed_types = _ALLOWED_VALUE_TYPES_FOR_BINARY_OPERATORS[parameter.operator_cls]
+            if type(value) not in allowed_types:
+                issues.add(
+                    issue=ValidationError.non_compatible_comparison_value(
+                        value, parameter.operator_cls.SCIM_OP
+                    ),
+                    proceed=False,
+                )
+        if not issues.can_proceed():
+            return Invalid, issues
+        return Filter(self._build(values)), issues
+
+    @staticmethod
+    def _builder(
+        operator: Union[_Parameter, _ParsedOperator], indexes: Dict[int, int]
+    ) -> Optional[Callable[[Sequence[Any]], _ParsedOperator]]:
+        """
+        Returns function that creates operator with bound parameters, or None
+        if the operator has no parameters, so it can be shared between bound filters.
+        """
+        if isinstance(operator, _Parameter):
+            index = indexes[id(operator)]
+            return lambda values: operator.operator_cls(operator.attr_rep, values[index])
+
+        if isinstance(operator, op.MultiOperandLogicalOperator):
+            builders = [
+                PreparedFilter._builder(sub_operator, indexes)
+                for sub_operator in operator.sub_operators
+            ]
+            if not any(builders):
+                return None
+            builders = [
+                builder or (lambda _, sub_operator=sub_operator: sub_operator)
+                for builder, sub_operator in zip(builders, operator.sub_operators)
+            ]
+            operator_cls = type(operator)
+            return lambda values: operator_cls(*(builder(values) for builder in builders))
+
+        if isinstance(operator, op.Not):
+            builder = PreparedFilter._builder(operator.sub_operator, indexes)
+            if builder is None:
+                return None
+            return lambda values: op.Not(builder(values))
+
+        if isinstance(operator, op.ComplexAttributeOperator):
+            builder = PreparedFilter._builder(operator.sub_operator, indexes)
+            if builder is None:
+                return None
+            return lambda values: op.ComplexAttributeOperator(
+                attr_rep=operator.attr_rep, sub_operator=builder(values)
+            )
+        return None
+
+
+class _Template(NamedTuple):
+    prepared: PreparedFilter
+    literals: List[Optional[str]]  # None for parameters, literal text otherwise
+
+
+class FilterTemplates:
+    """
+    Registry of prepared filters, used to recognize filter expressions that differ from
+    a template only in comparison values. Recognized expressions are bound to the template,
+    without parsing them.
+    """
+
+    def __init__(self):
+        self._templates: Dict[str, List[_Template]] = defaultdict(list)
+        self._usage: Dict[str, int] = defaultdict(int)
+        self._misses = 0
+
+    @property
+    def usage(self) -> Dict[str, int]:
+        return dict(self._usage)
+
+    @property
+    def misses(self) -> int:
+        return self._misses
+
+    def __len__(self) -> int:
+        return sum(len(templates) for templates in self._templates.values())
+
+    def add(self, prepared: PreparedFilter) -> None:
+        shape, literals = self._normalize(prepared.exp)
+        self._templates[shape].append(
+            _Template(
+                prepared=prepared,
+                literals=[None if literal == _PARAMETER else literal for literal in literals],
+            )
+        )
+
+    def clear(self) -> None:
+        self._templates.clear()
+        self._usage.clear()
+        self._misses = 0
+
+    def recognize(
+        self, filter_exp: str, limits: Optional[FilterLimits] = None
+    ) -> Optional[Tuple[Union[Invalid, "Filter"], ValidationIssues]]:
+        """
+        Returns the filter expression bound to the matching template, or 'None' if there
+        is no such template, or the expression exceeds the `limits` (it is not recognized
+        then, so parsing it reports the limit).
+        """
+        if not self._templates:
+            return None
+
+        normalized = self._normalize(filter_exp, limits)
+        if normalized is None:
             return None
-        if position in parsed_group_ops:
-            return parsed_group_ops[position]
-        elif position in parsed_complex_ops:
-            return parsed_complex_ops[position]
+        shape, literals = normalized
+        for template in self._templates.get(shape, []):
+            values = self._get_parameter_values(template, literals)
+            if values is not None:
+                self._usage[template.prepared.exp] += 1
+                return template.prepared.bind(*values)
+        self._misses += 1
         return None
 
     @staticmethod
-    def _encode_placeholders(
-        exp: str,
-        string_values: Optional[Dict[int, str]] = None,
-        parsed_group_ops: Optional[Dict[int, _ParsedGroupOperator]] = None,
-        parsed_complex_ops: Optional[Dict[int, _ParsedComplexAttributeOperator]] = None,
-    ):
-        encoded = exp
-        for match in PLACEHOLDER_REGEX.finditer(exp):
-            index = int(match.group(1))
-            if index in (string_values or {}):
-                encoded = encoded.replace(match.group(0), string_values[index])
-            elif index in (parsed_group_ops or {}):
-                encoded = encoded.replace(match.group(0), parsed_group_ops[index].expression)
-            elif index in (parsed_complex_ops or {}):
-                encoded = encoded.replace(match.group(0), parsed_complex_ops[index].expression)
-
-        return encoded
+    def _get_parameter_values(
+        template: _Template, literals: List[str]
+    ) -> Optional[List[_AllowedOperandValues]]:
+        values = []
+        for expected, literal in zip(template.literals, literals):
+            if expected is not None:
+                if expected != literal:
+                    return None
+                continue
+            if literal == _PARAMETER:
+                return None
+            try:
+                values.append(parse_comparison_value(literal))
+            except ValueError:
+                return None
+        return values
+
+    @staticmethod
+    def _normalize(
+        filter_exp: str, limits: Optional[FilterLimits] = None
+    ) -> Optional[Tuple[str, List[str]]]:
+        tokens, error = _FilterParser._tokenize_within_limits(filter_exp, limits or _NO_LIMITS)
+        if error is not None:
+            return None
+        shape, literals = [], []
+        for token in tokens:
+            text = filter_exp[token.start : token.end]
+            if token.kind == "string" or token.kind == "word" and _LITERAL_REGEX.fullmatch(text):
+                literals.append(text)
+                text = _PARAMETER
+            if shape and token.spaced:
+                shape.append(" ")
+            shape.append(text)
+        return "".join(shape), literals
+
+
+class SlowFilterHook(NamedTuple):
+    """
+    Callback called with filter and its profile (see `CompiledFilter.profile`) when
+    matching many resources with the filter takes more than `threshold` seconds.
+    """
+
+    threshold: float
+    callback: Callable[["Filter", op.OperatorProfile], Any]
+
+
+class Filter:
+    parse_cache = ParseCache()
+    templates = FilterTemplates()
+    limits = FilterLimits()
+    slow_filter_hook: Optional[SlowFilterHook] = None
+
+    def __init__(self, operator: _ParsedOperator, schema: Optional["BaseSchema"] = None):
+        self._operator = operator
+        self._schema = schema
+        self._canonical_exp: Optional[str] = None
+        # operators bound to attributes of schemas the filter matched data for, by their id,
+        # or 'None' if the operator can not be bound to them
+        self._bound_operators: Dict[int, Tuple[Attributes, Optional[_ParsedOperator]]] = {}
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_bound_operators"] = {}
+        return state
+
+    @property
+    def operator(self) -> _ParsedOperator:
+        return self._operator
+
+    @property
+    def schema(self) -> Optional["BaseSchema"]:
+        return self._schema
+
+    @property
+    def canonical_exp(self) -> str:
+        """
+        Expression of the simplified filter, the same for filters that differ only in
+        grouping, order and repetitions of 'and' / 'or' operands, or in letter case
+        of attribute names.
+        """
+        if self._canonical_exp is None:
+            _, self._canonical_exp = algebra.simplify(self._operator)
+        return self._canonical_exp
+
+    def referenced_attrs(self) -> List[AttrRep]:
+        """
+        Returns attributes and sub-attributes the filter reads, e.g. to load only them
+        from storage, or to tell if modification of a resource can change its match.
+        Attributes of bound filters are returned like in the schema, with schema URIs.
+        """
+        return algebra.get_referenced_attr_reps(self._operator)
+
+    def implies(self, other: "Filter", schema: Optional["BaseSchema"] = None) -> bool:
+        """
+        Tells whether resources matched by the filter are matched by the `other` filter too
+        (when matching with `strict` flag set), so the filter can be applied to results
+        of the `other` one, e.g. cached, instead of all resources. Filters are bound
+        to the `schema`, or their own one. Only 'and' / 'or' combinations of comparisons
+        of the same attributes are checked, so 'False' means the implication is not known.
+        """
+        schema = schema or self._schema or other.schema
+        if schema is None:
+            raise ValueError("schema is required to check implication of unbound filters")
+        filter_, issues = self.bind(schema)
+        if not issues.can_proceed():
+            return False
+        other, issues = other.bind(schema)
+        if not issues.can_proceed():
+            return False
+        return algebra.implies(filter_.operator, other.operator)
+
+    def is_subsumed_by(self, other: "Filter", schema: Optional["BaseSchema"] = None) -> bool:
+        """
+        Tells whether results of the filter are subset of results of the `other` filter,
+        the same as `implies`.
+        """
+        return self.implies(other, schema)
+
+    def simplify(self) -> "Filter":
+        """
+        Returns equivalent filter with nested 'and' / 'or' operators flattened, duplicated
+        operands removed, operands ordered and double negations folded where it does not
+        change the match. Bound filters also have comparisons of the same single-valued
+        complex attribute merged, e.g. 'name.givenName eq "a" and name.familyName eq "b"'.
+        """
+        operator, canonical_exp = algebra.simplify(
+            self._operator, use_schema=self._schema is not None
+        )
+        if self._schema is None:
+            filter_ = Filter(operator)
+            filter_._canonical_exp = canonical_exp
+            return filter_
+        operator, _ = operator.bind(self._schema.attrs)
+        return Filter(operator, self._schema)
+
+    @classmethod
+    def parse(
+        cls, filter_exp: str, limits: Optional[FilterLimits] = None
+    ) -> Tuple[Union[Invalid, "Filter"], ValidationIssues]:
+        """
+        Parses the filter expression, rejecting it if it exceeds the `limits`, or
+        `Filter.limits` if not provided.
+        """
+        if limits is None:
+            limits = cls.limits
+        key = filter_exp, limits
+        cached = cls.parse_cache.get(key)
+        if cached is not None:
+            return cached
+
+        # templates may be prepared with other limits, so recognized expressions are checked
+        # against these ones
+        recognized = cls.templates.recognize(filter_exp, limits)
+        if recognized is not None:
+            return cls.parse_cache.set(key, *recognized)
+
+        parsed, issues = _FilterParser(filter_exp, limits=limits).parse()
+        if not issues.can_proceed():
+            return cls.parse_cache.set(key, Invalid, issues)
+        return cls.parse_cache.set(key, cls(parsed), issues)
+
+    @classmethod
+    def prepare(
+        cls, filter_exp: str, limits: Optional[FilterLimits] = None
+    ) -> Tuple[Union[Invalid, "PreparedFilter"], ValidationIssues]:
+        parameters = []
+        parsed, issues = _FilterParser(
+            filter_exp, parameters=parameters, limits=cls.limits if limits is None else limits
+        ).parse()
+        if not issues.can_proceed():
+            return Invalid, issues
+        return PreparedFilter(filter_exp, parsed, parameters), issues
+
+    def bind(self, schema: "BaseSchema") -> Tuple[Union[Invalid, "Filter"], ValidationIssues]:
+        """
+        Returns filter with attributes resolved against the `schema`, so matching resources
+        does not look them up again. Comparisons that can never succeed for attribute types
+        are reported.
+        """
+        operator, issues = self._operator.bind(schema.attrs)
+        if not issues.can_proceed():
+            return Invalid, issues
+        return Filter(operator, schema), issues
+
+    def compile(
+        self,
+        schema: "BaseSchema",
+        strict: bool = True,
+        adaptive: bool = False,
+        explain: bool = False,
+    ) -> Tuple[Union[Invalid, "CompiledFilter"], ValidationIssues]:
+        """
+        Returns filter bound to the `schema` and compiled for matching many resources.
+        If `adaptive` is set, operands of 'and' / 'or' operators are reordered while
+        matching, using their cost and how often they decide the match, so the cheapest
+        and most decisive operands are evaluated first. The order does not change matches.
+        If `explain` is set, operators are profiled while matching (see `profile`).
+        """
+        bound, issues = self.bind(schema)
+        if not issues.can_proceed():
+            return Invalid, issues
+        return CompiledFilter(bound, strict, adaptive, explain), issues
 
     def __call__(
-        self, data: SCIMDataContainer, schema: "BaseSchema", strict: bool = True
-    ) -> op.MatchResult:
-        if not isinstance(self._operator, op.LogicalOperator):
-            data = data[self._operator.attr_rep]
-        return self._operator.match(data, schema.attrs, strict)
+        self,
+        data: SCIMDataContainer,
+        schema: Optional["BaseSchema"] = None,
+        strict: bool = True,
+        explain: bool = False,
+    ) -> Union[op.MatchResult, Tuple[op.MatchResult, Optional[op.OperatorProfile]]]:
+        """
+        Matches the `data`. If `explain` is set, the data is matched with the filter compiled
+        for the `schema`, and profile of the filter operators is returned along with
+        the result, or 'None' if the filter can not be bound to the `schema`.
+        """
+        if schema is None:
+            schema = self._schema
+            if schema is None:
+                raise ValueError("schema is required to match unbound filter")
+        if explain:
+            compiled, _ = self.compile(schema, strict, explain=True)
+            if compiled is Invalid:
+                return self(data, schema, strict), None
+            return compiled(data), compiled.profile
+        operator = self._get_bound_operator(schema)
+        if operator is None:
+            # the filter can not be bound, so comparisons that can not succeed just fail
+            operator = self._operator
+        if not isinstance(operator, op.LogicalOperator):
+            data = get_value(data, operator.attr_rep)
+        return operator.match(data, schema.attrs, strict)
+
+    def _get_bound_operator(self, schema: "BaseSchema") -> Optional[_ParsedOperator]:
+        # unbound operators prepare comparisons on every match, and can be shared (e.g.
+        # through the parse cache), so the filter keeps copies of them bound to schemas
+        if schema is self._schema:
+            return self._operator
+        attrs = schema.attrs
+        bound_operator = self._bound_operators.get(id(attrs))
+        if bound_operator is None or bound_operator[0] is not attrs:
+            operator, issues = self._operator.bind(attrs)
+            if len(self._bound_operators) >= _MAX_BOUND_OPERATORS:
+                self._bound_operators.clear()
+            bound_operator = (attrs, operator if issues.can_proceed() else None)
+            self._bound_operators[id(attrs)] = bound_operator
+        return bound_operator[1]
+
+    def match_many(
+        self,
+        resources: Sequence[SCIMDataContainer],
+        schema: Optional["BaseSchema"] = None,
+        strict: bool = True,
+        explain: bool = False,
+    ) -> Union[List[bool], Tuple[List[bool], Optional[op.OperatorProfile]]]:
+        """
+        Matches all `resources` at once, with values of each attribute referenced
+        in the filter pulled into a column and every comparison evaluated over the column
+        in one loop. Returns list that tells, for every resource, whether it matches.
+        Resources with 'MISSING_DATA' status do not match.
+
+        If `explain` is set, or `Filter.slow_filter_hook` is set, resources are matched
+        one by one with compiled filter, that profiles its operators. With `explain` set,
+        the profile of the filter is returned along with the matches.
+        """
+        if schema is None:
+            schema = self._schema
+            if schema is None:
+                raise ValueError("schema is required to match unbound filter")
+        if explain or self.slow_filter_hook is not None:
+            compiled, _ = self.compile(schema, strict, explain=True)
+            if compiled is Invalid:
+                matches = [
+                    self(resource, schema, strict).status == op.MatchStatus.PASSED
+                    for resource in resources
+                ]
+                return (matches, None) if explain else matches
+            matches = [
+                compiled.match_status(resource) == op.MatchStatus.PASSED for resource in resources
+            ]
+            self._report_if_slow(compiled.profile)
+            return (matches, compiled.profile) if explain else matches
+
+        filter_ = self
+        if schema is not self._schema:
+            filter_, issues = self.bind(schema)
+            if not issues.can_proceed():
+                return [
+                    self(resource, schema, strict).status == op.MatchStatus.PASSED
+                    for resource in resources
+                ]
+
+        columns = op.Columns(resources)
+        passed = filter_.operator.match_columns(columns, columns.all_rows, strict).passed
+        bits = bin(passed)[:1:-1].ljust(len(resources), "0")
+        return [bit == "1" for bit in bits[: len(resources)]]
+
+    def select(
+        self,
+        resources: Iterable[SCIMDataContainer],
+        schema: Optional["BaseSchema"] = None,
+        strict: bool = True,
+        max_results: Optional[int] = None,
+    ) -> Tuple[Union[Invalid, List[SCIMDataContainer]], ValidationIssues]:
+        """
+        Returns `resources` the filter matches, in their order. Matching stops once more
+        than `max_results` resources are matched, and then too many results are reported
+        instead, so resources can be iterated lazily, e.g. from storage. Operators are
+        profiled if `Filter.slow_filter_hook` is set.
+        """
+        if schema is None:
+            schema = self._schema
+            if schema is None:
+                raise ValueError("schema is required to match unbound filter")
+        compiled, _ = self.compile(schema, strict, explain=self.slow_filter_hook is not None)
+        selected = self._select(compiled, resources, schema, strict, max_results)
+        if compiled is not Invalid and compiled.profile is not None:
+            self._report_if_slow(compiled.profile)
+        return selected
+
+    def _select(
+        self,
+        compiled: Union[Invalid, "CompiledFilter"],
+        resources: Iterable[SCIMDataContainer],
+        schema: "BaseSchema",
+        strict: bool,
+        max_results: Optional[int],
+    ) -> Tuple[Union[Invalid, List[SCIMDataContainer]], ValidationIssues]:
+        issues = ValidationIssues()
+        matched = []
+        for resource in resources:
+            if compiled is Invalid:
+                status = self(resource, schema, strict).status
+            else:
+                status = compiled.match_status(resource)
+            if status != op.MatchStatus.PASSED:
+                continue
+            if max_results is not None and len(matched) == max_results:
+                issues.add(
+                    issue=ValidationError.too_many_matched_resources(max_results),
+                    proceed=False,
+                )
+                return Invalid, issues
+            matched.append(resource)
+        return matched, issues
+
+    def _report_if_slow(self, profile: op.OperatorProfile) -> None:
+        hook = self.slow_filter_hook
+        if hook is not None and profile.time > hook.threshold:
+            hook.callback(self, profile)
+
+    def estimate_selectivity(self, schema: Optional["BaseSchema"] = None) -> float:
+        """
+        Estimates the fraction of resources of the `schema`, or the filter's own one,
+        that the filter matches, without looking at them, e.g. to reject filters that
+        are too broad before evaluating them.
+        """
+        schema = schema or self._schema
+        if schema is None:
+            raise ValueError("schema is required to estimate selectivity of unbound filter")
+        filter_, issues = self.bind(schema)
+        if not issues.can_proceed():
+            return 0.0
+        return algebra.estimate_selectivity(filter_.operator)
 
     def __eq__(self, other) -> bool:
         if not isinstance(other, Filter):
             return False
-        return SCIMDataContainer(self.to_dict()) == SCIMDataContainer(other.to_dict())
+        return self.canonical_exp == other.canonical_exp
+
+    def __hash__(self) -> int:
+        return hash(self.canonical_exp)
 
     def to_dict(self):
         return self._to_dict(self._operator)
 
+    @classmethod
+    def from_dict(cls, filter_dict: Dict[str, Any]) -> "Filter":
+        """
+        Returns (unbound) filter from the output of `to_dict`, with its operators built
+        directly, without parsing the expression again, e.g. to pass the filter to worker
+        processes or to store it in a cache.
+        """
+        return cls(cls._from_dict(filter_dict))
+
+    def to_bytes(self) -> bytes:
+        return json.dumps(self.to_dict(), separators=(",", ":")).encode()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "Filter":
+        return cls.from_dict(json.loads(data))
+
     @staticmethod
     def _to_dict(operator):
         if isinstance(operator, op.AttributeOperator):
@@ -700,3 +1104,81 @@ class Filter:
                 ],
             }
         raise TypeError(f"unsupported filter type '{type(operator).__name__}'")
+
+    @staticmethod
+    def _from_dict(filter_dict: Dict[str, Any]) -> _ParsedOperator:
+        op_ = filter_dict["op"]
+        if op_ in _BINARY_ATTR_OPERATORS:
+            return _BINARY_ATTR_OPERATORS[op_](
+                _attr_rep_from_dict(filter_dict["attr_rep"]), filter_dict["value"]
+            )
+
+        if op_ in _MULTI_OPERAND_LOGICAL_OPERATORS:
+            return _MULTI_OPERAND_LOGICAL_OPERATORS[op_](
+                *[Filter._from_dict(sub_dict) for sub_dict in filter_dict["sub_ops"]]
+            )
+
+        if op_ == "complex":
+            return op.ComplexAttributeOperator(
+                attr_rep=_attr_rep_from_dict(filter_dict["attr_rep"]),
+                sub_operator=Filter._from_dict(filter_dict["sub_op"]),
+            )
+
+        if op_ == op.Not.SCIM_OP:
+            return op.Not(Filter._from_dict(filter_dict["sub_op"]))
+
+        if op_ in _UNARY_ATTR_OPERATORS:
+            return _UNARY_ATTR_OPERATORS[op_](_attr_rep_from_dict(filter_dict["attr_rep"]))
+        raise ValueError(f"unsupported filter operator {op_!r}")
+
+
+class CompiledFilter:
+    """
+    Bound filter compiled to a single function, for matching many resources. Matches
+    the same resources as the filter called with the same schema and `strict` flag.
+    """
+
+    def __init__(
+        self, filter_: Filter, strict: bool = True, adaptive: bool = False, explain: bool = False
+    ):
+        self._filter = filter_
+        self._strict = strict
+        self._adaptive = adaptive
+        self._profiler = op.Profiler(filter_.operator) if explain else None
+        match = filter_.operator.compile(strict, adaptive, self._profiler)
+        if not isinstance(filter_.operator, op.LogicalOperator):
+            match = self._with_getter(match, filter_.operator.attr_rep)
+        self._match = match
+
+    @property
+    def filter(self) -> Filter:
+        return self._filter
+
+    @property
+    def strict(self) -> bool:
+        return self._strict
+
+    @property
+    def adaptive(self) -> bool:
+        return self._adaptive
+
+    @property
+    def profile(self) -> Optional[op.OperatorProfile]:
+        """
+        Profile of the filter operators, accumulated over all matches, if compiled with
+        `explain` set.
+        """
+        if self._profiler is None:
+            return None
+        return self._profiler.root
+
+    @staticmethod
+    def _with_getter(match: op.CompiledMatch, attr_rep: AttrRep) -> op.CompiledMatch:
+        get = SCIMDataContainer.getter(attr_rep)
+        return lambda data: match(get(data))
+
+    def match_status(self, data: SCIMDataContainer) -> op.MatchStatus:
+        return self._match(data)
+
+    def __call__(self, data: SCIMDataContainer) -> op.MatchResult:
+        return op.MatchResult.of(self._match(data))
@@ -0,0 +1,277 @@
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+from src.data import operator as op
+from src.data import type as at
+from src.data.attributes import Attribute, ComplexAttribute
+from src.data.container import AttrRep, Invalid
+from src.data.schemas import ResourceSchema
+from src.error import ValidationIssues
+from src.filter import Filter
+
+_TRUE = "(objectClass=*)"
+_FALSE = "(!(objectClass=*))"
+
+_SUBSTRING_PATTERNS = {
+    op.Contains: "*{}*",
+    op.StartsWith: "{}*",
+    op.EndsWith: "*{}",
+}
+
+_ESCAPED = {"\\": "\\5c", "*": "\\2a", "(": "\\28", ")": "\\29", "\0": "\\00"}
+
+
+class LDAPMapping:
+    """
+    Maps attributes of resources to LDAP attributes, with attribute names like in filters
+    (e.g. 'userName', 'name.givenName' or extension attributes with schema URI). Values of
+    multi-valued complex attributes are mapped by 'value' sub-attribute (e.g. 'emails.value'),
+    and multi-valued attributes can be mapped to many LDAP attributes that hold their values
+    together (e.g. 'phoneNumbers.value' to 'telephoneNumber' and 'mobile').
+    """
+
+    def __init__(self, attributes: Dict[str, Union[str, Sequence[str]]]):
+        self._attributes = []
+        for attr, ldap_attrs in attributes.items():
+            attr_rep = AttrRep.parse(attr)
+            if attr_rep is Invalid:
+                raise ValueError(f"bad attribute name {attr!r}")
+            if isinstance(ldap_attrs, str):
+                ldap_attrs = [ldap_attrs]
+            self._attributes.append((attr_rep, list(ldap_attrs)))
+
+    def get_ldap_attrs(self, attr_rep: AttrRep) -> List[str]:
+        for mapped_attr_rep, ldap_attrs in self._attributes:
+            if mapped_attr_rep == attr_rep:
+                return ldap_attrs
+        return []
+
+
+class LDAPQuery:
+    """
+    Filter translated to RFC 4515 filter string. Parts of the filter that can not be
+    translated are in `residual` filter, that entries found with `filter` must be matched
+    with (with `strict` flag set), or `residual` is 'None' if the whole filter is translated.
+    """
+
+    def __init__(self, filter_: str, residual: Optional[Filter] = None):
+        self._filter = filter_
+        self._residual = residual
+
+    @property
+    def filter(self) -> str:
+        return self._filter
+
+    @property
+    def residual(self) -> Optional[Filter]:
+        return self._residual
+
+
+def to_ldap(
+    schema: ResourceSchema, mapping: LDAPMapping, filter_: Filter
+) -> Tuple[Union[Invalid, LDAPQuery], ValidationIssues]:
+    """
+    Translates the filter to RFC 4515 filter string that finds entries of resources matched
+    by the filter called with `strict` flag set. Operands of top-level 'and' operator are
+    translated separately, and the ones that refer attributes not mapped to LDAP attributes,
+    or that LDAP can not compare like the filter (e.g. 'gt' for multi-valued attributes,
+    or 'and' for sub-attributes of multi-valued complex attribute), are left in residual
+    filter. 'co', 'sw' and 'ew' are translated to substring filters, and 'pr' to presence
+    filters. Requires LDAP attributes with matching rules like the mapped attributes have,
+    e.g. 'caseIgnoreMatch' for the ones that are not case-exact.
+    """
+    bound, issues = filter_.bind(schema)
+    if not issues.can_proceed():
+        return Invalid, issues
+
+    translated, residual = [], []
+    for operator in _get_conjuncts(bound.operator):
+        translation = _translate(operator, mapping.get_ldap_attrs)
+        if translation is None:
+            residual.append(operator)
+        else:
+            translated.append(translation[0])
+
+    residual_filter = None
+    if residual and isinstance(bound.operator, op.And):
+        # 'and' operator is kept, since it ignores operands of unknown attributes
+        residual_filter = Filter(op.And(*residual), schema)
+    elif residual:
+        residual_filter = bound
+    return LDAPQuery(_and(translated) if translated else _TRUE, residual_filter), issues
+
+
+def escape(value: str) -> str:
+    """
+    Escapes characters that are special in RFC 4515 filter values.
+    """
+    return "".join(_ESCAPED.get(char, char) for char in value)
+
+
+def _get_conjuncts(operator):
+    if isinstance(operator, op.And):
+        for sub_operator in operator.sub_operators:
+            yield from _get_conjuncts(sub_operator)
+    else:
+        yield operator
+
+
+# Operators are translated to pairs of LDAP filters, one matching the entries the operator
+# passes for and other matching the ones it fails for, since, unlike LDAP filters, operators
+# neither pass nor fail for missing data, and 'not' fails for it.
+_Translation = Optional[Tuple[str, str]]
+
+
+def _translate(operator, get_ldap_attrs, multi_valued: bool = False) -> _Translation:
+    if isinstance(operator, op.MultiOperandLogicalOperator):
+        translations = []
+        for sub_operator in operator.sub_operators:
+            translation = _translate(sub_operator, get_ldap_attrs, multi_valued)
+            if translation is None:
+                return None
+            translations.append(translation)
+        passed = [translation[0] for translation in translations]
+        failed = [translation[1] for translation in translations]
+        if isinstance(operator, op.And):
+            return _and(passed), _or(failed)
+        return _or(passed), _and(failed)
+
+    if isinstance(operator, op.Not):
+        translation = _translate(operator.sub_operator, get_ldap_attrs, multi_valued)
+        if translation is None:
+            return None
+        return translation[1], f"(!{translation[1]})"
+
+    if isinstance(operator, op.ComplexAttributeOperator):
+        return _translate_complex(operator, get_ldap_attrs)
+
+    return _translate_attribute(operator, get_ldap_attrs, multi_valued)
+
+
+def _translate_complex(operator: op.ComplexAttributeOperator, get_ldap_attrs) -> _Translation:
+    attr = operator.attr
+    if attr is None:
+        return None
+    if attr.multi_valued and not _is_per_value(operator.sub_operator):
+        # values of different LDAP attributes can not be correlated as the same item
+        return None
+
+    parent = operator.attr_rep
+
+    def get_sub_attr_ldap_attrs(attr_rep: AttrRep):
+        return get_ldap_attrs(
+            AttrRep(schema=parent.schema, attr=parent.attr, sub_attr=attr_rep.attr)
+        )
+
+    translation = _translate(operator.sub_operator, get_sub_attr_ldap_attrs, attr.multi_valued)
+    if translation is None:
+        return None
+    # complex attribute operator does not report missing data
+    return translation[0], f"(!{translation[0]})"
+
+
+def _is_per_value(operator) -> bool:
+    if isinstance(operator, op.Or):
+        return all(_is_per_value(sub_operator) for sub_operator in operator.sub_operators)
+    return isinstance(operator, op.AttributeOperator)
+
+
+def _translate_attribute(
+    operator: op.AttributeOperator, get_ldap_attrs, multi_valued: bool
+) -> _Translation:
+    attr = operator.attr
+    if attr is None:
+        return None
+    attr_rep = operator.attr_rep
+    if isinstance(attr, ComplexAttribute):
+        if not attr.multi_valued:
+            if isinstance(operator, op.Present):
+                # presence of single-valued complex attribute is never matched
+                return _FALSE, _TRUE
+            return None
+        attr_rep = AttrRep(schema=attr_rep.schema, attr=attr_rep.attr, sub_attr="value")
+        attr = attr.attrs.get(AttrRep(attr="value"))
+        if attr is None:
+            return None
+
+    ldap_attrs = get_ldap_attrs(attr_rep)
+    if not ldap_attrs:
+        return None
+    multi_valued = multi_valued or attr.multi_valued or len(ldap_attrs) > 1
+
+    present = _or([f"({ldap_attr}=*)" for ldap_attr in ldap_attrs])
+    if isinstance(operator, op.Present):
+        return present, f"(!{present})"
+
+    if operator.value is None:
+        # comparison with 'null' reports missing data for missing value
+        if isinstance(operator, op.NotEqual):
+            return present, _FALSE
+        return _FALSE, present
+
+    value = _encode(operator.value, attr)
+    if value is None:
+        return None
+
+    if type(operator) in _SUBSTRING_PATTERNS:
+        if not value:
+            return present, f"(!{present})"
+        pattern = _SUBSTRING_PATTERNS[type(operator)].format(value)
+        matched = _or([f"({ldap_attr}={pattern})" for ldap_attr in ldap_attrs])
+    elif isinstance(operator, (op.Equal, op.GreaterThanOrEqual, op.LesserThanOrEqual)):
+        filter_type = {op.Equal: "=", op.GreaterThanOrEqual: ">=", op.LesserThanOrEqual: "<="}
+        matched = _or(
+            [f"({ldap_attr}{filter_type[type(operator)]}{value})" for ldap_attr in ldap_attrs]
+        )
+    elif multi_valued:
+        # LDAP filters can not tell if any value differs from the compared one
+        return None
+    else:
+        ldap_attr = ldap_attrs[0]
+        equal = f"({ldap_attr}={value})"
+        if isinstance(operator, op.NotEqual):
+            matched = _and([present, f"(!{equal})"])
+        elif isinstance(operator, op.GreaterThan):
+            matched = _and([f"({ldap_attr}>={value})", f"(!{equal})"])
+        else:
+            matched = _and([f"({ldap_attr}<={value})", f"(!{equal})"])
+    return matched, _and([present, f"(!{matched})"])
+
+
+def _encode(value, attr: Attribute) -> Optional[str]:
+    if issubclass(attr.type, at.Binary):
+        return None
+    if attr.type.SCIM_NAME == "dateTime":
+        value = datetime.fromisoformat(value)
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc)
+        # generalized time
+        if value.microsecond:
+            return value.strftime("%Y%m%d%H%M%S.%fZ")
+        return value.strftime("%Y%m%d%H%M%SZ")
+    if isinstance(value, bool):
+        return "TRUE" if value else "FALSE"
+    if isinstance(value, str):
+        return escape(value)
+    return str(value)
+
+
+def _and(filters: List[str]) -> str:
+    return _join("&", filters)
+
+
+def _or(filters: List[str]) -> str:
+    return _join("|", filters)
+
+
+def _join(operator: str, filters: List[str]) -> str:
+    if len(filters) == 1:
+        return filters[0]
+    operands = []
+    for filter_ in filters:
+        # each filter is a single parenthesized one, so nested '&' / '|' can be flattened
+        if filter_.startswith(f"({operator}"):
+            operands.append(filter_[2:-1])
+        else:
+            operands.append(filter_)
+    return f"({operator}{''.join(operands)})"
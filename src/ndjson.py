@@ -0,0 +1,179 @@
+import json
+import mmap
+import os
+import string
+from typing import BinaryIO, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+from src.data import operator as op
+from src.data import type as at
+from src.data.attributes import ComplexAttribute
+from src.data.container import AttrRep, Invalid, SCIMDataContainer
+from src.data.schemas import BaseSchema
+from src.error import ValidationIssues
+from src.filter import CompiledFilter, Filter
+
+Source = Union[str, os.PathLike, BinaryIO]
+
+
+class _Literal(NamedTuple):
+    value: bytes
+    case_exact: bool  # otherwise, the value is lowercase
+
+
+# characters that JSON encoders do not escape; besides '"', '\\' and control characters,
+# some encoders escape '/', '<', '>', '&', '=', "'", '+' and '`' (e.g. Go, Gson, .NET)
+_VERBATIM_CHARS = frozenset(string.ascii_letters + string.digits + " !#$%()*,-.:;?@[]^_{|}~")
+
+# literals that must be in the raw line for the filter to match it, as a list of
+# alternatives (any of them must be in the line) that are all required
+_Prefilter = List[List[_Literal]]
+
+
+def filter_ndjson(
+    source: Source,
+    filter_: Filter,
+    schema: Optional[BaseSchema] = None,
+    strict: bool = True,
+    offsets: bool = False,
+) -> Tuple[Union[Invalid, Iterator[Union[SCIMDataContainer, int]]], ValidationIssues]:
+    """
+    Returns iterator over records of NDJSON file (one JSON object per line), at `source`
+    path or in binary stream, that the filter, compiled for the `schema`, matches. Byte
+    offsets of lines with the matching records are yielded instead, if `offsets` is set.
+
+    The file is memory-mapped if possible (otherwise it is read line by line), and only
+    the current line is copied, so the memory used does not depend on file size. Lines
+    that can not match, since they do not contain string literals of 'eq', 'co', 'sw' and
+    'ew' comparisons (in required combination), are skipped without decoding them. Only
+    literals of letters, digits, and punctuation that JSON encoders do not escape are
+    looked for, so escaped characters (e.g. '&' as '\\u0026') do not hide matching lines.
+    Lines with non-ASCII characters, raw or escaped (as `json.dumps` does by default), are
+    checked for case-exact literals only.
+    """
+    schema = schema or filter_.schema
+    if schema is None:
+        raise ValueError("schema is required to match records with unbound filter")
+    compiled, issues = filter_.compile(schema, strict)
+    if not issues.can_proceed():
+        return Invalid, issues
+    prefilter = _get_prefilter(compiled.filter.operator) if strict else []
+    return _iter_matching(source, compiled, prefilter, offsets), issues
+
+
+def _iter_matching(
+    source: Source, compiled: CompiledFilter, prefilter: _Prefilter, offsets: bool
+) -> Iterator[Union[SCIMDataContainer, int]]:
+    for offset, line in _iter_lines(source):
+        if not line.strip() or not _may_match(line, prefilter):
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            raise ValueError(f"bad JSON in line at offset {offset}") from e
+        data = SCIMDataContainer(record, lazy=True)
+        if compiled.match_status(data) is op.MatchStatus.PASSED:
+            yield offset if offsets else data
+
+
+def _iter_lines(source: Source) -> Iterator[Tuple[int, bytes]]:
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as file:
+            yield from _iter_stream_lines(file)
+    else:
+        yield from _iter_stream_lines(source)
+
+
+def _iter_stream_lines(stream: BinaryIO) -> Iterator[Tuple[int, bytes]]:
+    start = stream.tell() if stream.seekable() else 0
+    try:
+        mapped = mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ)
+    except (AttributeError, OSError, ValueError):
+        # not a file, or an empty one
+        offset = start
+        for line in stream:
+            yield offset, line
+            offset += len(line)
+        return
+
+    with mapped:
+        offset = start
+        size = len(mapped)
+        while offset < size:
+            end = mapped.find(b"\n", offset)
+            if end == -1:
+                end = size
+            yield offset, mapped[offset:end]
+            offset = end + 1
+
+
+def _may_match(line: bytes, prefilter: _Prefilter) -> bool:
+    lowered = None
+    for alternatives in prefilter:
+        for literal in alternatives:
+            if literal.case_exact:
+                if literal.value in line:
+                    break
+                continue
+            if lowered is None:
+                # non-ASCII characters, also escaped ones, can be lowered to ASCII ones
+                # (e.g. Kelvin sign), so such lines are not prefiltered case-insensitively
+                lowered = line.lower() if line.isascii() and b"\\u" not in line else b""
+            if not lowered or literal.value in lowered:
+                break
+        else:
+            return False
+    return True
+
+
+def _get_prefilter(operator) -> _Prefilter:
+    if isinstance(operator, op.And):
+        prefilter = []
+        for sub_operator in operator.sub_operators:
+            prefilter.extend(_get_prefilter(sub_operator))
+        return prefilter
+
+    if isinstance(operator, op.Or):
+        # any of the operands must match, so one of their requirements is met
+        alternatives = []
+        for sub_operator in operator.sub_operators:
+            prefilter = _get_prefilter(sub_operator)
+            if not prefilter:
+                return []
+            # longer literals are less likely to be found in lines that do not match
+            alternatives.extend(
+                max(prefilter, key=lambda clause: min(len(lit.value) for lit in clause))
+            )
+        return [alternatives]
+
+    if isinstance(operator, op.ComplexAttributeOperator):
+        if operator.attr is None:
+            return []
+        # strict match requires sub-operator to match some item
+        return _get_prefilter(operator.sub_operator)
+
+    if isinstance(operator, (op.Equal, op.Contains, op.StartsWith, op.EndsWith)):
+        literal = _get_literal(operator)
+        return [] if literal is None else [[literal]]
+    return []
+
+
+def _get_literal(operator: op.BinaryAttributeOperator) -> Optional[_Literal]:
+    attr, value = operator.attr, operator.value
+    if isinstance(attr, ComplexAttribute) and attr.multi_valued:
+        attr = attr.attrs.get(AttrRep(attr="value"))
+    if (
+        attr is None
+        or not isinstance(value, str)
+        or not value
+        or not issubclass(attr.type, at.String)
+        or issubclass(attr.type, (at.Binary, at.DateTime))
+        or not _is_verbatim_in_json(value)
+    ):
+        return None
+    if attr.case_exact:
+        return _Literal(value.encode(), case_exact=True)
+    return _Literal(value.lower().encode(), case_exact=False)
+
+
+def _is_verbatim_in_json(value: str) -> bool:
+    return all(char in _VERBATIM_CHARS for char in value)
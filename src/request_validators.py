@@ -18,7 +18,7 @@ from src.data.container import AttrRep, Invalid, Missing, SCIMDataContainer
 from src.data.schemas import BaseSchema, ResourceSchema
 from src.data.type import get_scim_type
 from src.error import ValidationError, ValidationIssues
-from src.filter import Filter
+from src.filter import Filter, FilterLimits
 from src.sorter import Sorter
 
 
@@ -381,7 +381,9 @@ def parse_request_sorting(query_string: Dict) -> Tuple[Union[Invalid, Sorter], V
     return Sorter.parse(by=sort_by, asc=sort_order == "ascending")
 
 
-def parse_request_filtering(query_string: Dict) -> Tuple[Union[Invalid, Filter], ValidationIssues]:
+def parse_request_filtering(
+    query_string: Dict, limits: Optional[FilterLimits] = None
+) -> Tuple[Union[Invalid, Filter], ValidationIssues]:
     issues = ValidationIssues()
     filter_exp = query_string.get("filter")
     if not isinstance(filter_exp, str):
@@ -391,7 +393,7 @@ def parse_request_filtering(query_string: Dict) -> Tuple[Union[Invalid, Filter],
                 proceed=False,
             )
         return Invalid, issues
-    return Filter.parse(filter_exp)
+    return Filter.parse(filter_exp, limits=limits)
 
 
 def parse_requested_attributes(
@@ -539,18 +541,43 @@ def validate_resources_filtered(
     resources: List[Any], filter_: Filter, resource_schemas: Sequence[ResourceSchema], strict: bool
 ) -> ValidationIssues:
     issues = ValidationIssues()
+    resources_by_schema = {}
     for i, (resource, schema) in enumerate(zip(resources, resource_schemas)):
-        if not filter_(resource, schema, strict):
-            issues.add(
-                issue=ValidationError.included_resource_does_not_match_filter(),
-                proceed=True,
-                location=(i,),
-            )
+        resources_by_schema.setdefault(id(schema), (schema, []))[1].append((i, resource))
+    not_matching = []
+    for schema, indexed_resources in resources_by_schema.values():
+        matches = filter_.match_many(
+            [resource for _, resource in indexed_resources], schema, strict
+        )
+        not_matching.extend(i for (i, _), match in zip(indexed_resources, matches) if not match)
+    for i in sorted(not_matching):
+        issues.add(
+            issue=ValidationError.included_resource_does_not_match_filter(),
+            proceed=True,
+            location=(i,),
+        )
+    return issues
+
+
+def validate_filter_selectivity(
+    filter_: Filter, resource_schemas: Sequence[ResourceSchema], max_selectivity: float
+) -> ValidationIssues:
+    issues = ValidationIssues()
+    selectivity = max(filter_.estimate_selectivity(schema) for schema in resource_schemas)
+    if selectivity > max_selectivity:
+        issues.add(
+            issue=ValidationError.too_broad_filter(selectivity, max_selectivity),
+            proceed=False,
+        )
     return issues
 
 
 def _parse_resources_get_request(
-    body: Any = None, headers: Any = None, query_string: Any = None
+    config: ServiceProviderConfig,
+    resource_schemas: Sequence[ResourceSchema],
+    body: Any = None,
+    headers: Any = None,
+    query_string: Any = None,
 ) -> Tuple[RequestData, ValidationIssues]:
     issues = ValidationIssues()
     query_string_location = ("query_string",)
@@ -570,7 +597,11 @@ def _parse_resources_get_request(
     if issues.has_issues():
         return RequestData(headers=headers, query_string=query_string, body=body), issues
 
-    filter_, issues_ = parse_request_filtering(query_string)
+    filter_, issues_ = parse_request_filtering(query_string, config.filter.limits)
+    if filter_ is not Invalid and config.filter.max_selectivity is not None:
+        issues_.merge(
+            validate_filter_selectivity(filter_, resource_schemas, config.filter.max_selectivity)
+        )
     query_string["filter"] = filter_
     issues.merge(
         issues=issues_,
@@ -628,6 +659,7 @@ def _dump_resources_get_response(
     filter_: Optional[Filter] = None,
     sorter: Optional[Sorter] = None,
     resource_presence_checker: Optional[AttributePresenceChecker] = None,
+    max_results: Optional[int] = None,
 ) -> Tuple[ResponseData, ValidationIssues]:
     issues = ValidationIssues()
     body_location = ("body",)
@@ -700,8 +732,19 @@ def _dump_resources_get_response(
 
     resource_schemas = schema.get_schemas_for_resources(resources)
     if filter_ is not None:
+        if max_results is not None and len(resources) > max_results:
+            issues.add(
+                issue=ValidationError.too_many_results(
+                    must=f"be lesser or equal to filter 'maxResults' ({max_results})"
+                ),
+                proceed=True,
+                location=resources_location,
+            )
+        # resources over the limit should not be returned, so they are not matched
         issues.merge(
-            issues=validate_resources_filtered(resources, filter_, resource_schemas, False),
+            issues=validate_resources_filtered(
+                resources[:max_results], filter_, resource_schemas, False
+            ),
             location=resources_location,
         )
     if sorter is not None:
@@ -730,11 +773,14 @@ class ServerRootResourceGET(Validator):
     ):
         super().__init__(config)
         self._schema = list_response.ListResponse(resource_schemas)
+        self._resource_schemas = resource_schemas
 
     def parse_request(  # noqa
         self, *, body: Any = None, headers: Any = None, query_string: Any = None
     ) -> Tuple[RequestData, ValidationIssues]:
-        return _parse_resources_get_request(body, headers, query_string)
+        return _parse_resources_get_request(
+            self.config, self._resource_schemas, body, headers, query_string
+        )
 
     def dump_response(
         self,
@@ -758,6 +804,7 @@ class ServerRootResourceGET(Validator):
             filter_=filter_,
             sorter=sorter,
             resource_presence_checker=presence_checker,
+            max_results=self.config.filter.max_results,
         )
 
 
@@ -771,14 +818,27 @@ class SearchRequestPOST(Validator):
         self, config: ServiceProviderConfig, *, resource_schemas: Sequence[ResourceSchema]
     ):
         super().__init__(config)
-        self._schema = search_request.SearchRequest()
+        self._schema = search_request.SearchRequest(filter_limits=config.filter.limits)
         self._list_response_schema = list_response.ListResponse(resource_schemas)
+        self._resource_schemas = resource_schemas
 
     def parse_request(
         self, *, body: Any = None, headers: Any = None, query_string: Any = None
     ) -> Tuple[RequestData, ValidationIssues]:
         issues = ValidationIssues()
         body, issues_ = self._schema.parse(body)
+        filter_rep = self._schema.attrs.filter.rep
+        if (
+            issues_.can_proceed(_location(filter_rep))
+            and body[filter_rep] not in [None, Missing]
+            and self.config.filter.max_selectivity is not None
+        ):
+            issues_.merge(
+                validate_filter_selectivity(
+                    body[filter_rep], self._resource_schemas, self.config.filter.max_selectivity
+                ),
+                location=_location(filter_rep),
+            )
         issues.merge(issues_, location=("body",))
         if issues_.has_issues():
             body = None
@@ -806,6 +866,7 @@ class SearchRequestPOST(Validator):
             filter_=filter_,
             sorter=sorter,
             resource_presence_checker=presence_checker,
+            max_results=self.config.filter.max_results,
         )
 
 
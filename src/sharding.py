@@ -0,0 +1,129 @@
+import itertools
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, NamedTuple, Optional, Sequence, Tuple, Union
+
+from src.data import operator as op
+from src.data.container import Invalid, SCIMDataContainer
+from src.data.schemas import ResourceSchema
+from src.error import ValidationIssues
+from src.filter import Filter
+from src.sorter import Sorter
+
+# resources and schema of the worker process, set once by `_init_worker`
+_resources: List[SCIMDataContainer] = []
+_schema: Optional[ResourceSchema] = None
+
+
+class Page(NamedTuple):
+    resources: List[SCIMDataContainer]
+    total_results: int
+    start_index: int
+
+
+class ShardedExecutor:
+    """
+    Filters and sorts in-memory `resources` of the `schema` in worker processes. Every worker
+    gets all resources once, when started (for free, if processes are forked), and is sent
+    only the filter, the sorter and the range of resources (the shard) to select from
+    for every request. Shards are filtered and sorted locally, and the parent process merges
+    sorted shards only as far as the requested page.
+    """
+
+    def __init__(
+        self,
+        resources: Sequence[SCIMDataContainer],
+        schema: ResourceSchema,
+        max_workers: Optional[int] = None,
+        mp_context: Optional[multiprocessing.context.BaseContext] = None,
+    ):
+        self._resources = list(resources)
+        self._schema = schema
+        self._n_workers = max_workers or os.cpu_count() or 1
+        self._pool = ProcessPoolExecutor(
+            max_workers=self._n_workers,
+            mp_context=mp_context,
+            initializer=_init_worker,
+            initargs=(self._resources, schema),
+        )
+
+    @property
+    def n_workers(self) -> int:
+        return self._n_workers
+
+    def select(
+        self,
+        filter_: Optional[Filter] = None,
+        sorter: Optional[Sorter] = None,
+        start_index: int = 1,
+        count: Optional[int] = None,
+        strict: bool = True,
+    ) -> Tuple[Union[Invalid, Page], ValidationIssues]:
+        """
+        Returns page of resources the filter matches (all, if no filter), starting
+        at 1-based `start_index` and with at most `count` resources, sorted with the `sorter`
+        or in order of the resources, and the total number of the matched resources.
+        """
+        issues = ValidationIssues()
+        if filter_ is not None:
+            _, issues = filter_.bind(self._schema)
+            if not issues.can_proceed():
+                return Invalid, issues
+
+        futures = [
+            self._pool.submit(_select_shard, filter_, sorter, strict, start, stop)
+            for start, stop in self._get_shards()
+        ]
+        parts = [future.result() for future in futures]
+        if sorter is None:
+            indexes = itertools.chain.from_iterable(parts)
+            selected = (self._resources[i] for i in indexes)
+        else:
+            selected = sorter.merge(
+                [(self._resources[i] for i in part) for part in parts], self._schema
+            )
+
+        start_index = max(start_index, 1)
+        stop = None if count is None else start_index - 1 + max(count, 0)
+        page = list(itertools.islice(selected, start_index - 1, stop))
+        total_results = sum(len(part) for part in parts)
+        return Page(resources=page, total_results=total_results, start_index=start_index), issues
+
+    def _get_shards(self) -> List[Tuple[int, int]]:
+        shard_size = -(-len(self._resources) // self._n_workers) or 1
+        return [
+            (start, min(start + shard_size, len(self._resources)))
+            for start in range(0, len(self._resources), shard_size)
+        ]
+
+    def shutdown(self) -> None:
+        self._pool.shutdown()
+
+    def __enter__(self) -> "ShardedExecutor":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.shutdown()
+
+
+def _init_worker(resources: List[SCIMDataContainer], schema: ResourceSchema) -> None:
+    global _resources, _schema
+    _resources = resources
+    _schema = schema
+
+
+def _select_shard(
+    filter_: Optional[Filter], sorter: Optional[Sorter], strict: bool, start: int, stop: int
+) -> List[int]:
+    shard = range(start, stop)
+    if filter_ is not None:
+        compiled, _ = filter_.compile(_schema, strict)
+        shard = [
+            i for i in shard if compiled.match_status(_resources[i]) is op.MatchStatus.PASSED
+        ]
+    if sorter is None:
+        return list(shard)
+
+    indexes = {id(_resources[i]): i for i in shard}
+    return [indexes[id(item)] for item in sorter([_resources[i] for i in shard], _schema)]
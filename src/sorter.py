@@ -1,6 +1,9 @@
 import functools
-from typing import Any, List, Optional, Sequence, Tuple, Union
+import heapq
+import json
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
 
+from src.cache import ParseCache
 from src.data import type as at
 from src.data.attributes import Attribute, ComplexAttribute
 from src.data.container import AttrRep, Invalid, Missing, SCIMDataContainer
@@ -34,8 +37,19 @@ class StringKey:
 
         return self._value.lower() < other._value.lower()
 
+    def __eq__(self, other):
+        if not isinstance(other, StringKey):
+            return NotImplemented
+
+        if self._attr.case_exact or other._attr.case_exact:
+            return self._value == other._value
+
+        return self._value.lower() == other._value.lower()
+
 
 class Sorter:
+    parse_cache = ParseCache()
+
     def __init__(self, attr_rep: AttrRep, asc: bool = True):
         self._attr_rep = attr_rep
         self._asc = asc
@@ -51,6 +65,10 @@ class Sorter:
 
     @classmethod
     def parse(cls, by: str, asc: bool = True) -> Tuple[Union[Invalid, "Sorter"], ValidationIssues]:
+        cached = cls.parse_cache.get((by, asc))
+        if cached is not None:
+            return cached
+
         issues = ValidationIssues()
         attr_rep = AttrRep.parse(by)
         if attr_rep is Invalid:
@@ -58,11 +76,25 @@ class Sorter:
                 issue=ValidationError.bad_attribute_name(by),
                 proceed=False,
             )
-            return Invalid, issues
-        return (
-            Sorter(attr_rep=attr_rep, asc=asc),
-            issues,
-        )
+            return cls.parse_cache.set((by, asc), Invalid, issues)
+        return cls.parse_cache.set((by, asc), Sorter(attr_rep=attr_rep, asc=asc), issues)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"attr_rep": str(self._attr_rep), "asc": self._asc}
+
+    @classmethod
+    def from_dict(cls, sorter_dict: Dict[str, Any]) -> "Sorter":
+        attr_rep = AttrRep.parse(sorter_dict["attr_rep"])
+        if attr_rep is Invalid:
+            raise ValueError(f"bad attribute name {sorter_dict['attr_rep']!r}")
+        return cls(attr_rep=attr_rep, asc=sorter_dict["asc"])
+
+    def to_bytes(self) -> bytes:
+        return json.dumps(self.to_dict(), separators=(",", ":")).encode()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "Sorter":
+        return cls.from_dict(json.loads(data))
 
     def __call__(
         self,
@@ -82,6 +114,17 @@ class Sorter:
 
         return sorted(data, key=key, reverse=not self._asc)
 
+    def merge(
+        self, parts: Iterable[Iterable[SCIMDataContainer]], schema: ResourceSchema
+    ) -> Iterator[SCIMDataContainer]:
+        """
+        Merges `parts` of data, each sorted with the sorter (e.g. by different workers), into
+        one sorted iterator. Items with equal keys are taken in order of the parts, so merging
+        consecutive parts of data gives the same order as sorting all of it.
+        """
+        key = functools.partial(self._attr_key, schema=schema)
+        return heapq.merge(*parts, key=key, reverse=not self._asc)
+
     def _get_key(self, value: Any, attr: Optional[Attribute]):
         if not value or attr is None:
             return self._default_value
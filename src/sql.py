@@ -0,0 +1,410 @@
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from src.data import operator as op
+from src.data import type as at
+from src.data.attributes import Attribute, ComplexAttribute
+from src.data.container import AttrRep, Invalid
+from src.data.schemas import ResourceSchema
+from src.error import ValidationError, ValidationIssues
+from src.filter import Filter
+from src.sorter import Sorter
+
+_NO_LIMIT = 2**63 - 1
+
+_COMPARISON_OPERATORS = {
+    op.Equal: "=",
+    op.NotEqual: "<>",
+    op.GreaterThan: ">",
+    op.GreaterThanOrEqual: ">=",
+    op.LesserThan: "<",
+    op.LesserThanOrEqual: "<=",
+}
+
+_LIKE_PATTERNS = {
+    op.Contains: "%{}%",
+    op.StartsWith: "{}%",
+    op.EndsWith: "%{}",
+}
+
+
+class MultiValuedTable:
+    """
+    Table with values of multi-valued attribute, a row per value, that references
+    the resource with `foreign_key` column. Columns are mapped by sub-attribute names,
+    and values of simple multi-valued attributes are mapped by 'value'.
+    """
+
+    def __init__(self, name: str, foreign_key: str, columns: Dict[str, str]):
+        self._name = name
+        self._foreign_key = foreign_key
+        self._columns = {sub_attr.lower(): column for sub_attr, column in columns.items()}
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def foreign_key(self) -> str:
+        return self._foreign_key
+
+    def get_column(self, sub_attr: str) -> Optional[str]:
+        return self._columns.get(sub_attr.lower())
+
+
+class TableMapping:
+    """
+    Maps attributes of resources to columns of the `name` table, with attribute names
+    like in filters (e.g. 'userName', 'name.givenName' or extension attributes with
+    schema URI), and multi-valued attributes to `MultiValuedTable`s. Names of tables
+    and columns are put in SQL as they are.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        columns: Dict[str, Union[str, MultiValuedTable]],
+        primary_key: str = "id",
+    ):
+        self._name = name
+        self._primary_key = primary_key
+        self._columns = [(AttrRep.parse(attr), column) for attr, column in columns.items()]
+        for (attr_rep, _), attr in zip(self._columns, columns):
+            if attr_rep is Invalid:
+                raise ValueError(f"bad attribute name {attr!r}")
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def primary_key(self) -> str:
+        return self._primary_key
+
+    def get_column(self, attr_rep: AttrRep) -> Optional[Union[str, MultiValuedTable]]:
+        for mapped_attr_rep, column in self._columns:
+            if mapped_attr_rep == attr_rep:
+                return column
+        return None
+
+
+class SQLQuery:
+    """
+    Query translated from filter, sorter and pagination. `where_params` are values
+    of placeholders in `where`, and `limit` / `offset` are put in SQL as placeholders too.
+    """
+
+    def __init__(
+        self,
+        table: TableMapping,
+        where: str,
+        where_params: List[Any],
+        order_by: str = "",
+        limit: Optional[int] = None,
+        offset: int = 0,
+        placeholder: str = "?",
+    ):
+        self._table = table
+        self._where = where
+        self._where_params = where_params
+        self._order_by = order_by
+        self._limit = limit
+        self._offset = offset
+        self._placeholder = placeholder
+
+    @property
+    def where(self) -> str:
+        return self._where
+
+    @property
+    def where_params(self) -> List[Any]:
+        return self._where_params
+
+    @property
+    def order_by(self) -> str:
+        return self._order_by
+
+    @property
+    def limit(self) -> Optional[int]:
+        return self._limit
+
+    @property
+    def offset(self) -> int:
+        return self._offset
+
+    def select(self, columns: str = "*") -> Tuple[str, List[Any]]:
+        sql = f"SELECT {columns} FROM {self._table.name}"
+        params = list(self._where_params)
+        if self._where:
+            sql += f" WHERE {self._where}"
+        if self._order_by:
+            sql += f" ORDER BY {self._order_by}"
+        if self._limit is not None or self._offset:
+            sql += f" LIMIT {self._placeholder} OFFSET {self._placeholder}"
+            params.extend([_NO_LIMIT if self._limit is None else self._limit, self._offset])
+        return sql, params
+
+
+def to_sql(
+    schema: ResourceSchema,
+    table: TableMapping,
+    filter_: Optional[Filter] = None,
+    sorter: Optional[Sorter] = None,
+    start_index: int = 1,
+    count: Optional[int] = None,
+    placeholder: str = "?",
+) -> Tuple[Union[Invalid, SQLQuery], ValidationIssues]:
+    """
+    Translates the filter to parameterized SQL 'WHERE' clause, the sorter to 'ORDER BY'
+    clause and `start_index` / `count` to 'LIMIT' / 'OFFSET', for the resource `table`.
+
+    The query selects resources matched by the filter called with `strict` flag set,
+    since 'NULL' in SQL, like missing data, neither matches nor fails to match. Comparisons
+    of multi-valued attributes are translated to 'EXISTS' subqueries on `MultiValuedTable`s,
+    and values of attributes that are not case-exact are lower-cased with 'LOWER'.
+    Attributes not mapped to columns are reported. Requires SQL boolean tests ('IS TRUE',
+    'IS FALSE') and 'LIKE' that is case-sensitive, e.g. in SQLite with
+    'PRAGMA case_sensitive_like = ON'. 'dateTime' values are passed as ISO 8601 strings
+    in UTC (e.g. '2011-05-13T04:42:34+00:00'), so columns must store them the same way,
+    or be of type the database converts such strings to (e.g. 'timestamptz' in PostgreSQL).
+    """
+    issues = ValidationIssues()
+    translator = _SQLTranslator(table, placeholder)
+    where = ""
+    if filter_ is not None:
+        bound, issues_ = filter_.bind(schema)
+        issues.merge(issues=issues_)
+        if issues_.can_proceed():
+            where = translator.translate(bound.operator)
+            issues.merge(issues=translator.issues)
+
+    order_by = ""
+    if sorter is not None:
+        order_by, issues_ = _get_order_by(schema, table, sorter)
+        issues.merge(issues=issues_)
+
+    if not issues.can_proceed():
+        return Invalid, issues
+    return (
+        SQLQuery(
+            table=table,
+            where=where,
+            where_params=translator.params,
+            order_by=order_by,
+            limit=count,
+            offset=max(start_index, 1) - 1,
+            placeholder=placeholder,
+        ),
+        issues,
+    )
+
+
+def _to_utc_iso_format(value: str) -> str:
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc)
+    return parsed.isoformat()
+
+
+class _SQLTranslator:
+    def __init__(self, table: TableMapping, placeholder: str):
+        self._table = table
+        self._placeholder = placeholder
+        self._params: List[Any] = []
+        self._issues = ValidationIssues()
+        self._n_aliases = 0
+
+    @property
+    def params(self) -> List[Any]:
+        return self._params
+
+    @property
+    def issues(self) -> ValidationIssues:
+        return self._issues
+
+    def translate(
+        self,
+        operator: Union[op.LogicalOperator, op.AttributeOperator, op.ComplexAttributeOperator],
+    ) -> str:
+        return self._translate(operator, self._table.get_column, self._table.name)
+
+    def _translate(self, operator, get_column, table: str) -> str:
+        if isinstance(operator, op.MultiOperandLogicalOperator):
+            return f" {operator.SCIM_OP.upper()} ".join(
+                f"({self._translate(sub_operator, get_column, table)})"
+                for sub_operator in operator.sub_operators
+            )
+
+        if isinstance(operator, op.Not):
+            # 'not' fails for missing data, unlike 'NOT' giving 'NULL' for 'NULL'
+            return f"({self._translate(operator.sub_operator, get_column, table)}) IS FALSE"
+
+        if isinstance(operator, op.ComplexAttributeOperator):
+            return self._translate_complex(operator, get_column, table)
+
+        return self._translate_attribute(operator, get_column, table)
+
+    def _translate_complex(
+        self, operator: op.ComplexAttributeOperator, get_column, table: str
+    ) -> str:
+        attr = operator.attr
+        if attr is None:
+            self._add_not_mapped(operator.attr_rep)
+            return ""
+
+        if not attr.multi_valued:
+            parent = operator.attr_rep
+
+            def get_sub_attr_column(attr_rep: AttrRep):
+                return get_column(
+                    AttrRep(schema=parent.schema, attr=parent.attr, sub_attr=attr_rep.attr)
+                )
+
+            # complex attribute operator does not report missing data, so 'NULL' fails
+            sub_condition = self._translate(operator.sub_operator, get_sub_attr_column, table)
+            return f"({sub_condition}) IS TRUE"
+
+        child = get_column(operator.attr_rep)
+        if not isinstance(child, MultiValuedTable):
+            self._add_not_mapped(operator.attr_rep)
+            return ""
+
+        alias = self._get_alias()
+        sub_condition = self._translate(
+            operator.sub_operator,
+            lambda attr_rep: child.get_column(attr_rep.attr),
+            alias,
+        )
+        return self._exists(child, alias, table, sub_condition)
+
+    def _translate_attribute(
+        self, operator: op.AttributeOperator, get_column, table: str
+    ) -> str:
+        attr = operator.attr
+        column = get_column(operator.attr_rep) if attr is not None else None
+        if column is None:
+            self._add_not_mapped(operator.attr_rep)
+            return ""
+
+        if not attr.multi_valued:
+            if isinstance(column, MultiValuedTable):
+                self._add_not_mapped(operator.attr_rep)
+                return ""
+            if isinstance(attr, ComplexAttribute):
+                # presence of single-valued complex attribute is never matched
+                return "1 = 0"
+            return self._compare(operator, attr, f"{table}.{column}")
+
+        if not isinstance(column, MultiValuedTable) or column.get_column("value") is None:
+            self._add_not_mapped(operator.attr_rep)
+            return ""
+        value_attr = attr
+        if isinstance(attr, ComplexAttribute) and isinstance(operator, op.Present):
+            value_attr = attr.attrs.get(AttrRep(attr="value")) or attr
+        alias = self._get_alias()
+        condition = self._compare(operator, value_attr, f"{alias}.{column.get_column('value')}")
+        exists = self._exists(column, alias, table, condition)
+        if isinstance(operator, op.Present):
+            return exists
+        # comparison reports missing data if there are no values, so 'CASE' gives 'NULL'
+        alias = self._get_alias()
+        return f"CASE WHEN {self._exists(column, alias, table, 'TRUE')} THEN {exists} END"
+
+    def _compare(self, operator: op.AttributeOperator, attr: Attribute, column: str) -> str:
+        is_text = issubclass(attr.type, at.String)
+        if isinstance(operator, op.Present):
+            if is_text:
+                return f"{column} IS NOT NULL AND {column} <> ''"
+            return f"{column} IS NOT NULL"
+
+        value = operator.value
+        if value is None:
+            # comparison with 'null' reports missing data for missing value
+            if isinstance(operator, op.Equal):
+                return f"{column} IS NULL AND NULL"
+            if isinstance(operator, op.NotEqual):
+                return f"{column} IS NOT NULL OR NULL"
+
+        if isinstance(value, str) and attr.type.SCIM_NAME == "dateTime":
+            value = _to_utc_iso_format(value)
+        elif isinstance(value, str) and not attr.case_exact:
+            column, value = f"LOWER({column})", value.lower()
+
+        if type(operator) in _LIKE_PATTERNS:
+            escaped = value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            self._params.append(_LIKE_PATTERNS[type(operator)].format(escaped))
+            return f"{column} LIKE {self._placeholder} ESCAPE '\\'"
+
+        self._params.append(value)
+        return f"{column} {_COMPARISON_OPERATORS[type(operator)]} {self._placeholder}"
+
+    def _exists(self, child: MultiValuedTable, alias: str, table: str, condition: str) -> str:
+        return (
+            f"EXISTS (SELECT 1 FROM {child.name} AS {alias} "
+            f"WHERE {alias}.{child.foreign_key} = {table}.{self._table.primary_key} "
+            f"AND ({condition}))"
+        )
+
+    def _get_alias(self) -> str:
+        self._n_aliases += 1
+        return f"t{self._n_aliases}"
+
+    def _add_not_mapped(self, attr_rep: AttrRep) -> None:
+        self._issues.add(
+            issue=ValidationError.attribute_not_mapped(str(attr_rep), "SQL"),
+            proceed=False,
+        )
+
+
+def _get_order_by(
+    schema: ResourceSchema, table: TableMapping, sorter: Sorter
+) -> Tuple[str, ValidationIssues]:
+    """
+    Sorts like `Sorter`, with missing values always after the present ones when
+    sorting ascending, and strings that are not case-exact compared lower-cased.
+    Ties are ordered by the primary key, so pages of the results are consistent.
+    """
+    issues = ValidationIssues()
+    attr = schema.attrs.get(sorter.attr_rep)
+    column = table.get_column(sorter.attr_rep) if attr is not None else None
+    if isinstance(attr, ComplexAttribute) and attr.multi_valued:
+        value_attr = attr.attrs.get(AttrRep(attr="value"))
+        if (
+            not isinstance(column, MultiValuedTable)
+            or column.get_column("value") is None
+            or column.get_column("primary") is None
+        ):
+            column = None
+        else:
+            # primary value is used, like in `Sorter`
+            column = (
+                f"(SELECT {column.get_column('value')} FROM {column.name} "
+                f"WHERE {column.name}.{column.foreign_key} = {table.name}.{table.primary_key} "
+                f"AND {column.name}.{column.get_column('primary')} IS TRUE)"
+            )
+            attr = value_attr
+    elif attr is not None and attr.multi_valued or isinstance(column, MultiValuedTable):
+        column = None
+    elif column is not None:
+        column = f"{table.name}.{column}"
+
+    if column is None:
+        issues.add(
+            issue=ValidationError.attribute_not_mapped(str(sorter.attr_rep), "SQL"),
+            proceed=False,
+        )
+        return "", issues
+
+    direction = "ASC" if sorter.asc else "DESC"
+    missing = f"{column} IS NULL"
+    if attr is not None and attr.type is at.String:
+        # empty strings are missing values too
+        column = f"NULLIF({column}, '')"
+        missing = f"{column} IS NULL"
+        if not attr.case_exact:
+            column = f"LOWER({column})"
+    return (
+        f"CASE WHEN {missing} THEN 1 ELSE 0 END {direction}, {column} {direction}, "
+        f"{table.name}.{table.primary_key}",
+        issues,
+    )
@@ -1,7 +1,6 @@
 import re
-from typing import Any, Optional
+from typing import Any
 
-OP_REGEX = re.compile(r"\s+", flags=re.DOTALL)
 PLACEHOLDER_REGEX = re.compile(r"\|&PLACE_HOLDER_(\d+)&\|")
 STRING_VALUES_REGEX = re.compile(r"'(.*?)'|\"(.*?)\"", flags=re.DOTALL)
 
@@ -10,13 +9,6 @@ def get_placeholder(index: int) -> str:
     return f"|&PLACE_HOLDER_{index}&|"
 
 
-def parse_placeholder(exp: str) -> Optional[int]:
-    match = PLACEHOLDER_REGEX.fullmatch(exp)
-    if match:
-        return int(match.group(1))
-    return None
-
-
 def parse_comparison_value(value: str) -> Any:
     if (
         value.startswith('"')
@@ -1,8 +1,10 @@
 import pytest
 
+from src.assets.schemas.user import User
 from src.data import type as at
 from src.data.attributes import Attribute, ComplexAttribute
 from src.data.container import AttrRep, Invalid, SCIMDataContainer
+from src.data.schemas import SchemaExtension
 
 
 def test_parsing_is_skipped_if_value_not_provided():
@@ -310,3 +312,69 @@ def test_attribute_identifier_is_not_parsed_when_bad_input(input_):
     attr_rep = AttrRep.parse(input_)
 
     assert attr_rep is Invalid
+
+
+@pytest.fixture
+def user_with_title_extension():
+    schema = User()
+    schema.with_extension(
+        SchemaExtension(
+            schema="urn:my:extension",
+            attrs=[
+                Attribute(name="title", type_=at.String),
+                ComplexAttribute(
+                    sub_attributes=[Attribute(name="value", type_=at.String)], name="manager"
+                ),
+            ],
+        )
+    )
+    return schema
+
+
+@pytest.mark.parametrize(
+    ("attr_rep", "expected_schema"),
+    (
+        ("title", "urn:ietf:params:scim:schemas:core:2.0:User"),
+        ("TITLE", "urn:ietf:params:scim:schemas:core:2.0:User"),
+        (
+            "urn:ietf:params:scim:schemas:core:2.0:User:title",
+            "urn:ietf:params:scim:schemas:core:2.0:User",
+        ),
+        ("urn:my:extension:title", "urn:my:extension"),
+        ("URN:MY:EXTENSION:Title", "urn:my:extension"),
+        ("urn:my:extension:manager.value", "urn:my:extension"),
+        (
+            "urn:ietf:params:scim:schemas:extension:enterprise:2.0:User:manager.value",
+            "urn:ietf:params:scim:schemas:extension:enterprise:2.0:User",
+        ),
+        ("manager.value", "urn:ietf:params:scim:schemas:extension:enterprise:2.0:User"),
+    ),
+)
+def test_attribute_is_found_by_attr_rep(user_with_title_extension, attr_rep, expected_schema):
+    attr_rep = AttrRep.parse(attr_rep)
+
+    attr = user_with_title_extension.attrs.get(attr_rep)
+
+    assert attr.rep == attr_rep
+    assert attr.rep.schema == expected_schema
+
+
+@pytest.mark.parametrize(
+    "attr_rep", ("nick", "name.nickName", "urn:my:extension:userName", "urn:other:title")
+)
+def test_attribute_is_not_found_by_attr_rep(user_with_title_extension, attr_rep):
+    assert user_with_title_extension.attrs.get(AttrRep.parse(attr_rep)) is None
+
+
+def test_attribute_is_found_by_python_name():
+    attrs = User().attrs
+
+    assert attrs.meta__location is attrs.get(AttrRep.parse("meta.location"))
+    assert attrs.META__LOCATION is attrs.meta__location
+    assert attrs.username is attrs.get(AttrRep.parse("userName"))
+    with pytest.raises(AttributeError, match="'meta' has no 'bad' attribute"):
+        attrs.meta__bad
+    with pytest.raises(AttributeError, match="no 'bad' attribute"):
+        attrs.bad__location
+    with pytest.raises(AttributeError, match="no 'bad' attribute"):
+        attrs.bad
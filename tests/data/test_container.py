@@ -1,6 +1,19 @@
+import pickle
+from dataclasses import dataclass
+from typing import Any, Dict, List, NamedTuple
+
 import pytest
 
-from src.data.container import AttrRep, Missing, SCIMDataContainer
+from src.data.container import (
+    AttrRep,
+    Invalid,
+    Missing,
+    SCIMDataContainer,
+    ValueIndex,
+    get_attr_value,
+    get_value,
+    get_value_index,
+)
 
 
 @pytest.mark.parametrize(
@@ -63,8 +76,11 @@ from src.data.container import AttrRep, Missing, SCIMDataContainer
         ),
     ),
 )
-def test_value_from_scim_data_container_can_be_retrieved(attr_rep, expected, user_data_dump):
-    actual = SCIMDataContainer(user_data_dump)[attr_rep]
+@pytest.mark.parametrize("lazy", (False, True))
+def test_value_from_scim_data_container_can_be_retrieved(
+    attr_rep, expected, user_data_dump, lazy
+):
+    actual = SCIMDataContainer(user_data_dump, lazy=lazy)[attr_rep]
 
     assert actual == expected
 
@@ -198,3 +214,278 @@ def test_assigning_sub_attr_to_non_complex_attr_fails():
 
     with pytest.raises(KeyError, match=r"can not assign \(subkey, \[1, 2, 3\]\) to 'key'"):
         container["key.subkey"] = [1, 2, 3]
+
+
+@dataclass
+class _Email:
+    value: str
+    type: str
+
+
+@dataclass
+class _User:
+    userName: str
+    emails: List[_Email]
+    name: Dict[str, Any]
+
+
+@pytest.mark.parametrize(
+    ("data", "attr", "expected"),
+    (
+        (SCIMDataContainer({"userName": "bjensen"}), "USERNAME", "bjensen"),
+        ({"userName": "bjensen"}, "userName", "bjensen"),
+        ({"userName": "bjensen"}, "USERNAME", "bjensen"),
+        ({"userName": None}, "username", None),
+        ({"userName": "bjensen"}, "title", Missing),
+        (_Email(value="a@b.c", type="work"), "Value", "a@b.c"),
+        (_Email(value="a@b.c", type="work"), "display", Missing),
+        ("bjensen", "userName", Missing),
+        (None, "userName", Missing),
+        ([{"userName": "bjensen"}], "userName", Missing),
+    ),
+)
+def test_attr_value_is_retrieved_case_insensitively(data, attr, expected):
+    assert get_attr_value(data, attr) == expected
+
+
+@pytest.mark.parametrize(
+    ("attr_rep", "expected"),
+    (
+        (AttrRep(attr="USERNAME"), "bjensen"),
+        (AttrRep(attr="name", sub_attr="GIVENNAME"), "Barbara"),
+        (AttrRep(attr="name", sub_attr="middleName"), Missing),
+        (AttrRep(attr="emails", sub_attr="type"), ["work", "home"]),
+        (AttrRep(attr="userName", sub_attr="type"), Missing),
+        (
+            AttrRep(schema="urn:ietf:params:scim:schemas:core:2.0:User", attr="userName"),
+            "bjensen",
+        ),
+        (
+            AttrRep(
+                schema="urn:ietf:params:scim:schemas:extension:enterprise:2.0:User",
+                attr="employeeNumber",
+            ),
+            "1",
+        ),
+    ),
+)
+def test_value_from_plain_dict_can_be_retrieved(attr_rep, expected):
+    data = {
+        "userName": "bjensen",
+        "name": {"givenName": "Barbara"},
+        "emails": [{"value": "a@b.c", "type": "work"}, {"value": "d@e.f", "type": "home"}],
+        "urn:ietf:params:scim:schemas:extension:enterprise:2.0:User": {"employeeNumber": "1"},
+    }
+
+    assert get_value(data, attr_rep) == expected
+    assert SCIMDataContainer.getter(attr_rep)(data) == expected
+    assert SCIMDataContainer(data)[attr_rep] == expected
+
+
+def test_value_from_object_can_be_retrieved():
+    user = _User(
+        userName="bjensen",
+        emails=[_Email(value="a@b.c", type="work"), _Email(value="d@e.f", type="home")],
+        name={"givenName": "Barbara"},
+    )
+
+    assert get_value(user, AttrRep(attr="username")) == "bjensen"
+    assert get_value(user, AttrRep(attr="emails", sub_attr="TYPE")) == ["work", "home"]
+    assert get_value(user, AttrRep(attr="name", sub_attr="givenName")) == "Barbara"
+    assert get_value(user, AttrRep(attr="title")) is Missing
+
+
+class _Name(NamedTuple):
+    givenName: str
+
+
+class _SlottedUser:
+    __slots__ = ("userName", "_password")
+
+    def __init__(self, user_name: str):
+        self.userName = user_name
+        self._password = "secret"
+
+    @property
+    def displayName(self) -> str:
+        return self.userName.title()
+
+    def title(self) -> str:
+        return "Tour Guide"
+
+
+@pytest.mark.parametrize(
+    ("data", "attr", "expected"),
+    (
+        (_SlottedUser("bjensen"), "USERNAME", "bjensen"),
+        (_SlottedUser("bjensen"), "displayname", "Bjensen"),
+        (_SlottedUser("bjensen"), "title", Missing),
+        (_SlottedUser("bjensen"), "_password", Missing),
+        (_Name("Barbara"), "givenName", "Barbara"),
+        (_Name("Barbara"), "count", Missing),
+        (("a", "b"), "index", Missing),
+        (_Email(value="a@b.c", type="work"), "__init__", Missing),
+    ),
+)
+def test_only_data_attributes_of_objects_are_retrieved(data, attr, expected):
+    assert get_attr_value(data, attr) == expected
+
+
+def test_getter_is_built_once_for_plain_data(monkeypatch):
+    attr_rep = AttrRep(attr="nickName")
+    assert get_value({"nickName": "Babs"}, attr_rep) == "Babs"
+
+    monkeypatch.setattr(
+        SCIMDataContainer, "getter", lambda *args, **kwargs: pytest.fail("getter built")
+    )
+
+    assert get_value({"NICKNAME": "Babs"}, AttrRep(attr="nickName")) == "Babs"
+
+
+def test_lazy_container_wraps_data_only_when_accessed(user_data_dump):
+    container = SCIMDataContainer(user_data_dump, lazy=True)
+
+    assert "_data" not in vars(container)
+
+    name = container["name"]
+
+    assert isinstance(name, SCIMDataContainer)
+    assert "_data" in vars(container)
+    assert "_data" not in vars(name)
+    assert all("_data" not in vars(item) for item in container["emails"])
+
+
+def test_lazy_container_is_the_same_as_eager_one(user_data_dump):
+    container = SCIMDataContainer(user_data_dump, lazy=True)
+
+    assert container.to_dict() == SCIMDataContainer(user_data_dump).to_dict()
+
+
+def test_lazy_container_is_compared_like_eager_one():
+    data = {"userName": "bjensen", "name": {"givenName": "Barbara"}, "emails": [{"value": "a"}]}
+
+    assert SCIMDataContainer(data, lazy=True) == SCIMDataContainer(data)
+    assert SCIMDataContainer(data) == SCIMDataContainer(data, lazy=True)
+    assert SCIMDataContainer(data, lazy=True) == data
+
+
+def test_lazy_container_does_not_modify_source_dict():
+    data = {"name": {"givenName": "Barbara"}, "emails": [{"value": "bjensen@example.com"}]}
+    container = SCIMDataContainer(data, lazy=True)
+
+    container["name.familyName"] = "Jensen"
+    container["emails.type"] = ["work"]
+    del container["name.givenName"]
+
+    assert data == {"name": {"givenName": "Barbara"}, "emails": [{"value": "bjensen@example.com"}]}
+    assert container.to_dict() == {
+        "name": {"familyName": "Jensen"},
+        "emails": [{"value": "bjensen@example.com", "type": "work"}],
+    }
+
+
+def test_lazy_container_can_be_pickled(user_data_dump):
+    container = SCIMDataContainer(user_data_dump, lazy=True)
+
+    unpickled = pickle.loads(pickle.dumps(container))
+
+    assert unpickled.to_dict() == SCIMDataContainer(user_data_dump).to_dict()
+
+
+@pytest.mark.parametrize(
+    ("attr_rep_1", "attr_rep_2"),
+    (
+        ("userName", "USERNAME"),
+        ("userName", "urn:ietf:params:scim:schemas:core:2.0:User:username"),
+        ("name.givenName", "Name.GivenName"),
+        (
+            "urn:ietf:params:scim:schemas:core:2.0:User:name.givenName",
+            "URN:IETF:PARAMS:SCIM:SCHEMAS:CORE:2.0:USER:name.givenname",
+        ),
+    ),
+)
+def test_equal_attr_reps_have_equal_hashes(attr_rep_1, attr_rep_2):
+    attr_rep_1, attr_rep_2 = AttrRep.parse(attr_rep_1), AttrRep.parse(attr_rep_2)
+
+    assert attr_rep_1 == attr_rep_2
+    assert hash(attr_rep_1) == hash(attr_rep_2)
+    assert {attr_rep_1: "value"}[attr_rep_2] == "value"
+
+
+def test_attr_reps_with_different_schemas_are_not_equal():
+    attr_rep_1 = AttrRep.parse("urn:ietf:params:scim:schemas:core:2.0:User:userName")
+    attr_rep_2 = AttrRep.parse("urn:ietf:params:scim:schemas:core:2.0:Group:userName")
+
+    assert attr_rep_1 != attr_rep_2
+    assert attr_rep_2 not in {attr_rep_1}
+
+
+def test_parsed_attr_reps_are_shared():
+    assert AttrRep.parse("meta.version") is AttrRep.parse("meta.version")
+    assert AttrRep.parse("bad..name") is Invalid
+
+
+def test_attr_rep_can_be_pickled():
+    attr_rep = AttrRep(
+        schema="urn:ietf:params:scim:schemas:core:2.0:User", attr="name", sub_attr="givenName"
+    )
+
+    unpickled = pickle.loads(pickle.dumps(attr_rep))
+
+    assert unpickled == attr_rep
+    assert repr(unpickled) == repr(attr_rep)
+    assert not hasattr(unpickled, "__dict__")
+
+
+def test_value_index_is_built_once_and_dropped_after_modification(monkeypatch):
+    monkeypatch.setattr(ValueIndex, "min_items", 2)
+    data = SCIMDataContainer(
+        {"members": [{"value": "A", "display": "a"}, {"value": "b"}, {"display": "c"}]}
+    )
+    members = data["members"]
+
+    index = get_value_index(members, AttrRep(attr="value"), lower=True)
+
+    assert index is get_value_index(members, AttrRep(attr="value"), lower=True)
+    assert "a" in index and "b" in index and "A" not in index
+    assert index.present and index.has_value and index.has_missing
+    assert "A" in get_value_index(members, AttrRep(attr="value"), lower=False)
+
+    members[2]["value"] = "c"
+
+    rebuilt = get_value_index(members, AttrRep(attr="value"), lower=True)
+    assert rebuilt is not index
+    assert "c" in rebuilt and not rebuilt.has_missing
+
+
+@pytest.mark.parametrize("copied_before_indexing", (True, False))
+def test_value_index_is_dropped_after_modification_through_copy(
+    monkeypatch, copied_before_indexing
+):
+    monkeypatch.setattr(ValueIndex, "min_items", 2)
+    data = SCIMDataContainer({"members": [{"value": "a"}, {"value": "b"}, {"value": "c"}]})
+    members = data["members"]
+    copy = SCIMDataContainer(members[1]) if copied_before_indexing else None
+    index = get_value_index(members, AttrRep(attr="value"), lower=True)
+    copy = copy or SCIMDataContainer(members[1])
+
+    copy["value"] = "changed"
+
+    rebuilt = get_value_index(members, AttrRep(attr="value"), lower=True)
+    assert rebuilt is not index
+    assert "changed" in rebuilt and "b" not in rebuilt
+
+
+@pytest.mark.parametrize(
+    "members",
+    (
+        [{"value": "a"}],
+        [{"value": "a"}, "b"],
+        [{"value": "a"}, {"value": {"unhashable": "value"}}],
+    ),
+)
+def test_value_index_is_not_built_if_values_can_not_be_indexed(monkeypatch, members):
+    monkeypatch.setattr(ValueIndex, "min_items", 2)
+    data = SCIMDataContainer({"members": members})
+
+    assert get_value_index(data["members"], AttrRep(attr="value"), lower=True) is None
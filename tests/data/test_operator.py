@@ -1,7 +1,9 @@
+import pickle
 from datetime import datetime
 
 import pytest
 
+from src.assets.schemas.user import User
 from src.data.container import AttrRep, SCIMDataContainer
 from src.data.operator import (
     And,
@@ -13,12 +15,14 @@ from src.data.operator import (
     GreaterThanOrEqual,
     LesserThan,
     LesserThanOrEqual,
+    MatchResult,
     MatchStatus,
     Not,
     NotEqual,
     Or,
     Present,
     StartsWith,
+    _compile_adaptive,
 )
 from tests.conftest import SchemaForTests
 
@@ -963,3 +967,106 @@ def test_multivalued_complex_op_can_be_used_with_logical_op():
     )
 
     assert match
+
+
+def test_bound_operator_does_not_match_if_attr_missing_in_schema():
+    operator, issues = Equal(AttrRep.parse("other_int"), 1).bind(SchemaForTests().attrs)
+
+    match = operator.match(1, SchemaForTests().attrs)
+
+    assert issues.to_dict() == {}
+    assert match.status == MatchStatus.FAILED_NO_ATTR
+
+
+@pytest.mark.parametrize(("value", "expected"), (("A", True), ("b", False)))
+def test_bound_operator_compares_case_insensitive_values(value, expected):
+    operator, _ = Equal(AttrRep.parse("str"), "a").bind(SchemaForTests().attrs)
+
+    match = operator.match(value, SchemaForTests().attrs)
+
+    assert bool(match) is expected
+
+
+def test_adaptive_match_evaluates_decisive_operand_first_after_sampling():
+    calls = []
+
+    def passes(_):
+        calls.append("passes")
+        return MatchStatus.PASSED
+
+    def fails(_):
+        calls.append("fails")
+        return MatchStatus.FAILED
+
+    match = _compile_adaptive([passes, fails], decisive=MatchStatus.FAILED)
+    statuses = [match(None) for _ in range(40)]
+    calls.clear()
+
+    status = match(None)
+
+    assert set(statuses) == {MatchStatus.FAILED}
+    assert status == MatchStatus.FAILED
+    assert calls == ["fails"]
+
+
+@pytest.mark.parametrize(
+    ("statuses", "decisive", "expected"),
+    (
+        (("MISSING_DATA", "PASSED"), "FAILED", "MISSING_DATA"),
+        (("MISSING_DATA", "FAILED"), "FAILED", "FAILED"),
+        (("FAILED_NO_ATTR", "PASSED"), "FAILED", "PASSED"),
+        (("MISSING_DATA", "FAILED"), "PASSED", "MISSING_DATA"),
+        (("MISSING_DATA", "PASSED"), "PASSED", "PASSED"),
+        (("FAILED_NO_ATTR", "FAILED"), "PASSED", "FAILED"),
+    ),
+)
+def test_adaptive_match_status_does_not_depend_on_operands_order(statuses, decisive, expected):
+    match = _compile_adaptive(
+        [lambda _, s=MatchStatus(s): s for s in statuses], decisive=MatchStatus(decisive)
+    )
+
+    assert {match(None) for _ in range(100)} == {MatchStatus(expected)}
+
+
+def test_adaptive_match_falls_back_to_original_order_if_reordered_operand_raises():
+    def fails_for_bad_data(value):
+        return MatchStatus.FAILED if value == "bad" else MatchStatus.PASSED
+
+    def raises_for_bad_data(value):
+        if value == "bad":
+            raise TypeError
+        return MatchStatus.FAILED
+
+    match = _compile_adaptive([fails_for_bad_data, raises_for_bad_data], MatchStatus.FAILED)
+    for _ in range(40):
+        match("good")
+
+    assert match("bad") == MatchStatus.FAILED
+
+
+def test_match_results_are_shared():
+    operator, _ = Equal(AttrRep.parse("str"), "a").bind(SchemaForTests().attrs)
+
+    assert operator.match("a", SchemaForTests().attrs) is MatchResult.passed()
+    assert operator.match("b", SchemaForTests().attrs) is MatchResult.failed()
+    assert MatchResult.of(MatchStatus.PASSED) is MatchResult.passed()
+
+
+def test_unbound_operator_matches_values_of_attribute_it_is_matched_with():
+    operator = Equal(AttrRep.parse("userName"), "BJensen")
+    case_insensitive = User().attrs
+    case_exact = SchemaForTests().attrs
+
+    assert operator.match("bjensen", case_insensitive).status == MatchStatus.PASSED
+    assert operator.match("bjensen", case_exact).status == MatchStatus.FAILED
+    assert operator.match("bjensen", case_insensitive).status == MatchStatus.PASSED
+    assert vars(operator) == {"_attr_rep": operator.attr_rep, "_value": "BJensen"}
+
+
+def test_bound_operator_can_be_pickled():
+    operator, _ = Equal(AttrRep.parse("userName"), "BJensen").bind(User().attrs)
+
+    unpickled = pickle.loads(pickle.dumps(operator))
+
+    assert unpickled.match("bjensen", User().attrs).status == MatchStatus.PASSED
+    assert unpickled.match("mandy", User().attrs).status == MatchStatus.FAILED
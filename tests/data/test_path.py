@@ -217,3 +217,20 @@ def test_complex_filter_string_values_can_contain_anything(path, expected_filter
 
     assert issues.to_dict(msg=True) == {}
     assert parsed.complex_filter.operator.sub_operator.value == expected_filter_value
+
+
+@pytest.mark.parametrize(
+    "path",
+    (
+        "name.familyName",
+        "urn:ietf:params:scim:schemas:core:2.0:User:userName",
+        'emails[type eq "work" and value co "@example.com"]',
+        'emails[type eq "work"].value',
+        'urn:ietf:params:scim:schemas:core:2.0:User:emails[type eq "work"].display',
+    ),
+)
+def test_patch_path_is_rebuilt_from_dict_and_bytes(path):
+    parsed, _ = PatchPath.parse(path)
+
+    assert PatchPath.from_dict(parsed.to_dict()) == parsed
+    assert PatchPath.from_bytes(parsed.to_bytes()) == parsed
@@ -0,0 +1,147 @@
+import pytest
+
+from src.cache import ParseCache
+from src.data.container import Invalid
+from src.data.path import PatchPath
+from src.error import ValidationError, ValidationIssues
+from src.filter import Filter
+from src.sorter import Sorter
+
+
+@pytest.fixture
+def enabled_parse_caches():
+    caches = [Filter.parse_cache, Sorter.parse_cache, PatchPath.parse_cache]
+    for cache in caches:
+        cache.resize(16)
+    yield
+    for cache in caches:
+        cache.resize(0)
+        cache.clear()
+
+
+def test_cache_is_disabled_by_default():
+    cache = ParseCache()
+
+    cache.set("key", "parsed", ValidationIssues())
+
+    assert not cache.enabled
+    assert cache.get("key") is None
+    assert len(cache) == 0
+    assert cache.misses == 0
+
+
+def test_cached_result_is_returned_on_hit():
+    cache = ParseCache(max_size=2)
+    cache.set("key", "parsed", ValidationIssues())
+
+    parsed, issues = cache.get("key")
+
+    assert parsed == "parsed"
+    assert issues.to_dict() == {}
+    assert cache.hits == 1
+    assert cache.misses == 0
+
+
+def test_miss_is_counted():
+    cache = ParseCache(max_size=2)
+
+    assert cache.get("key") is None
+    assert cache.misses == 1
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ParseCache(max_size=2)
+    cache.set("a", 1, ValidationIssues())
+    cache.set("b", 2, ValidationIssues())
+    cache.get("a")
+
+    cache.set("c", 3, ValidationIssues())
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+    assert cache.evictions == 1
+
+
+def test_shrinking_cache_evicts_entries():
+    cache = ParseCache(max_size=3)
+    for key in "abc":
+        cache.set(key, key, ValidationIssues())
+
+    cache.resize(1)
+
+    assert len(cache) == 1
+    assert cache.evictions == 2
+    assert cache.get("c") is not None
+
+
+def test_cache_can_be_turned_off():
+    cache = ParseCache(max_size=3)
+    cache.set("a", 1, ValidationIssues())
+
+    cache.resize(0)
+
+    assert not cache.enabled
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_cached_issues_can_not_be_modified_by_callers():
+    cache = ParseCache(max_size=1)
+    issues = ValidationIssues()
+    issues.add(issue=ValidationError.bad_attribute_name("a..b"), proceed=False)
+    cache.set("key", Invalid, issues)
+
+    _, issues_ = cache.get("key")
+    issues_.pop((), code=111)
+
+    _, issues_ = cache.get("key")
+    assert issues_.to_dict() == {"_errors": [{"code": 111}]}
+
+
+def test_negative_cache_size_is_rejected():
+    with pytest.raises(ValueError):
+        ParseCache(max_size=-1)
+
+
+@pytest.mark.usefixtures("enabled_parse_caches")
+def test_filter_parsing_result_is_cached():
+    filter_exp = 'userName eq "bjensen"'
+
+    filter_1, _ = Filter.parse(filter_exp)
+    filter_2, issues = Filter.parse(filter_exp)
+
+    assert filter_1 is filter_2
+    assert issues.to_dict() == {}
+    assert Filter.parse_cache.hits == 1
+    assert Filter.parse_cache.misses == 1
+
+
+@pytest.mark.usefixtures("enabled_parse_caches")
+def test_filter_parsing_issues_are_cached():
+    Filter.parse("userName eq")
+    filter_, issues = Filter.parse("userName eq")
+
+    assert filter_ is Invalid
+    assert issues.to_dict() == {"_errors": [{"code": 104}]}
+    assert Filter.parse_cache.hits == 1
+
+
+@pytest.mark.usefixtures("enabled_parse_caches")
+def test_sorter_parsing_result_is_cached_per_sort_order():
+    sorter_1, _ = Sorter.parse("userName", asc=True)
+    sorter_2, _ = Sorter.parse("userName", asc=True)
+    sorter_3, _ = Sorter.parse("userName", asc=False)
+
+    assert sorter_1 is sorter_2
+    assert sorter_3.asc is False
+    assert Sorter.parse_cache.hits == 1
+
+
+@pytest.mark.usefixtures("enabled_parse_caches")
+def test_patch_path_parsing_result_is_cached():
+    path_1, _ = PatchPath.parse('members[value eq "2819c223"].display')
+    path_2, _ = PatchPath.parse('members[value eq "2819c223"].display')
+
+    assert path_1 is path_2
+    assert PatchPath.parse_cache.hits == 1
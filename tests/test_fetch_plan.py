@@ -0,0 +1,112 @@
+import pytest
+
+from src.assets.schemas.user import User
+from src.attributes_presence import AttributePresenceChecker
+from src.data.container import AttrRep
+from src.fetch_plan import get_fetch_plan
+from src.filter import Filter
+from src.sorter import Sorter
+
+CORE = "urn:ietf:params:scim:schemas:core:2.0:User"
+ENTERPRISE = "urn:ietf:params:scim:schemas:extension:enterprise:2.0:User"
+
+
+def _get_names(attr_reps):
+    return [str(attr_rep).rsplit(":", 1)[1] for attr_rep in attr_reps]
+
+
+def test_all_attributes_returned_by_default_are_fetched():
+    plan = get_fetch_plan(User())
+
+    assert _get_names(plan) == [
+        "schemas",
+        "id",
+        "externalId",
+        "meta",
+        "userName",
+        "name",
+        "displayName",
+        "nickName",
+        "profileUrl",
+        "title",
+        "userType",
+        "preferredLanguage",
+        "locale",
+        "timezone",
+        "active",
+        "emails",
+        "phoneNumbers",
+        "ims",
+        "photos",
+        "addresses",
+        "groups",
+        "entitlements",
+        "roles",
+        "x509Certificates",
+        "employeeNumber",
+        "costCenter",
+        "division",
+        "department",
+        "organization",
+        "manager",
+    ]
+    assert str(plan[-1]) == f"{ENTERPRISE}:manager"
+
+
+@pytest.mark.parametrize(
+    ("filter_exp", "sort_by", "attr_reps", "expected"),
+    (
+        (None, None, ["userName"], ["schemas", "id", "userName"]),
+        (None, None, ["name.givenName"], ["schemas", "id", "name.givenName"]),
+        (
+            'title pr and emails[type eq "work"]',
+            "nickName",
+            ["userName", "name"],
+            ["schemas", "id", "userName", "name", "nickName", "title", "emails.type"],
+        ),
+        (
+            'name.givenName sw "B" and nonExisting pr',
+            "emails",
+            ["name.familyName", "password"],
+            [
+                "schemas",
+                "id",
+                "name.familyName",
+                "name.givenName",
+                "emails.value",
+                "emails.primary",
+            ],
+        ),
+        ('emails co "@"', None, ["emails"], ["schemas", "id", "emails"]),
+        ("password pr", None, ["userName"], ["schemas", "id", "userName", "password"]),
+    ),
+)
+def test_requested_attributes_and_referenced_ones_are_fetched(
+    filter_exp, sort_by, attr_reps, expected
+):
+    filter_ = Filter.parse(filter_exp)[0] if filter_exp else None
+    sorter = Sorter(AttrRep.parse(sort_by)) if sort_by else None
+    checker, _ = AttributePresenceChecker.parse(attr_reps, include=True)
+
+    plan = get_fetch_plan(User(), filter_, sorter, checker)
+
+    assert _get_names(plan) == expected
+
+
+def test_excluded_attributes_are_not_fetched_unless_referenced():
+    filter_, _ = Filter.parse('addresses[type eq "work"] and x509Certificates pr')
+    checker, _ = AttributePresenceChecker.parse(
+        ["photos", "x509Certificates", "addresses", "name.formatted", "id"], include=False
+    )
+
+    plan = get_fetch_plan(User(), filter_, presence_checker=checker)
+
+    names = _get_names(plan)
+    assert "photos" not in names
+    assert "name" not in names
+    assert "id" in names
+    assert names[names.index("name.familyName") - 1] == "userName"
+    assert "name.formatted" not in names
+    assert "addresses.type" in names
+    assert "x509Certificates.value" in names
+    assert f"{CORE}:addresses.type" in [str(attr_rep) for attr_rep in plan]
@@ -1,7 +1,15 @@
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import List
+
 import pytest
 
-from src.data.container import Invalid
-from src.filter import Filter
+from src.assets.schemas.group import Group
+from src.assets.schemas.user import User
+from src.data.attributes import Attributes
+from src.data.container import Invalid, SCIMDataContainer, ValueIndex
+from src.data.operator import MatchStatus, _compile_substrings_matcher
+from src.filter import Filter, FilterLimits, SlowFilterHook
 
 
 @pytest.mark.parametrize(
@@ -1169,6 +1177,26 @@ def test_number_of_complex_attribute_brackets_must_match(filter_exp, expected_is
     assert issues.to_dict() == expected_issues
 
 
+@pytest.mark.parametrize(
+    ("filter_exp", "expected_issues"),
+    (
+        ('(userName eq ")', {"_errors": [{"code": 100}]}),
+        ("(userName eq ')", {"_errors": [{"code": 100}]}),
+        ('title pr and (userName eq "a) or title pr', {"_errors": [{"code": 100}]}),
+        ('emails[value eq "]', {"_errors": [{"code": 102}]}),
+        ('emails[value eq "] and title pr', {"_errors": [{"code": 102}]}),
+        ('userName eq "', {"_errors": [{"code": 112}]}),
+        ('userName eq "abc', {"_errors": [{"code": 112}]}),
+        ('userName eq "a" and title eq "', {"_errors": [{"code": 112}]}),
+    ),
+)
+def test_unterminated_string_literal_is_not_parsed(filter_exp, expected_issues):
+    filter_, issues = Filter.parse(filter_exp)
+
+    assert filter_ is Invalid
+    assert issues.to_dict() == expected_issues
+
+
 @pytest.mark.parametrize(
     ("filter_exp", "expected"),
     (
@@ -2398,3 +2426,1100 @@ def test_placing_filters_in_string_values_does_not_break_parsing(filter_exp, exp
 
     assert issues.to_dict(msg=True) == {}
     assert filter_.to_dict() == expected
+
+
+def test_long_chain_of_or_operators_is_parsed_into_single_operator():
+    filter_exp = " or ".join(f'id eq "user-{i}"' for i in range(1000))
+
+    filter_, issues = Filter.parse(filter_exp)
+
+    assert issues.to_dict(msg=True) == {}
+    assert filter_.to_dict() == {
+        "op": "or",
+        "sub_ops": [{"op": "eq", "attr_rep": "id", "value": f"user-{i}"} for i in range(1000)],
+    }
+
+
+def test_logical_operator_directly_after_string_value_is_recognized():
+    expected = {
+        "op": "and",
+        "sub_ops": [
+            {"op": "eq", "attr_rep": "userName", "value": "bjensen"},
+            {"op": "not", "sub_op": {"op": "pr", "attr_rep": "title"}},
+        ],
+    }
+
+    filter_, issues = Filter.parse('userName eq "bjensen"and not(title pr)')
+
+    assert issues.to_dict(msg=True) == {}
+    assert filter_.to_dict() == expected
+
+
+def test_not_closed_complex_attribute_bracket_at_the_beginning_is_discovered():
+    filter_, issues = Filter.parse('[type eq "work"')
+
+    assert filter_ is Invalid
+    assert issues.to_dict() == {"_errors": [{"code": 102}]}
+
+
+@pytest.fixture
+def filter_templates():
+    yield Filter.templates
+    Filter.templates.clear()
+
+
+@pytest.mark.parametrize(
+    ("template", "values", "filter_exp"),
+    (
+        ("userName eq ?", ("bjensen",), 'userName eq "bjensen"'),
+        (
+            "emails[type eq ? and value co ?]",
+            ("work", "@example.com"),
+            'emails[type eq "work" and value co "@example.com"]',
+        ),
+        (
+            "name.givenName sw ? or not (age gt ?)",
+            ("Ba", 18),
+            'name.givenName sw "Ba" or not (age gt 18)',
+        ),
+        (
+            'userName eq "bjensen" and active eq ?',
+            (True,),
+            'userName eq "bjensen" and active eq true',
+        ),
+        ("title pr", (), "title pr"),
+    ),
+)
+def test_bound_prepared_filter_is_equal_to_parsed_filter(template, values, filter_exp):
+    prepared, issues = Filter.prepare(template)
+    assert issues.to_dict(msg=True) == {}
+    assert prepared.n_parameters == len(values)
+
+    filter_, issues = prepared.bind(*values)
+
+    assert issues.to_dict(msg=True) == {}
+    assert filter_.to_dict() == Filter.parse(filter_exp)[0].to_dict()
+
+
+def test_static_part_of_prepared_filter_is_shared_between_bound_filters():
+    prepared, _ = Filter.prepare('userName eq "bjensen" or id eq ?')
+
+    filter_1, _ = prepared.bind("1")
+    filter_2, _ = prepared.bind("2")
+
+    assert filter_1.operator.sub_operators[0] is filter_2.operator.sub_operators[0]
+    assert filter_1.operator.sub_operators[1].value == "1"
+    assert filter_2.operator.sub_operators[1].value == "2"
+
+
+def test_binding_value_not_compatible_with_operator_fails():
+    prepared, _ = Filter.prepare("userName co ?")
+
+    filter_, issues = prepared.bind(1)
+
+    assert filter_ is Invalid
+    assert issues.to_dict() == {"_errors": [{"code": 113}]}
+
+
+def test_binding_wrong_number_of_values_fails():
+    prepared, _ = Filter.prepare("userName eq ? and id eq ?")
+
+    with pytest.raises(ValueError):
+        prepared.bind("bjensen")
+
+
+@pytest.mark.parametrize(
+    ("template", "expected_issues"),
+    (
+        ("? eq 1", {"_errors": [{"code": 111}]}),
+        ("userName ? 1", {"_errors": [{"code": 105}]}),
+        ("userName pr ?", {"_errors": [{"code": 105}]}),
+    ),
+)
+def test_parameter_can_be_used_only_as_comparison_value(template, expected_issues):
+    prepared, issues = Filter.prepare(template)
+
+    assert prepared is Invalid
+    assert issues.to_dict() == expected_issues
+
+
+def test_parameter_is_bad_comparison_value_in_regular_filter():
+    filter_, issues = Filter.parse("userName eq ?")
+
+    assert filter_ is Invalid
+    assert issues.to_dict() == {"_errors": [{"code": 112}]}
+
+
+def test_filter_matching_registered_template_is_bound_to_it(filter_templates):
+    prepared, _ = Filter.prepare('emails[type eq "work" and value co ?]')
+    filter_templates.add(prepared)
+
+    filter_, issues = Filter.parse("emails[type eq \"work\"   and value co 'example.com']")
+
+    assert issues.to_dict(msg=True) == {}
+    assert filter_.to_dict() == {
+        "op": "complex",
+        "attr_rep": "emails",
+        "sub_op": {
+            "op": "and",
+            "sub_ops": [
+                {"op": "eq", "attr_rep": "type", "value": "work"},
+                {"op": "co", "attr_rep": "value", "value": "example.com"},
+            ],
+        },
+    }
+    assert filter_templates.usage == {'emails[type eq "work" and value co ?]': 1}
+    assert filter_templates.misses == 0
+
+
+@pytest.mark.parametrize(
+    "filter_exp",
+    (
+        'emails[type eq "home" and value co "example.com"]',
+        'emails[type eq "work" or value co "example.com"]',
+        'emails[type eq "work" and value co ?]',
+    ),
+)
+def test_filter_not_matching_registered_template_is_parsed(filter_templates, filter_exp):
+    prepared, _ = Filter.prepare('emails[type eq "work" and value co ?]')
+    filter_templates.add(prepared)
+
+    Filter.parse(filter_exp)
+
+    assert filter_templates.usage == {}
+    assert filter_templates.misses == 1
+
+
+@pytest.mark.parametrize(
+    "limits",
+    (
+        FilterLimits(max_clauses=1),
+        FilterLimits(max_literals=2),
+        FilterLimits(max_depth=0),
+        FilterLimits(max_length=20),
+    ),
+)
+def test_filter_matching_template_is_rejected_if_exceeding_limits(filter_templates, limits):
+    prepared, _ = Filter.prepare("userName eq ? or (userName eq ?) or userName eq ?")
+    filter_templates.add(prepared)
+
+    filter_, issues = Filter.parse(
+        'userName eq "x" or (userName eq "y") or userName eq "z"', limits=limits
+    )
+
+    assert filter_ is Invalid
+    assert issues.to_dict() == {"_errors": [{"code": 116}]}
+    assert filter_templates.usage == {}
+
+
+SCHEMA_BINDABLE_FILTERS = (
+    'userName eq "BJENSEN@example.com"',
+    'userName sw "bjensen" and not (title pr)',
+    'emails[type eq "work" and value ew "EXAMPLE.COM"]',
+    'emails co "jensen.org"',
+    'name.givenName eq "Barbara" or nickName eq "Babs"',
+    "active eq true and not (nonExisting pr)",
+    'nonExisting[value eq "x"] or title pr',
+    'urn:ietf:params:scim:schemas:extension:enterprise:2.0:User:employeeNumber eq "1"',
+    'meta.created gt "2010-01-23T04:56:22+00:00"',
+    'meta.lastModified le "2011-01-23T04:56:22+00:00"',
+    'not (nickName eq "Babs" and emails[type eq "home" and display pr])',
+    'addresses[not (locality pr)] or ims[value pr]',
+    "title pr and not (title eq null)",
+)
+
+
+@pytest.mark.parametrize("filter_exp", SCHEMA_BINDABLE_FILTERS)
+@pytest.mark.parametrize("strict", (True, False))
+def test_bound_filter_matches_the_same_as_unbound_filter(
+    user_data_for_matching, filter_exp, strict
+):
+    data = user_data_for_matching
+    filter_, _ = Filter.parse(filter_exp)
+
+    bound, issues = filter_.bind(User())
+
+    assert issues.to_dict(msg=True) == {}
+    assert bound.schema is not None
+    assert bound(data, strict=strict).status == filter_(data, User(), strict).status
+
+
+def test_bound_filter_does_not_look_up_attributes_when_matching(user_data_dump, monkeypatch):
+    filter_, _ = Filter.parse('emails[type eq "work"] and userName sw "BJ"')
+    bound, _ = filter_.bind(User())
+    monkeypatch.setattr(
+        Attributes, "get", lambda *args, **kwargs: pytest.fail("attribute looked up")
+    )
+
+    assert bound(SCIMDataContainer(user_data_dump))
+
+
+def test_unbound_filter_binds_its_operators_once_per_schema(user_data_dump, monkeypatch):
+    filter_, _ = Filter.parse('emails[type eq "work"] and userName sw "BJ"')
+    operator_state = vars(filter_.operator.sub_operators[1]).copy()
+    user_schema, group_schema = User(), Group()
+    data = SCIMDataContainer(user_data_dump)
+
+    expected = [filter_(data, user_schema).status, filter_(data, group_schema).status]
+
+    monkeypatch.setattr(
+        Attributes, "get", lambda *args, **kwargs: pytest.fail("attribute looked up")
+    )
+    assert [filter_(data, user_schema).status, filter_(data, group_schema).status] == expected
+    assert expected[0] == MatchStatus.PASSED
+    assert vars(filter_.operator.sub_operators[1]) == operator_state
+
+
+def test_bound_filter_comparison_value_is_prepared_for_attribute():
+    filter_, _ = Filter.parse('userName eq "BJensen" and meta.created gt "2011-05-13T04:42:34Z"')
+
+    schema = User()
+
+    bound, _ = filter_.bind(schema)
+
+    assert bound.operator.sub_operators[0].attr is schema.attrs.userName
+    assert bound.operator.sub_operators[0]._op_value == "bjensen"
+    assert bound.operator.sub_operators[1].sub_operator._op_value == datetime(
+        2011, 5, 13, 4, 42, 34, tzinfo=timezone.utc
+    )
+
+
+@pytest.mark.parametrize(
+    "filter_exp",
+    (
+        "userName eq 1",
+        'active eq "true"',
+        "active gt 1",
+        "name.givenName gt 1",
+        'meta.created gt "yesterday"',
+        'name gt "a"',
+        'emails[type eq "work" and primary eq "yes"]',
+        'not (userName eq "a" or x509Certificates eq 1)',
+    ),
+)
+def test_binding_filter_with_non_compatible_comparison_fails(filter_exp):
+    filter_, _ = Filter.parse(filter_exp)
+
+    bound, issues = filter_.bind(User())
+
+    assert bound is Invalid
+    assert issues.to_dict() == {"_errors": [{"code": 114}]}
+
+
+@pytest.mark.parametrize(
+    ("filter_exp", "expected"),
+    (
+        ("userName eq 1", MatchStatus.FAILED),
+        ("userName eq 1 or title pr", MatchStatus.PASSED),
+        ("not (userName eq 1)", MatchStatus.PASSED),
+    ),
+)
+def test_unbound_filter_that_can_not_be_bound_is_matched(filter_exp, expected):
+    filter_, _ = Filter.parse(filter_exp)
+    data = SCIMDataContainer({"userName": "bjensen", "title": "Tour Guide"})
+
+    assert filter_(data, User()).status == expected
+
+
+def test_matching_unbound_filter_without_schema_fails():
+    filter_, _ = Filter.parse("userName pr")
+
+    with pytest.raises(ValueError):
+        filter_(SCIMDataContainer({"userName": "bjensen"}))
+
+
+@pytest.fixture
+def user_data_for_matching(user_data_dump):
+    data = SCIMDataContainer(user_data_dump)
+    data["meta"]["created"] = data["meta"]["created"].isoformat()
+    data["meta"]["lastModified"] = data["meta"]["lastModified"].isoformat()
+    return data
+
+
+@pytest.mark.parametrize("filter_exp", SCHEMA_BINDABLE_FILTERS)
+@pytest.mark.parametrize("strict", (True, False))
+@pytest.mark.parametrize("missing_attr", (None, "title", "nickName", "emails", "meta", "name"))
+def test_compiled_filter_matches_the_same_as_filter(
+    user_data_for_matching, filter_exp, strict, missing_attr
+):
+    data = user_data_for_matching
+    if missing_attr is not None:
+        del data[missing_attr]
+    filter_, _ = Filter.parse(filter_exp)
+
+    compiled, issues = filter_.compile(User(), strict)
+
+    assert issues.to_dict(msg=True) == {}
+    assert compiled(data).status == filter_(data, User(), strict).status
+
+
+@pytest.fixture
+def users_for_matching(user_data_for_matching):
+    users = [user_data_for_matching]
+    for missing_attr in ("title", "nickName", "emails", "meta", "name", "userName"):
+        users.append(SCIMDataContainer(user_data_for_matching.to_dict()))
+        del users[-1][missing_attr]
+    users.append(SCIMDataContainer(user_data_for_matching.to_dict()))
+    users[-1]["userName"] = "Babs"
+    users[-1]["emails"][1]["type"] = "work"
+    return users
+
+
+@pytest.mark.parametrize("filter_exp", SCHEMA_BINDABLE_FILTERS)
+@pytest.mark.parametrize("strict", (True, False))
+def test_adaptive_compiled_filter_matches_the_same_as_filter(
+    users_for_matching, filter_exp, strict
+):
+    filter_, _ = Filter.parse(filter_exp)
+
+    compiled, issues = filter_.compile(User(), strict, adaptive=True)
+
+    assert issues.to_dict(msg=True) == {}
+    assert compiled.adaptive
+    for _ in range(10):
+        for user in users_for_matching:
+            assert compiled(user).status == filter_(user, User(), strict).status
+
+
+@pytest.mark.parametrize(
+    "filter_exp",
+    SCHEMA_BINDABLE_FILTERS
+    + (
+        'userName eq "x" or userName eq "babs" or userName sw "bj"',
+        'emails[value co "z" or value co "jensen.org"] or nickName eq "babs"',
+        'userName eq 1 or title pr',
+    ),
+)
+@pytest.mark.parametrize("strict", (True, False))
+def test_matching_many_resources_gives_the_same_results_as_filter(
+    users_for_matching, filter_exp, strict
+):
+    filter_, _ = Filter.parse(filter_exp)
+    expected = [
+        filter_(user, User(), strict).status == MatchStatus.PASSED for user in users_for_matching
+    ]
+
+    assert filter_.match_many(users_for_matching, User(), strict) == expected
+
+
+@pytest.mark.parametrize("filter_exp", SCHEMA_BINDABLE_FILTERS + ("emails pr", "ims[type pr]"))
+@pytest.mark.parametrize("strict", (True, False))
+def test_plain_dicts_are_matched_the_same_as_containers(users_for_matching, filter_exp, strict):
+    filter_, _ = Filter.parse(filter_exp)
+    compiled, _ = filter_.compile(User(), strict)
+    dicts = [user.to_dict() for user in users_for_matching]
+
+    for user, user_dict in zip(users_for_matching, dicts):
+        expected = filter_(user, User(), strict).status
+        assert filter_(user_dict, User(), strict).status == expected
+        assert compiled(user_dict).status == expected
+    assert filter_.match_many(dicts, User(), strict) == filter_.match_many(
+        users_for_matching, User(), strict
+    )
+
+
+def test_objects_are_matched_with_case_insensitive_attribute_lookup():
+    @dataclass
+    class Email:
+        value: str
+        type: str
+
+    @dataclass
+    class UserRow:
+        id: str
+        username: str
+        emails: List[Email]
+
+    rows = [
+        UserRow(id="1", username="bjensen", emails=[Email("bjensen@example.com", "work")]),
+        UserRow(id="2", username="babs", emails=[Email("babs@jensen.org", "home")]),
+    ]
+    filter_, _ = Filter.parse('userName sw "b" and emails[type eq "work" and value co "@"]')
+    compiled, _ = filter_.compile(User())
+
+    assert [bool(filter_(row, User())) for row in rows] == [True, False]
+    assert [bool(compiled(row)) for row in rows] == [True, False]
+    assert filter_.match_many(rows, User()) == [True, False]
+
+
+def test_matching_no_resources_gives_no_results():
+    filter_, _ = Filter.parse('userName eq "bjensen"')
+
+    assert filter_.match_many([], User()) == []
+
+
+def test_matching_many_resources_with_unbound_filter_without_schema_fails(users_for_matching):
+    filter_, _ = Filter.parse('userName eq "bjensen"')
+
+    with pytest.raises(ValueError):
+        filter_.match_many(users_for_matching)
+
+
+def test_compiling_filter_with_non_compatible_comparison_fails():
+    filter_, _ = Filter.parse("userName eq 1")
+
+    compiled, issues = filter_.compile(User())
+
+    assert compiled is Invalid
+    assert issues.to_dict() == {"_errors": [{"code": 114}]}
+
+
+def test_unbound_operator_can_not_be_compiled():
+    filter_, _ = Filter.parse("userName eq 1")
+
+    with pytest.raises(ValueError):
+        filter_.operator.compile()
+
+
+def _wide_or(template, values):
+    return " or ".join(template.format(value) for value in values)
+
+
+@pytest.mark.parametrize(
+    "filter_exp",
+    (
+        _wide_or('id eq "{}"', list(range(20)) + ["2819c223-7f76-453a-919d-4138619046"]),
+        _wide_or('id eq "{}"', list(range(20)) + ["2819c223-7f76-453a-919d-413861904646"]),
+        _wide_or('id eq "{}"', list(range(20)) + ["2819C223-7F76-453A-919D-413861904646"]),
+        _wide_or('userName eq "{}"', [f"{i}" for i in range(20)] + ["BJensen@example.com"]),
+        _wide_or('userName sw "{}"', [f"user-{i}" for i in range(20)] + ["BJENSEN"]),
+        _wide_or('userName ew "{}"', [f"{i}.org" for i in range(20)] + ["EXAMPLE.COM"]),
+        _wide_or('userName co "{}"', [f"-{i}-" for i in range(20)] + ["sen@ex"]),
+        _wide_or('userName co "{}"', [f"-{i}-" for i in range(20)]),
+        _wide_or('userName co "{}"', ["a", ""]),
+        _wide_or('emails.value co "{}"', [f"-{i}-" for i in range(20)] + ["@JENSEN.org"]),
+        _wide_or('emails[value ew "{}"]', [f"{i}.com" for i in range(20)] + ["jensen.ORG"]),
+        _wide_or('name.givenName sw "{}"', [f"{i}" for i in range(20)] + ["bar"]),
+        _wide_or('userName eq "{}"', range(20)) + ' or userName eq "bjensen@example.com"',
+        _wide_or('userName sw "{}"', range(20)) + ' or title pr or userName co "jensen"',
+        _wide_or('nickName eq "{}"', range(20)),
+        _wide_or('title sw "{}"', range(20)) + " or userName eq null",
+    ),
+)
+@pytest.mark.parametrize("strict", (True, False))
+@pytest.mark.parametrize("missing_attr", (None, "userName", "emails", "name"))
+def test_compiled_wide_or_filter_matches_the_same_as_filter(
+    user_data_for_matching, filter_exp, strict, missing_attr
+):
+    data = user_data_for_matching
+    if missing_attr is not None:
+        del data[missing_attr]
+    filter_, _ = Filter.parse(filter_exp)
+
+    compiled, issues = filter_.compile(User(), strict)
+
+    assert issues.to_dict(msg=True) == {}
+    assert compiled(data).status == filter_(data, User(), strict).status
+
+
+@pytest.mark.parametrize("value", ("", "abc", "xx-17-yy", "-1-", "--", "a-3-b-29-c", "-9"))
+def test_substrings_matcher_matches_the_same_as_checking_each_substring(value):
+    substrings = [f"-{i}-" for i in range(30)] + ["b-2", "-"]
+
+    for n in (1, 3, 10, len(substrings)):
+        matches_any = _compile_substrings_matcher(substrings[-n:])
+
+        assert matches_any(value) is any(s in value for s in substrings[-n:])
+
+
+@pytest.mark.parametrize(
+    ("filter_exp_1", "filter_exp_2"),
+    (
+        ('userName eq "a" and title pr', 'title pr and USERNAME eq "a"'),
+        ('(a eq 1 or b eq 2) or c pr', 'c pr or (b eq 2 or (a eq 1 or a eq 1))'),
+        ('emails[type eq "work" and value co "@"]', 'emails[value co "@" and (type eq "work")]'),
+        ('name.givenName eq "a"', 'name[givenName eq "a"]'),
+        ("not (title pr and nickName pr)", "not (nickName pr and title pr)"),
+    ),
+)
+def test_equivalent_filters_are_equal(filter_exp_1, filter_exp_2):
+    filter_1, _ = Filter.parse(filter_exp_1)
+    filter_2, _ = Filter.parse(filter_exp_2)
+
+    assert filter_1.canonical_exp == filter_2.canonical_exp
+    assert filter_1 == filter_2
+    assert {filter_1: "cached"}[filter_2] == "cached"
+
+
+@pytest.mark.parametrize(
+    ("filter_exp_1", "filter_exp_2"),
+    (
+        ('userName eq "a"', 'userName eq "A"'),
+        ('userName eq "a"', 'userName ne "a"'),
+        ("title pr", "title pr and title pr"),
+        ("not (not (title pr))", "title pr"),
+        (
+            'emails.type eq "work" and emails.value co "@"',
+            'emails[type eq "work" and value co "@"]',
+        ),
+        ("urn:ietf:params:scim:schemas:core:2.0:User:title pr", "title pr"),
+    ),
+)
+def test_non_equivalent_filters_are_not_equal(filter_exp_1, filter_exp_2):
+    filter_1, _ = Filter.parse(filter_exp_1)
+    filter_2, _ = Filter.parse(filter_exp_2)
+
+    assert filter_1 != filter_2
+
+
+@pytest.mark.parametrize(
+    ("filter_exp", "expected"),
+    (
+        ('(a eq 1 or (b eq 2 or c eq "x")) or a eq 1', 'a eq 1 or b eq 2 or c eq "x"'),
+        ("(a pr and b pr) and (c pr or d pr)", "a pr and b pr and (c pr or d pr)"),
+        ("not (not (not (a pr)))", "not (a pr)"),
+        ("not (not (a pr or b pr))", "not (not (a pr or b pr))"),
+        ("not (not (not (a pr) and not (b pr)))", "not (a pr) and not (b pr)"),
+        ("not (not (not (a eq 1) and not (b pr)))", "not (not (not (a eq 1) and not (b pr)))"),
+        ("a pr and (a pr)", "a pr and a pr"),
+        ("(a pr or b pr) and (b pr or a pr)", "a pr or b pr"),
+        ("x[b eq 1 and (a eq 2 and b eq 1)]", "x[a eq 2 and b eq 1]"),
+        ('value eq "it\'s"', 'value eq "it\'s"'),
+        ("value eq 'say \"hi\"'", "value eq 'say \"hi\"'"),
+    ),
+)
+def test_filter_is_simplified(filter_exp, expected):
+    filter_, _ = Filter.parse(filter_exp)
+
+    simplified = filter_.simplify()
+
+    assert simplified.canonical_exp == expected
+    assert simplified == filter_
+    assert Filter.parse(expected)[0] == filter_
+
+
+@pytest.mark.parametrize(
+    ("filter_exp", "expected"),
+    (
+        ("not (not (title pr))", "title pr"),
+        ('not (not (title eq "a"))', 'not (not (title eq "a"))'),
+        ("not (not (nonExisting pr))", "not (not (nonexisting pr))"),
+        (
+            'name.givenName eq "Barbara" and name.familyName eq "Jensen" and title pr',
+            'name[familyname eq "Jensen" and givenname eq "Barbara"] and title pr',
+        ),
+        (
+            'name.givenName sw "B" or name[familyName eq "Jensen" or not (givenName pr)]',
+            'name.givenname sw "B" or name[familyname eq "Jensen" or not (givenname pr)]',
+        ),
+        (
+            'name.givenName sw "B" or not (name.familyName eq "Jensen")',
+            'name.givenname sw "B" or not (name.familyname eq "Jensen")',
+        ),
+        (
+            'emails.type eq "work" and emails.value co "@"',
+            'emails.type eq "work" and emails.value co "@"',
+        ),
+    ),
+)
+def test_bound_filter_is_simplified_using_schema(user_data_for_matching, filter_exp, expected):
+    filter_, _ = Filter.parse(filter_exp)
+    bound, _ = filter_.bind(User())
+
+    simplified = bound.simplify()
+
+    assert simplified.canonical_exp == expected
+    assert simplified.schema is bound.schema
+    for strict in (True, False):
+        assert simplified(user_data_for_matching, strict=strict) == bound(
+            user_data_for_matching, strict=strict
+        )
+
+
+@pytest.mark.parametrize(
+    ("filter_exp", "expected"),
+    (
+        ('userName eq "bjensen"', ["userName"]),
+        (
+            'userName eq "a" or USERNAME sw "b" and not (title pr)',
+            ["userName", "title"],
+        ),
+        (
+            'emails[type eq "work" and value co "@"] or name.givenName pr',
+            ["emails.type", "emails.value", "name.givenName"],
+        ),
+        ('emails co "@" and nonExisting pr', ["emails", "nonExisting"]),
+        (
+            "urn:ietf:params:scim:schemas:extension:enterprise:2.0:User:manager.value pr",
+            ["urn:ietf:params:scim:schemas:extension:enterprise:2.0:User:manager.value"],
+        ),
+    ),
+)
+def test_referenced_attrs_are_returned(filter_exp, expected):
+    filter_, _ = Filter.parse(filter_exp)
+
+    assert [str(attr_rep) for attr_rep in filter_.referenced_attrs()] == expected
+
+
+@pytest.mark.parametrize(
+    ("filter_exp", "expected"),
+    (
+        (
+            'username eq "a" and emails co "@"',
+            [
+                "urn:ietf:params:scim:schemas:core:2.0:User:userName",
+                "urn:ietf:params:scim:schemas:core:2.0:User:emails.value",
+            ],
+        ),
+        (
+            'emails[type eq "work"] or employeeNumber pr or nonExisting pr',
+            [
+                "urn:ietf:params:scim:schemas:core:2.0:User:emails.type",
+                "urn:ietf:params:scim:schemas:extension:enterprise:2.0:User:employeeNumber",
+                "nonExisting",
+            ],
+        ),
+    ),
+)
+def test_referenced_attrs_of_bound_filter_are_returned_like_in_schema(filter_exp, expected):
+    filter_, _ = Filter.parse(filter_exp)
+    bound, _ = filter_.bind(User())
+
+    assert [str(attr_rep) for attr_rep in bound.referenced_attrs()] == expected
+
+
+@pytest.mark.parametrize(
+    ("filter_exp", "other_exp"),
+    (
+        ('userName eq "abcd"', 'userName sw "ABC"'),
+        ('userName eq "abcd"', 'userName co "bc" and userName ew "CD"'),
+        ('userName sw "abc"', 'userName sw "ab" or title pr'),
+        ('userName sw "b"', 'userName gt "a"'),
+        ('title eq "x"', "title pr"),
+        ("title pr", "title ne null"),
+        ('title eq null', 'userName eq "anything"'),
+        (
+            'meta.lastModified gt "2011-05-13T04:42:34Z"',
+            'meta.lastModified gt "2011-01-01T00:00:00Z"',
+        ),
+        (
+            'meta.lastModified ge "2011-05-13T04:42:34Z"',
+            'meta.lastModified ne "2011-01-01T00:00:00Z"',
+        ),
+        (
+            'meta.lastModified le "2011-01-01T00:00:00Z"',
+            'meta.lastModified lt "2011-05-13T04:42:34Z"',
+        ),
+        ('userName eq "a" or userName eq "b"', 'userName lt "c"'),
+        ('userName sw "ab" and title pr', 'userName sw "a"'),
+        ('userName sw "ab" and title pr', 'title pr and userName sw "a"'),
+        ('emails[type eq "work" and value ew "@example.com"]', 'emails[value co "example"]'),
+        ('emails co "@example.com"', "emails pr"),
+        ('name.givenName eq "Barbara"', 'name[givenName sw "B"]'),
+        ('not (title pr) and userName eq "a"', "not (title pr)"),
+    ),
+)
+def test_filter_implies_other_filter(users_for_matching, filter_exp, other_exp):
+    filter_, _ = Filter.parse(filter_exp)
+    other, _ = Filter.parse(other_exp)
+
+    assert filter_.implies(other, User())
+    assert filter_.is_subsumed_by(other, User())
+    for user in users_for_matching:
+        if filter_(user, User()).status == MatchStatus.PASSED:
+            assert other(user, User()).status == MatchStatus.PASSED
+
+
+@pytest.mark.parametrize(
+    ("filter_exp", "other_exp"),
+    (
+        ('userName sw "ABC"', 'userName eq "abcd"'),
+        (
+            'meta.lastModified gt "2011-01-01T00:00:00Z"',
+            'meta.lastModified gt "2011-05-13T04:42:34Z"',
+        ),
+        ('externalId eq "X"', 'externalId eq "x"'),
+        ('title ne null', "title pr"),
+        ('title le "x"', "title pr"),
+        ('userName eq "a" or title pr', 'userName eq "a"'),
+        ('userName eq "a"', 'userName eq "a" and title pr'),
+        ('emails co "a" and emails co "b"', 'emails[value co "a" and value co "b"]'),
+        ("nonExisting pr", "nonExisting pr"),
+        ('nonExisting eq "a" and userName pr', 'nonExisting eq "a"'),
+        ('not (userName sw "abc")', 'not (userName eq "abcd")'),
+    ),
+)
+def test_filter_does_not_imply_other_filter(filter_exp, other_exp):
+    filter_, _ = Filter.parse(filter_exp)
+    other, _ = Filter.parse(other_exp)
+
+    assert not filter_.implies(other, User())
+
+
+def test_filter_implication_requires_schema():
+    filter_, _ = Filter.parse('userName eq "a"')
+
+    with pytest.raises(ValueError):
+        filter_.implies(filter_)
+
+
+@pytest.mark.parametrize(
+    ("filter_exp", "limits", "expected_context"),
+    (
+        (
+            'userName eq "bjensen"',
+            FilterLimits(max_length=20),
+            {"limit": "length", "max_value": 20},
+        ),
+        (
+            '((userName eq "a") or emails[value pr])',
+            FilterLimits(max_depth=1),
+            {"limit": "depth", "max_value": 1},
+        ),
+        (
+            'userName eq "a" or title pr and nickName pr',
+            FilterLimits(max_clauses=2),
+            {"limit": "clauses", "max_value": 2},
+        ),
+        (
+            'userName eq "a" or title eq "b" or nickName eq "c"',
+            FilterLimits(max_literals=2),
+            {"limit": "literals", "max_value": 2},
+        ),
+    ),
+)
+def test_filter_exceeding_limits_is_rejected(filter_exp, limits, expected_context):
+    filter_, issues = Filter.parse(filter_exp, limits=limits)
+
+    assert filter_ is Invalid
+    assert issues.to_dict(ctx=True) == {"_errors": [{"code": 116, "context": expected_context}]}
+
+
+@pytest.mark.parametrize(
+    ("filter_exp", "limits"),
+    (
+        ('userName eq "bjensen"', FilterLimits(max_length=21)),
+        ('((userName eq "a") or emails[value pr])', FilterLimits(max_depth=2)),
+        ('userName eq "a" or title pr and nickName pr', FilterLimits(max_clauses=3)),
+        ('userName eq "a" or title eq "b" or nickName eq "c"', FilterLimits(max_literals=3)),
+        (
+            'userName eq "a or b and c" or title eq "(["',
+            FilterLimits(max_depth=0, max_clauses=2, max_literals=2),
+        ),
+    ),
+)
+def test_filter_within_limits_is_parsed(filter_exp, limits):
+    filter_, issues = Filter.parse(filter_exp, limits=limits)
+
+    assert issues.to_dict(msg=True) == {}
+    assert filter_ is not Invalid
+
+
+@pytest.mark.parametrize(
+    "filter_exp",
+    (
+        "(" * 10_000 + "title pr" + ")" * 10_000,
+        "not (" * 10_000 + "title pr" + ")" * 10_000,
+        "emails[" + "(" * 10_000 + "value pr" + ")" * 10_000 + "]",
+    ),
+)
+def test_deeply_nested_filter_is_rejected_by_default(filter_exp):
+    filter_, issues = Filter.parse(filter_exp)
+
+    assert filter_ is Invalid
+    assert issues.to_dict() == {"_errors": [{"code": 116}]}
+
+
+def test_prepared_filter_exceeding_limits_is_rejected():
+    prepared, issues = Filter.prepare(
+        "userName eq ? or title pr", limits=FilterLimits(max_clauses=1)
+    )
+
+    assert prepared is Invalid
+    assert issues.to_dict() == {"_errors": [{"code": 116}]}
+
+
+@pytest.mark.parametrize(
+    ("filter_exp", "expected"),
+    (
+        ("title pr", 0.9),
+        ('title ne "x"', 0.995),
+        ('title eq "x"', 0.005),
+        ('userName eq "bjensen"', 0.0),
+        ("not (title pr)", 0.1),
+        ('title pr and userName sw "b"', 0.045),
+        ('title eq "x" or title eq "y"', 0.009975),
+        ('emails[type eq "work" and value co "@"]', 0.00025),
+        ("name pr", 0.0),
+        ('nonExisting eq "x"', 0.0),
+        ('nonExisting eq "x" and title pr', 0.9),
+    ),
+)
+def test_filter_selectivity_is_estimated(filter_exp, expected):
+    filter_, _ = Filter.parse(filter_exp)
+
+    assert filter_.estimate_selectivity(User()) == pytest.approx(expected)
+
+
+@pytest.mark.parametrize(
+    ("max_results", "expected"),
+    ((None, ["b", "c"]), (2, ["b", "c"]), (5, ["b", "c"])),
+)
+def test_filter_selects_matching_resources(max_results, expected):
+    filter_, _ = Filter.parse("title pr")
+    resources = [
+        SCIMDataContainer({"userName": "a"}),
+        SCIMDataContainer({"userName": "b", "title": "Tour Guide"}),
+        SCIMDataContainer({"userName": "c", "title": "Engineer"}),
+    ]
+
+    selected, issues = filter_.select(resources, User(), max_results=max_results)
+
+    assert issues.to_dict(msg=True) == {}
+    assert [resource["userName"] for resource in selected] == expected
+
+
+def test_filter_stops_selecting_when_too_many_resources_match():
+    filter_, _ = Filter.parse("title pr")
+    evaluated = []
+
+    def get_resources():
+        for i in range(10):
+            evaluated.append(i)
+            yield SCIMDataContainer({"title": str(i)})
+
+    selected, issues = filter_.select(get_resources(), User(), max_results=3)
+
+    assert selected is Invalid
+    assert issues.to_dict() == {"_errors": [{"code": 40}]}
+    assert evaluated == [0, 1, 2, 3]
+
+
+def _get_profile_counts(profile):
+    counts = {
+        "calls": profile.calls,
+        "passed": profile.passed,
+        "failed": profile.failed,
+        "missing_data": profile.missing_data,
+    }
+    if profile.sub_profiles:
+        counts["sub_profiles"] = [_get_profile_counts(sub) for sub in profile.sub_profiles]
+    return counts
+
+
+EXPLAINED_RESOURCES = [
+    SCIMDataContainer({"userName": "bjensen", "emails": [{"type": "work", "value": "b@x.com"}]}),
+    SCIMDataContainer({"userName": "Babs", "title": "Tour Guide"}),
+    SCIMDataContainer({"userName": "amy"}),
+]
+
+
+def test_filter_match_is_explained():
+    filter_, _ = Filter.parse('userName sw "b" and not (title pr)')
+
+    result, profile = filter_(EXPLAINED_RESOURCES[1], User(), explain=True)
+
+    assert result.status == MatchStatus.FAILED
+    assert profile.operator is not None
+    assert _get_profile_counts(profile) == {
+        "calls": 1,
+        "passed": 0,
+        "failed": 1,
+        "missing_data": 0,
+        "sub_profiles": [
+            {"calls": 1, "passed": 1, "failed": 0, "missing_data": 0},
+            {
+                "calls": 1,
+                "passed": 0,
+                "failed": 1,
+                "missing_data": 0,
+                "sub_profiles": [{"calls": 1, "passed": 1, "failed": 0, "missing_data": 0}],
+            },
+        ],
+    }
+
+
+def test_matching_many_resources_is_explained():
+    filter_, _ = Filter.parse(
+        'emails[type eq "work"] or userName eq "amy" or userName eq "babs" or title eq null'
+    )
+
+    matches, profile = filter_.match_many(EXPLAINED_RESOURCES, User(), explain=True)
+
+    assert matches == [True, True, True]
+    assert matches == filter_.match_many(EXPLAINED_RESOURCES, User())
+    assert _get_profile_counts(profile) == {
+        "calls": 3,
+        "passed": 3,
+        "failed": 0,
+        "missing_data": 0,
+        "sub_profiles": [
+            {
+                "calls": 3,
+                "passed": 1,
+                "failed": 2,
+                "missing_data": 0,
+                "sub_profiles": [{"calls": 1, "passed": 1, "failed": 0, "missing_data": 0}],
+            },
+            # alternatives are not compiled to a single lookup when explained
+            {"calls": 2, "passed": 1, "failed": 1, "missing_data": 0},
+            {"calls": 1, "passed": 1, "failed": 0, "missing_data": 0},
+            {"calls": 0, "passed": 0, "failed": 0, "missing_data": 0},
+        ],
+    }
+    assert profile.time >= profile.sub_profiles[0].time > 0
+
+
+def test_filter_profile_is_dumped_to_dict():
+    filter_, _ = Filter.parse('not (title eq "Tour Guide")')
+
+    _, profile = filter_.match_many(EXPLAINED_RESOURCES, User(), explain=True)
+    profile_dict = profile.to_dict()
+
+    assert profile_dict.pop("time") >= 0
+    assert profile_dict["sub_profiles"][0].pop("time") >= 0
+    assert profile_dict == {
+        "op": "not",
+        "calls": 3,
+        "passed": 0,
+        "failed": 3,
+        "missing_data": 0,
+        "sub_profiles": [
+            {
+                "op": "eq",
+                "attr_rep": "title",
+                "value": "Tour Guide",
+                "calls": 3,
+                "passed": 1,
+                "failed": 0,
+                "missing_data": 2,
+            },
+        ],
+    }
+
+
+@pytest.fixture
+def slow_filter_calls():
+    calls = []
+    yield calls
+    Filter.slow_filter_hook = None
+
+
+@pytest.mark.parametrize(("threshold", "expected_calls"), ((0.0, 1), (60.0, 0)))
+def test_slow_filter_hook_is_called_when_matching_takes_longer_than_threshold(
+    slow_filter_calls, threshold, expected_calls
+):
+    filter_, _ = Filter.parse('userName sw "b"')
+    Filter.slow_filter_hook = SlowFilterHook(
+        threshold=threshold,
+        callback=lambda filter_, profile: slow_filter_calls.append((filter_, profile)),
+    )
+
+    filter_.match_many(EXPLAINED_RESOURCES, User())
+    filter_.select(EXPLAINED_RESOURCES, User())
+
+    assert len(slow_filter_calls) == 2 * expected_calls
+    for called_filter, profile in slow_filter_calls:
+        assert called_filter is filter_
+        assert profile.calls == 3
+
+
+@pytest.mark.parametrize("filter_exp", SCHEMA_BINDABLE_FILTERS + ('userName eq 1 or title pr',))
+def test_filter_is_rebuilt_from_dict(users_for_matching, filter_exp):
+    filter_, _ = Filter.parse(filter_exp)
+
+    rebuilt = Filter.from_dict(filter_.to_dict())
+
+    assert rebuilt.to_dict() == filter_.to_dict()
+    assert rebuilt.canonical_exp == filter_.canonical_exp
+    for user in users_for_matching:
+        assert rebuilt(user, User()).status == filter_(user, User()).status
+
+
+@pytest.mark.parametrize(
+    "filter_exp",
+    (
+        'urn:ietf:params:scim:schemas:core:2.0:User:name.givenName eq "Barbara"',
+        'emails[type eq "work" and not (value ew ".org")] or meta.lastModified gt 1.5',
+        "active eq true and title eq null",
+    ),
+)
+def test_filter_is_rebuilt_from_bytes(filter_exp):
+    filter_, _ = Filter.parse(filter_exp)
+
+    data = filter_.to_bytes()
+
+    assert isinstance(data, bytes)
+    assert Filter.from_bytes(data).to_dict() == filter_.to_dict()
+
+
+def test_bound_filter_is_rebuilt_unbound():
+    filter_, _ = Filter.parse('name.givenName eq "Barbara"')
+    bound, _ = filter_.bind(User())
+
+    rebuilt = Filter.from_dict(bound.to_dict())
+
+    assert rebuilt.schema is None
+    assert rebuilt.to_dict() == bound.to_dict()
+
+
+def test_filter_with_unknown_operator_is_not_rebuilt_from_dict():
+    with pytest.raises(ValueError, match="unsupported filter operator 'xx'"):
+        Filter.from_dict({"op": "xx", "attr_rep": "userName", "value": "a"})
+
+
+EMAILS_FOR_INDEXING = (
+    [],
+    [{"value": "A@example.com", "type": "work"}, {"value": "b@example.com", "primary": True}],
+    [{"value": "b@example.com"}, {"type": "home"}, {"value": None, "display": "x"}],
+    [{"value": "", "type": "other"}, {"value": "c@example.com", "type": "WORK"}],
+    [{"type": "home"}, {"display": "y"}],
+)
+
+
+@pytest.mark.parametrize(
+    "filter_exp",
+    (
+        'emails[value eq "a@example.com"]',
+        'emails[value eq "b@example.com"] and emails[type eq "work"]',
+        'emails[type eq "work"]',
+        "emails[primary eq true]",
+        'emails[value eq "x"]',
+        "emails[value pr]",
+        "emails[display pr]",
+        'not (emails[value eq "c@example.com"])',
+    ),
+)
+@pytest.mark.parametrize("strict", (True, False))
+def test_filter_matches_the_same_with_indexed_values(monkeypatch, filter_exp, strict):
+    filter_, _ = Filter.parse(filter_exp)
+    compiled, _ = filter_.compile(User(), strict)
+    data = [SCIMDataContainer({"emails": emails}) for emails in EMAILS_FOR_INDEXING]
+    monkeypatch.setattr(ValueIndex, "min_items", None)
+    expected = [filter_(item, User(), strict).status for item in data]
+
+    monkeypatch.setattr(ValueIndex, "min_items", 1)
+
+    assert [filter_(item, User(), strict).status for item in data] == expected
+    assert [compiled(item).status for item in data] == expected
+
+
+def test_indexed_values_are_updated_after_modification(monkeypatch):
+    monkeypatch.setattr(ValueIndex, "min_items", 1)
+    filter_, _ = Filter.parse('emails[value eq "c@example.com"]')
+    compiled, _ = filter_.compile(User())
+    data = SCIMDataContainer({"emails": [{"value": "a@example.com"}, {"value": "b@example.com"}]})
+    assert compiled(data).status == MatchStatus.FAILED
+
+    data["emails"][1]["value"] = "C@example.com"
+    assert compiled(data).status == MatchStatus.PASSED
+
+    del data["emails.value"]
+    assert compiled(data).status == MatchStatus.FAILED
+
+    data["emails.value"] = ["x@example.com", "c@example.com"]
+    assert compiled(data).status == MatchStatus.PASSED
+
+    data["emails"] = [{"value": "d@example.com"}]
+    assert compiled(data).status == MatchStatus.FAILED
+
+
+def test_indexed_values_are_updated_after_modification_through_copy():
+    filter_, _ = Filter.parse('members[value eq "5"]')
+    compiled, _ = filter_.compile(Group())
+    data = SCIMDataContainer({"members": [{"value": str(i)} for i in range(300)]})
+    assert compiled(data).status == MatchStatus.PASSED
+
+    SCIMDataContainer(data["members"][5])["value"] = "changed"
+
+    assert compiled(data).status == MatchStatus.FAILED
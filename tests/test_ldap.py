@@ -0,0 +1,150 @@
+import pytest
+
+from src.assets.schemas.user import User
+from src.data.container import Invalid, SCIMDataContainer
+from src.data.operator import MatchStatus
+from src.filter import Filter
+from src.ldap import LDAPMapping, escape, to_ldap
+
+MAPPING = LDAPMapping(
+    {
+        "userName": "uid",
+        "title": "title",
+        "active": "active",
+        "name.givenName": "givenName",
+        "name.familyName": "sn",
+        "meta.created": "createTimestamp",
+        "urn:ietf:params:scim:schemas:extension:enterprise:2.0:User:employeeNumber": (
+            "employeeNumber"
+        ),
+        "emails.value": ["mail", "otherMailbox"],
+    }
+)
+
+
+@pytest.mark.parametrize(
+    ("filter_exp", "expected"),
+    (
+        ('userName eq "bjensen"', "(uid=bjensen)"),
+        ("title pr", "(title=*)"),
+        ('title co "guide"', "(title=*guide*)"),
+        ('title sw "Tour"', "(title=Tour*)"),
+        ('title ew "Guide"', "(title=*Guide)"),
+        ('title co ""', "(title=*)"),
+        ('userName ge "b"', "(uid>=b)"),
+        ('userName gt "b"', "(&(uid>=b)(!(uid=b)))"),
+        ('userName lt "b"', "(&(uid<=b)(!(uid=b)))"),
+        ('userName ne "b"', "(&(uid=*)(!(uid=b)))"),
+        ("active eq true", "(active=TRUE)"),
+        (
+            'meta.created ge "2011-05-13T04:42:34+02:00"',
+            "(createTimestamp>=20110513024234Z)",
+        ),
+        (
+            'urn:ietf:params:scim:schemas:extension:enterprise:2.0:User:employeeNumber eq "701"',
+            "(employeeNumber=701)",
+        ),
+        ("not (title pr)", "(!(title=*))"),
+        ('not (title co "guide")', "(&(title=*)(!(title=*guide*)))"),
+        ('userName eq "bjensen" or title pr', "(|(uid=bjensen)(title=*))"),
+        ('not (userName eq "a" or userName eq "b")', "(&(uid=*)(!(uid=a))(uid=*)(!(uid=b)))"),
+        ("title eq null", "(!(objectClass=*))"),
+        ("title ne null", "(title=*)"),
+        (
+            'name[givenName eq "Barbara" and familyName eq "Jensen"]',
+            "(&(givenName=Barbara)(sn=Jensen))",
+        ),
+        ('name.givenName sw "B"', "(givenName=B*)"),
+        ("name pr", "(!(objectClass=*))"),
+        ('emails co "@example.com"', "(|(mail=*@example.com*)(otherMailbox=*@example.com*))"),
+        ("emails pr", "(|(mail=*)(otherMailbox=*))"),
+        (
+            'emails[value ew ".org" or value sw "b"]',
+            "(|(mail=*.org)(otherMailbox=*.org)(mail=b*)(otherMailbox=b*))",
+        ),
+    ),
+)
+def test_filter_is_translated_to_ldap_filter(filter_exp, expected):
+    filter_, _ = Filter.parse(filter_exp)
+
+    query, issues = to_ldap(User(), MAPPING, filter_)
+
+    assert issues.to_dict(msg=True) == {}
+    assert query.filter == expected
+    assert query.residual is None
+
+
+@pytest.mark.parametrize(
+    ("value", "expected"),
+    (
+        ("a*b", "a\\2ab"),
+        ("(a)", "\\28a\\29"),
+        ("a\\b", "a\\5cb"),
+        ("a\0", "a\\00"),
+        ("zażółć", "zażółć"),
+    ),
+)
+def test_ldap_filter_value_is_escaped(value, expected):
+    assert escape(value) == expected
+
+
+def test_escaped_value_is_put_in_substring_filter():
+    filter_, _ = Filter.parse('userName sw "*)(uid=*"')
+
+    query, _ = to_ldap(User(), MAPPING, filter_)
+
+    assert query.filter == "(uid=\\2a\\29\\28uid=\\2a*)"
+
+
+@pytest.mark.parametrize(
+    ("filter_exp", "expected_filter", "expected_residual"),
+    (
+        ('displayName eq "Babs"', "(objectClass=*)", 'displayName eq "Babs"'),
+        (
+            'displayName eq "Babs" or title pr',
+            "(objectClass=*)",
+            'displayName eq "Babs" or title pr',
+        ),
+        (
+            'userName sw "b" and displayName eq "Babs" and title pr',
+            "(&(uid=b*)(title=*))",
+            'displayName eq "Babs" and displayName eq "Babs"',
+        ),
+        (
+            'emails[type eq "work" and value pr] and (userName eq "a" or userName eq "b")',
+            "(|(uid=a)(uid=b))",
+            'emails[type eq "work" and value pr] and emails[type eq "work" and value pr]',
+        ),
+        ('title pr and emails ne "x"', "(title=*)", 'emails ne "x" and emails ne "x"'),
+        ('title pr and emails gt "x"', "(title=*)", 'emails gt "x" and emails gt "x"'),
+    ),
+)
+def test_untranslatable_operands_are_left_in_residual_filter(
+    filter_exp, expected_filter, expected_residual
+):
+    filter_, _ = Filter.parse(filter_exp)
+
+    query, issues = to_ldap(User(), MAPPING, filter_)
+
+    assert issues.to_dict(msg=True) == {}
+    assert query.filter == expected_filter
+    assert query.residual.canonical_exp == Filter.parse(expected_residual)[0].canonical_exp
+
+
+def test_residual_filter_matches_the_rest_of_filter():
+    filter_, _ = Filter.parse('userName sw "b" and nonExisting eq "x" and displayName eq "Babs"')
+    data = SCIMDataContainer({"userName": "bjensen", "displayName": "Babs"})
+
+    query, _ = to_ldap(User(), MAPPING, filter_)
+
+    assert query.filter == "(uid=b*)"
+    assert query.residual(data).status == MatchStatus.PASSED
+
+
+def test_filter_that_can_not_be_bound_is_not_translated():
+    filter_, _ = Filter.parse("userName eq 1")
+
+    query, issues = to_ldap(User(), MAPPING, filter_)
+
+    assert query is Invalid
+    assert issues.to_dict() == {"_errors": [{"code": 114}]}
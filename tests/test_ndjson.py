@@ -0,0 +1,149 @@
+import io
+import json
+
+import pytest
+
+from src.assets.schemas.user import User
+from src.data.container import Invalid, SCIMDataContainer
+from src.data.operator import MatchStatus
+from src.filter import Filter
+from src.ndjson import _get_prefilter, _may_match, filter_ndjson
+
+USERS = [
+    {"id": "1", "userName": "bjensen", "title": "Tour Guide", "emails": [{"value": "b@x.com"}]},
+    {"id": "2", "userName": "Mandy", "nickName": "bjensen", "emails": [{"value": "m@y.org"}]},
+    {"id": "3", "userName": "ZED", "title": "Kelvin K"},
+    {"id": "4", "userName": "amy", "title": 'say "hi"', "name": {"givenName": "Amy"}},
+    # Kelvin sign, escaped by `json.dumps`
+    {"id": "5", "userName": "\u212a"},
+]
+
+
+@pytest.fixture
+def ndjson_file(tmp_path):
+    path = tmp_path / "users.ndjson"
+    lines = [json.dumps(user) for user in USERS]
+    lines.insert(2, "")
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return path
+
+
+@pytest.mark.parametrize(
+    "filter_exp",
+    (
+        'userName eq "BJENSEN"',
+        'nickName eq "bjensen"',
+        'title co "guide" or userName sw "Z"',
+        'emails[value ew ".org"]',
+        'emails co "@"',
+        'title co "k"',
+        'title eq "say \\"hi\\""',
+        'name.givenName eq "amy" and title pr',
+        'not (userName eq "bjensen")',
+        'userName ne "amy"',
+        'id eq "3"',
+        'userName eq "k"',
+        'nonExisting eq "x" and userName sw "m"',
+    ),
+)
+@pytest.mark.parametrize("strict", (True, False))
+def test_ndjson_records_are_matched_like_filter(ndjson_file, filter_exp, strict):
+    filter_, _ = Filter.parse(filter_exp)
+    expected = [
+        user
+        for user in USERS
+        if filter_(SCIMDataContainer(user), User(), strict).status == MatchStatus.PASSED
+    ]
+
+    records, issues = filter_ndjson(ndjson_file, filter_, User(), strict)
+
+    assert issues.to_dict(msg=True) == {}
+    assert [record.to_dict() for record in records] == expected
+
+
+def test_offsets_of_matching_ndjson_lines_are_yielded(ndjson_file):
+    filter_, _ = Filter.parse('userName eq "zed" or userName eq "bjensen"')
+    content = ndjson_file.read_bytes()
+
+    offsets, _ = filter_ndjson(str(ndjson_file), filter_, User(), offsets=True)
+
+    lines = [content[offset:].split(b"\n", 1)[0] for offset in offsets]
+    assert [json.loads(line)["id"] for line in lines] == ["1", "3"]
+
+
+def test_ndjson_records_are_matched_in_binary_stream():
+    stream = io.BytesIO(b"".join(json.dumps(user).encode() + b"\n" for user in USERS))
+    filter_, _ = Filter.parse('emails.value co "x.com" or title sw "say"')
+
+    records, _ = filter_ndjson(stream, filter_, User())
+
+    assert [record["id"] for record in records] == ["1", "4"]
+
+
+@pytest.mark.parametrize(
+    ("filter_exp", "expected"),
+    (
+        ('externalId eq "AT&T"', ["1"]),
+        ('name.familyName eq "at&t"', ["1"]),
+        ('externalId co "<b>" or externalId sw "AT&"', ["1", "2"]),
+    ),
+)
+def test_ndjson_records_with_escaped_printable_characters_are_matched(filter_exp, expected):
+    # escaped like Go's encoding/json does
+    stream = io.BytesIO(
+        b'{"id": "1", "externalId": "AT\\u0026T", "name": {"familyName": "AT\\u0026T"}}\n'
+        b'{"id": "2", "externalId": "\\u003cb\\u003e"}\n'
+    )
+    filter_, _ = Filter.parse(filter_exp)
+
+    records, _ = filter_ndjson(stream, filter_, User())
+
+    assert [record["id"] for record in records] == expected
+
+
+def test_ndjson_records_are_not_matched_with_filter_that_can_not_be_bound():
+    filter_, _ = Filter.parse("userName eq 1")
+
+    records, issues = filter_ndjson(io.BytesIO(b""), filter_, User())
+
+    assert records is Invalid
+    assert issues.to_dict() == {"_errors": [{"code": 114}]}
+
+
+def test_bad_ndjson_line_is_reported_with_its_offset():
+    filter_, _ = Filter.parse("userName pr")
+    records, _ = filter_ndjson(io.BytesIO(b'{"userName": "a"}\n{"userName": \n'), filter_, User())
+
+    with pytest.raises(ValueError, match="offset 18"):
+        list(records)
+
+
+@pytest.mark.parametrize(
+    ("filter_exp", "line", "expected"),
+    (
+        ('userName eq "BJensen"', b'{"userName": "bjensen"}', True),
+        ('userName eq "bjensen"', b'{"userName": "mandy"}', False),
+        ('externalId eq "ABC"', b'{"externalId": "abc"}', False),
+        ('title co "q" or nickName co "z"', b'{"title": "x", "nickName": "y"}', False),
+        ('title co "a" or nickName pr', b'{"title": "x"}', True),
+        ('title co "a" and nickName co "b"', b'{"title": "a"}', False),
+        ('userName eq "k"', '{"userName": "\u212a"}'.encode(), True),
+        ('userName eq "k"', json.dumps({"userName": "\u212a"}).encode(), True),
+        ('userName eq "k"', json.dumps({"userName": "\u00e9"}).encode(), True),
+        ('meta.created eq "2011-05-13T04:42:34Z"', b"{}", True),
+        ('externalId eq "AT&T"', b'{"externalId": "AT\\u0026T"}', True),
+        ('externalId eq "a=b"', b'{"externalId": "a\\u003db"}', True),
+        ('externalId eq "1+1"', b'{"externalId": "1\\u002b1"}', True),
+        ('emails[type eq "work" and value co "@x"]', b'{"emails": [{"type": "work"}]}', False),
+        (
+            'userName eq "q" or emails[type eq "work" and value co "@x.com"]',
+            b'{"emails": [{"type": "work"}]}',
+            False,
+        ),
+    ),
+)
+def test_ndjson_lines_are_prefiltered(filter_exp, line, expected):
+    filter_, _ = Filter.parse(filter_exp)
+    bound, _ = filter_.bind(User())
+
+    assert _may_match(line, _get_prefilter(bound.operator)) is expected
@@ -1504,3 +1504,92 @@ def test_resource_types_can_be_dumped():
 
     assert issues.to_dict(msg=True) == {}
     assert data.body == body
+
+
+def test_filter_exceeding_configured_limits_is_rejected():
+    config = create_service_provider_config(
+        filter_={"max_results": 100, "supported": True, "max_clauses": 2}
+    )
+    validator = ResourcesGET(config, resource_schema=user.User())
+
+    _, issues = validator.parse_request(
+        query_string={"filter": 'userName eq "a" or userName eq "b" or userName eq "c"'}
+    )
+
+    assert issues.to_dict() == {"query_string": {"filter": {"_errors": [{"code": 116}]}}}
+
+
+def test_filter_exceeding_configured_limits_is_rejected_in_search_request():
+    config = create_service_provider_config(
+        filter_={"max_results": 100, "supported": True, "max_clauses": 2}
+    )
+    validator = SearchRequestPOST(config, resource_schemas=[user.User()])
+
+    _, issues = validator.parse_request(
+        body={
+            "filter": 'userName eq "a" or userName eq "b" or userName eq "c" or userName eq "d"'
+        }
+    )
+
+    assert issues.to_dict() == {"body": {"filter": {"_errors": [{"code": 116}]}}}
+
+
+SELECTIVITY_CONFIG = create_service_provider_config(
+    filter_={"max_results": 100, "supported": True, "max_selectivity": 0.5}
+)
+
+
+@pytest.mark.parametrize(
+    "validator",
+    (
+        ResourcesGET(SELECTIVITY_CONFIG, resource_schema=user.User()),
+        ServerRootResourceGET(SELECTIVITY_CONFIG, resource_schemas=[user.User(), group.Group()]),
+    ),
+)
+@pytest.mark.parametrize("filter_exp", ("title pr", 'userName ne "bjensen"', "not (title eq null)"))
+def test_too_broad_filter_is_rejected(validator, filter_exp):
+    _, issues = validator.parse_request(query_string={"filter": filter_exp})
+
+    assert issues.to_dict() == {"query_string": {"filter": {"_errors": [{"code": 41}]}}}
+
+
+def test_too_broad_filter_in_search_request_is_rejected():
+    validator = SearchRequestPOST(SELECTIVITY_CONFIG, resource_schemas=[user.User()])
+
+    _, issues = validator.parse_request(body={"filter": "title pr or nickName pr"})
+
+    assert issues.to_dict() == {"body": {"filter": {"_errors": [{"code": 41}]}}}
+
+
+@pytest.mark.parametrize(
+    "filter_exp",
+    (
+        "emails pr",
+        'not (userName eq "x")',
+        'userName ne "a"',
+        'active eq true or title eq "x"',
+        " or ".join(f'displayName sw "{letter}"' for letter in "abcdefghijklmn"),
+    ),
+)
+def test_broad_filter_is_accepted_if_selectivity_is_not_limited(filter_exp):
+    validator = ResourcesGET(CONFIG, resource_schema=user.User())
+
+    _, issues = validator.parse_request(query_string={"filter": filter_exp})
+
+    assert issues.to_dict(msg=True) == {}
+
+
+def test_list_response_with_more_resources_than_filter_max_results_is_reported(list_user_data):
+    config = create_service_provider_config(filter_={"max_results": 1, "supported": True})
+    validator = ResourcesGET(config, resource_schema=user.User())
+    list_user_data["Resources"][0].pop("name")
+    list_user_data["Resources"][1].pop("name")
+
+    _, issues = validator.dump_response(
+        status_code=200,
+        body=list_user_data,
+        filter_=Filter(Present(AttrRep(attr="username"))),
+        presence_checker=AttributePresenceChecker(attr_reps=[AttrRep(attr="name")], include=False),
+    )
+
+    assert issues.to_dict() == {"body": {"Resources": {"_errors": [{"code": 21}]}}}
@@ -0,0 +1,95 @@
+import pickle
+
+import pytest
+
+from src.assets.schemas.user import User
+from src.data.container import AttrRep, Invalid, SCIMDataContainer
+from src.filter import Filter
+from src.sharding import ShardedExecutor
+from src.sorter import Sorter
+
+RESOURCES = [
+    SCIMDataContainer(
+        {
+            "id": str(i),
+            "userName": f"user-{i % 7}" if i % 5 else f"USER-{i % 7}",
+            "title": "Tour Guide" if i % 3 else None,
+            "emails": [
+                {"value": f"user-{i}@example.com", "type": "work", "primary": bool(i % 2)},
+                {"value": f"user-{i}@jensen.org", "type": "home"},
+            ],
+        }
+    )
+    for i in range(50)
+]
+
+
+@pytest.fixture(scope="module")
+def executor():
+    with ShardedExecutor(RESOURCES, User(), max_workers=3) as executor:
+        yield executor
+
+
+@pytest.mark.parametrize(
+    "filter_exp",
+    (
+        None,
+        'userName eq "user-3"',
+        'title pr or emails[value ew "1@example.com"]',
+        'not (title pr) and userName sw "u"',
+        'userName eq "nobody"',
+    ),
+)
+@pytest.mark.parametrize(
+    ("sort_by", "asc"),
+    ((None, True), ("userName", True), ("userName", False), ("title", True), ("emails", False)),
+)
+@pytest.mark.parametrize(("start_index", "count"), ((1, None), (1, 5), (4, 10), (0, 100), (3, 0)))
+def test_sharded_selection_is_the_same_as_in_one_process(
+    executor, filter_exp, sort_by, asc, start_index, count
+):
+    schema = User()
+    filter_ = Filter.parse(filter_exp)[0] if filter_exp else None
+    sorter = Sorter.parse(sort_by, asc)[0] if sort_by else None
+    expected = RESOURCES
+    if filter_ is not None:
+        expected, _ = filter_.select(RESOURCES, schema)
+    if sorter is not None:
+        expected = sorter(expected, schema)
+    start = max(start_index, 1) - 1
+
+    page, issues = executor.select(filter_, sorter, start_index, count)
+
+    assert issues.to_dict(msg=True) == {}
+    assert page.total_results == len(expected)
+    assert page.start_index == max(start_index, 1)
+    assert page.resources == expected[start : None if count is None else start + count]
+
+
+def test_sharded_selection_fails_for_filter_that_can_not_be_bound(executor):
+    filter_, _ = Filter.parse("userName eq 1")
+
+    page, issues = executor.select(filter_)
+
+    assert page is Invalid
+    assert issues.to_dict() == {"_errors": [{"code": 114}]}
+
+
+def test_filter_and_sorter_are_picklable():
+    filter_, _ = Filter.parse('emails[type eq "work" and value co "@example.com"] or title pr')
+    sorter = Sorter(AttrRep.parse("name.givenName"), asc=False)
+
+    unpickled_filter = pickle.loads(pickle.dumps(filter_))
+    unpickled_sorter = pickle.loads(pickle.dumps(sorter))
+
+    assert unpickled_filter == filter_
+    assert unpickled_sorter.attr_rep == sorter.attr_rep
+    assert unpickled_sorter.asc is False
+
+
+def test_sorted_parts_are_merged_like_sorted_data():
+    sorter = Sorter(AttrRep.parse("userName"))
+    schema = User()
+    parts = [sorter(RESOURCES[:20], schema), sorter(RESOURCES[20:], schema)]
+
+    assert list(sorter.merge(parts, schema)) == sorter(RESOURCES, schema)
@@ -224,3 +224,19 @@ def test_fails_if_different_value_types():
 
     with pytest.raises(TypeError):
         sorter(values, schemas)
+
+
+@pytest.mark.parametrize(
+    ("sort_by", "asc"),
+    (
+        ("userName", True),
+        ("name.givenName", False),
+        ("urn:ietf:params:scim:schemas:core:2.0:User:emails", True),
+    ),
+)
+def test_sorter_is_rebuilt_from_dict_and_bytes(sort_by, asc):
+    sorter, _ = Sorter.parse(sort_by, asc)
+
+    for rebuilt in (Sorter.from_dict(sorter.to_dict()), Sorter.from_bytes(sorter.to_bytes())):
+        assert rebuilt.attr_rep == sorter.attr_rep
+        assert rebuilt.asc is asc
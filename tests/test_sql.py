@@ -0,0 +1,234 @@
+import sqlite3
+
+import pytest
+
+from src.assets.schemas.user import User
+from src.data.container import AttrRep, Invalid, SCIMDataContainer
+from src.data.operator import MatchStatus
+from src.filter import Filter
+from src.sorter import Sorter
+from src.sql import MultiValuedTable, TableMapping, to_sql
+
+TABLE = TableMapping(
+    name="users",
+    columns={
+        "userName": "user_name",
+        "nickName": "nick_name",
+        "title": "title",
+        "active": "active",
+        "name.givenName": "given_name",
+        "meta.created": "created",
+        "urn:ietf:params:scim:schemas:extension:enterprise:2.0:User:employeeNumber": "number",
+        "emails": MultiValuedTable(
+            name="emails",
+            foreign_key="user_id",
+            columns={"value": "value", "type": "type", "primary": "is_primary"},
+        ),
+    },
+)
+
+USERS = [
+    {
+        "id": 1,
+        "userName": "bjensen@example.com",
+        "nickName": "Babs",
+        "title": "Tour Guide",
+        "active": True,
+        "name": {"givenName": "Barbara"},
+        "meta": {"created": "2010-01-23T04:56:22+00:00"},
+        "urn:ietf:params:scim:schemas:extension:enterprise:2.0:User": {"employeeNumber": "701"},
+        "emails": [
+            {"value": "bjensen@example.com", "type": "work", "primary": True},
+            {"value": "babs@jensen.org", "type": "home"},
+        ],
+    },
+    {
+        "id": 2,
+        "userName": "Mandy",
+        "title": "",
+        "active": False,
+        "name": {"givenName": "Amanda"},
+        "meta": {"created": "2012-03-01T10:00:00+00:00"},
+        "emails": [{"value": "mandy_100%@example.com", "type": "home", "primary": True}],
+    },
+    {
+        "id": 3,
+        "userName": "ZED",
+        "nickName": "zed",
+        "meta": {"created": "2011-06-15T08:30:00+00:00"},
+    },
+    {
+        "id": 4,
+        "userName": "amy",
+        "title": "Engineer",
+        "active": True,
+        "emails": [{"type": "work"}],
+    },
+]
+
+
+@pytest.fixture
+def db():
+    connection = sqlite3.connect(":memory:")
+    connection.execute("PRAGMA case_sensitive_like = ON")
+    connection.execute(
+        "CREATE TABLE users "
+        "(id, user_name, nick_name, title, active, given_name, created, number)"
+    )
+    connection.execute("CREATE TABLE emails (user_id, value, type, is_primary)")
+    for user in USERS:
+        connection.execute(
+            "INSERT INTO users VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                user["id"],
+                user.get("userName"),
+                user.get("nickName"),
+                user.get("title"),
+                user.get("active"),
+                user.get("name", {}).get("givenName"),
+                user.get("meta", {}).get("created"),
+                user.get("urn:ietf:params:scim:schemas:extension:enterprise:2.0:User", {}).get(
+                    "employeeNumber"
+                ),
+            ),
+        )
+        for email in user.get("emails", []):
+            connection.execute(
+                "INSERT INTO emails VALUES (?, ?, ?, ?)",
+                (user["id"], email.get("value"), email.get("type"), email.get("primary")),
+            )
+    yield connection
+    connection.close()
+
+
+def _select_ids(db, query):
+    sql, params = query.select("id")
+    return [row[0] for row in db.execute(sql, params)]
+
+
+@pytest.mark.parametrize(
+    "filter_exp",
+    (
+        'userName eq "BJENSEN@example.com"',
+        'userName ne "zed"',
+        'userName sw "B" or userName ew "ZED"',
+        'title co "GUIDE"',
+        "title pr",
+        "nickName pr and not (title pr)",
+        "active eq true",
+        "not (active eq true)",
+        'name.givenName gt "B"',
+        'meta.created ge "2011-06-15T08:30:00+00:00"',
+        'meta.created lt "2011-06-15T08:30:00Z"',
+        'meta.created gt "2011-06-15T10:00:00+02:00"',
+        'meta.created le "2011-06-15T04:30:00-04:00"',
+        'urn:ietf:params:scim:schemas:extension:enterprise:2.0:User:employeeNumber eq "701"',
+        'emails[type eq "work" and value ew "EXAMPLE.COM"]',
+        'emails[not (value pr)]',
+        'emails co "jensen.org"',
+        'not (emails co "jensen.org")',
+        "emails pr",
+        'emails.type eq "home" or nickName eq "zed"',
+        'not (emails.primary eq true and title sw "t")',
+        "nickName eq null",
+        "not (nickName ne null)",
+        'userName co "%" or emails.value co "_1"',
+        'emails.value co "%"',
+    ),
+)
+def test_sql_query_selects_the_same_resources_as_filter(db, filter_exp):
+    filter_, _ = Filter.parse(filter_exp)
+    expected = [
+        user["id"]
+        for user in USERS
+        if filter_(SCIMDataContainer(user), User(), strict=True).status == MatchStatus.PASSED
+    ]
+
+    query, issues = to_sql(User(), TABLE, filter_)
+
+    assert issues.to_dict(msg=True) == {}
+    assert sorted(_select_ids(db, query)) == expected
+
+
+def test_filter_values_are_passed_as_parameters():
+    filter_, _ = Filter.parse('userName eq "x\' OR 1 = 1 --" and title sw "a_b"')
+
+    query, _ = to_sql(User(), TABLE, filter_)
+
+    assert query.where == (
+        "(LOWER(users.user_name) = ?) AND (LOWER(users.title) LIKE ? ESCAPE '\\')"
+    )
+    assert query.where_params == ["x' or 1 = 1 --", "a\\_b%"]
+
+
+def test_date_time_values_are_passed_as_iso_strings_in_utc():
+    filter_, _ = Filter.parse(
+        'meta.created gt "2011-06-15T10:30:00+02:00" and meta.created lt "2012-01-01T00:00:00Z"'
+    )
+
+    query, _ = to_sql(User(), TABLE, filter_)
+
+    assert query.where_params == ["2011-06-15T08:30:00+00:00", "2012-01-01T00:00:00+00:00"]
+
+
+@pytest.mark.parametrize(
+    ("filter_exp", "expected"),
+    (
+        ('displayName eq "Babs"', {"_errors": [{"code": 115}]}),
+        ('emails[display eq "Babs"]', {"_errors": [{"code": 115}]}),
+        ('title pr or ims.value eq "x"', {"_errors": [{"code": 115}]}),
+        ('nonExisting eq "x"', {"_errors": [{"code": 115}]}),
+    ),
+)
+def test_attributes_not_mapped_to_columns_are_reported(filter_exp, expected):
+    filter_, _ = Filter.parse(filter_exp)
+
+    query, issues = to_sql(User(), TABLE, filter_)
+
+    assert query is Invalid
+    assert issues.to_dict() == expected
+
+
+@pytest.mark.parametrize(
+    ("sort_by", "asc", "expected"),
+    (
+        ("userName", True, [4, 1, 2, 3]),
+        ("userName", False, [3, 2, 1, 4]),
+        ("title", True, [4, 1, 2, 3]),
+        ("nickName", True, [1, 3, 2, 4]),
+        ("emails", True, [1, 2, 3, 4]),
+        ("emails", False, [3, 4, 2, 1]),
+    ),
+)
+def test_sql_query_sorts_like_sorter(db, sort_by, asc, expected):
+    sorter = Sorter(AttrRep.parse(sort_by), asc=asc)
+
+    query, issues = to_sql(User(), TABLE, sorter=sorter)
+
+    assert issues.to_dict(msg=True) == {}
+    assert _select_ids(db, query) == expected
+    assert [
+        user["id"] for user in sorter([SCIMDataContainer(user) for user in USERS], User())
+    ] == expected
+
+
+@pytest.mark.parametrize(
+    ("start_index", "count", "expected"),
+    (
+        (1, None, [4, 1, 2, 3]),
+        (2, None, [1, 2, 3]),
+        (2, 2, [1, 2]),
+        (0, 1, [4]),
+        (1, 0, []),
+    ),
+)
+def test_sql_query_is_paginated(db, start_index, count, expected):
+    query, _ = to_sql(
+        User(),
+        TABLE,
+        sorter=Sorter(AttrRep.parse("userName")),
+        start_index=start_index,
+        count=count,
+    )
+
+    assert _select_ids(db, query) == expected